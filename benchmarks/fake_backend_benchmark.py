@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the MCP tools against the in-process fake ECS backend
+
+Builds a fake backend of the requested size, registers the read and write tools on
+a server that uses it, and reports wall time, ECS API calls and result size for
+each tool call. No AWS account or network access is needed.
+
+Usage:
+    uv run benchmarks/fake_backend_benchmark.py
+    uv run benchmarks/fake_backend_benchmark.py --spec "clusters=2,services=1000,tasks=50,latency=0.02"
+    uv run benchmarks/fake_backend_benchmark.py --call 'list_tasks={"cluster_arn": "cluster-0"}'
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.fake_ecs import create_fake_client
+from src.read_tools import register_read_tools
+from src.runtime import ECSFastMCP
+from src.write_tools import register_write_tools
+
+DEFAULT_SPEC = 'clusters=2,services=200,tasks=50,stopped=5,instances=20,latency=0.01'
+
+DEFAULT_CALLS = [
+    'list_clusters={}',
+    'list_services_with_details={"cluster_arn": "cluster-0"}',
+    'list_tasks={"cluster_arn": "cluster-0"}',
+    'analyze_stopped_tasks={"cluster_arn": "cluster-0"}',
+    'get_deployment_statistics={"cluster_arn": "cluster-0"}',
+    'get_namespace_map={"namespace": "internal"}',
+    'find_resources_by_tags={"tags": {"team": "payments"}, "cluster_arns": ["cluster-0"]}',
+]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Benchmark MCP tools against the fake ECS backend')
+    parser.add_argument('--spec', default=DEFAULT_SPEC, help='Fake backend spec (see src/fake_ecs.py)')
+    parser.add_argument('--call', action='append', dest='calls',
+                        help='Tool call as name=JSON arguments (repeatable, default: a read tool mix)')
+    parser.add_argument('--repeat', type=int, default=1, help='Number of times each call is repeated')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    client = create_fake_client(args.spec)
+    backend = client.backend
+    print(f'backend: {sum(len(s) for s in backend.services.values())} services, '
+          f'{sum(len(t) for t in backend.tasks.values())} tasks, '
+          f'{sum(len(i) for i in backend.instances.values())} container instances '
+          f'built in {time.perf_counter() - started:.1f}s')
+
+    mcp = ECSFastMCP('ECS fake backend benchmark', max_result_bytes=0)
+    register_read_tools(mcp, lambda: client)
+    register_write_tools(mcp, lambda: client)
+
+    print(f'{"tool":<32} {"run":>4} {"seconds":>9} {"api calls":>10} {"result bytes":>13}')
+    for call in args.calls or DEFAULT_CALLS:
+        name, _, arguments = call.partition('=')
+        arguments = json.loads(arguments or '{}')
+        for run in range(args.repeat):
+            calls_before = sum(client.call_counts.values())
+            started = time.perf_counter()
+            result = await mcp.call_tool(name, arguments)
+            elapsed = time.perf_counter() - started
+            size = sum(len(content.text) for content in result if hasattr(content, 'text'))
+            api_calls = sum(client.call_counts.values()) - calls_before
+            print(f'{name:<32} {run + 1:>4} {elapsed:>9.3f} {api_calls:>10} {size:>13}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Load test for the AWS ECS MCP Server HTTP transport
+
+Starts an increasing number of concurrent MCP clients against a running server,
+each calling one tool repeatedly, and reports throughput and latency per client count.
+
+Usage:
+    uv run server.py --transport streamable-http --port 8000
+    uv run benchmarks/http_load_test.py --tool list_clusters --clients 1,2,4,8,16
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import List, Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+from src.utils import percentile
+
+
+async def run_client(url: str, tool: str, arguments: Dict[str, Any], requests: int) -> List[float]:
+    """Open one client session and call the tool sequentially, returning latencies"""
+    latencies = []
+    async with streamablehttp_client(url) as (read_stream, write_stream, _):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            for _ in range(requests):
+                started = time.perf_counter()
+                result = await session.call_tool(tool, arguments)
+                latencies.append(time.perf_counter() - started)
+                if result.isError:
+                    raise RuntimeError(f'{tool} failed: {result.content}')
+    return latencies
+
+
+async def run_level(url: str, tool: str, arguments: Dict[str, Any], clients: int, requests: int) -> Dict[str, Any]:
+    """Run one load level with the given number of concurrent clients"""
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        run_client(url, tool, arguments, requests) for _ in range(clients)
+    ])
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for client_latencies in results for latency in client_latencies]
+    return {
+        'clients': clients,
+        'calls': len(latencies),
+        'seconds': elapsed,
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Load test the MCP server HTTP transport')
+    parser.add_argument('--url', default='http://127.0.0.1:8000/mcp', help='Streamable HTTP endpoint')
+    parser.add_argument('--tool', default='list_clusters', help='Tool to call')
+    parser.add_argument('--arguments', default='{}', help='Tool arguments as JSON')
+    parser.add_argument('--clients', default='1,2,4,8,16', help='Comma separated client counts')
+    parser.add_argument('--requests', type=int, default=20, help='Calls per client')
+    args = parser.parse_args()
+
+    arguments = json.loads(args.arguments)
+    print(f'{"clients":>8} {"calls":>7} {"seconds":>8} {"calls/s":>9} {"p50 ms":>8} {"p95 ms":>8}')
+    for clients in [int(c) for c in args.clients.split(',')]:
+        level = await run_level(args.url, args.tool, arguments, clients, args.requests)
+        print(f'{level["clients"]:>8} {level["calls"]:>7} {level["seconds"]:>8.2f} '
+              f'{level["throughput"]:>9.1f} {level["p50_ms"]:>8.1f} {level["p95_ms"]:>8.1f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
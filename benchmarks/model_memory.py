@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark of the slotted resource models against the described dicts
+
+Describes every task, service and container instance of a fake backend, serializes the
+responses to JSON (so parsing creates fresh strings for every response, like botocore)
+and reports the memory retained per resource when keeping the parsed dicts, plain dict
+records of the tracked fields, or the slotted models from src/models.py.
+
+Usage:
+    uv run benchmarks/model_memory.py
+    uv run benchmarks/model_memory.py --spec "clusters=1,services=500,tasks=100,instances=200"
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.fake_ecs import create_fake_client
+from src.models import ServiceState, TaskState, ContainerInstanceState
+from src.utils import paginate, chunked
+
+DEFAULT_SPEC = 'clusters=1,services=200,tasks=100,instances=100'
+
+RESOURCES = [
+    # (name, list method, list key, describe method, describe parameter, describe key, model)
+    ('task', 'list_tasks', 'taskArns', 'describe_tasks', 'tasks', 'tasks', TaskState),
+    ('service', 'list_services', 'serviceArns', 'describe_services', 'services', 'services', ServiceState),
+    ('containerInstance', 'list_container_instances', 'containerInstanceArns',
+     'describe_container_instances', 'containerInstances', 'containerInstances', ContainerInstanceState),
+]
+
+
+def describe_all(client, cluster, list_method, list_key, describe_method, parameter, describe_key):
+    """JSON encoded describe responses of every resource of a type"""
+    arns = paginate(getattr(client, list_method), list_key, cluster=cluster)
+    size = 10 if describe_method == 'describe_services' else 100
+    return [
+        json.dumps(getattr(client, describe_method)(cluster=cluster, **{parameter: batch})[describe_key], default=str)
+        for batch in chunked(arns, size)
+    ]
+
+
+def retained(build):
+    """Result of build and the bytes it still holds after garbage collection"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the memory of described dicts and slotted models')
+    parser.add_argument('--spec', default=DEFAULT_SPEC, help='Fake backend spec (see src/fake_ecs.py)')
+    args = parser.parse_args()
+
+    client = create_fake_client(args.spec)
+    clusters = paginate(client.list_clusters, 'clusterArns')
+
+    print(f'{"resource":<18} {"count":>7} {"dict bytes":>11} {"record bytes":>13} {"model bytes":>12} {"reduction":>10}')
+    for name, list_method, list_key, describe_method, parameter, describe_key, model in RESOURCES:
+        payloads = [
+            payload for cluster in clusters
+            for payload in describe_all(client, cluster, list_method, list_key, describe_method, parameter, describe_key)
+        ]
+
+        def parse():
+            return [item for payload in payloads for item in json.loads(payload)]
+
+        def records():
+            return [{field: item.get(field) for field in model.FIELDS} for item in parse()]
+
+        def models():
+            return [model.from_api(item) for item in parse()]
+
+        items, dict_bytes = retained(parse)
+        count = len(items)
+        del items
+        kept, record_bytes = retained(records)
+        del kept
+        kept, model_bytes = retained(models)
+        del kept
+
+        per = max(count, 1)
+        print(f'{name:<18} {count:>7} {dict_bytes // per:>11} {record_bytes // per:>13} '
+              f'{model_bytes // per:>12} {dict_bytes / max(model_bytes, 1):>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
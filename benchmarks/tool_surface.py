@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Measure startup time and tools/list payload size for tool group selections
+
+Each configuration is measured in a fresh interpreter so import and registration
+costs are included.
+
+Usage:
+    uv run benchmarks/tool_surface.py
+    uv run benchmarks/tool_surface.py --configs "all" "tasks,services" "tasks"
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+sys.argv = ['server.py'] + sys.argv[1:]
+import server
+tools = server.mcp._tool_manager.list_tools()
+elapsed = time.perf_counter() - started
+payload = json.dumps([
+    {'name': t.name, 'description': t.description, 'inputSchema': t.parameters} for t in tools
+])
+print(json.dumps({'tools': len(tools), 'bytes': len(payload), 'seconds': elapsed}))
+"""
+
+
+def measure(root: str, groups: str, compact: bool) -> dict:
+    """Import server.py in a subprocess with the given options and report its tool surface"""
+    args = ['--tool-groups', groups]
+    if compact:
+        args.append('--compact-descriptions')
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE] + args,
+        cwd=root, capture_output=True, text=True, check=True,
+        env={**os.environ, 'AWS_REGION': os.environ.get('AWS_REGION', 'ap-northeast-1')}
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure tools/list size and startup time per tool group selection')
+    parser.add_argument('--configs', nargs='+', default=['all', 'tasks,services', 'tasks'],
+                        help='Tool group selections to measure')
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    print(f'{"tool groups":<30} {"compact":>8} {"tools":>6} {"bytes":>8} {"startup s":>10}')
+    for groups in args.configs:
+        for compact in (False, True):
+            result = measure(root, groups, compact)
+            print(f'{groups:<30} {str(compact):>8} {result["tools"]:>6} {result["bytes"]:>8} {result["seconds"]:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,32 +3,46 @@
 AWS ECS MCP Server (Full version with both read and write operations)
 """
 
-import boto3
 import os
-from mcp.server.fastmcp import FastMCP
+
+from src.attribute_index import AttributeIndex
+from src.poller import StatePoller
+from src.resolver import ArnResolver
+from src.runtime import ECSFastMCP, create_ecs_client_factory, create_profiler, parse_server_args, run_server
 
 # Get AWS authentication credentials
 aws_profile = os.environ.get("AWS_PROFILE")
 aws_region = os.environ.get("AWS_REGION", "ap-northeast-1")  # Default is Tokyo region
 
+# Parse command line options (transport, enabled tool groups)
+args = parse_server_args("AWS ECS Server")
+
+# Initialize ECS client (shared by all tools and clients of this process)
+get_ecs_client = create_ecs_client_factory(aws_profile, aws_region, fake_backend=args.fake_backend,
+                                           snapshot=args.snapshot)
+
 # Create MCP server
-mcp = FastMCP("AWS ECS Server")
+mcp = ECSFastMCP(
+    "AWS ECS Server",
+    tool_groups=args.tool_groups,
+    compact_descriptions=args.compact_descriptions,
+    profiler=create_profiler(args),
+    resolver=ArnResolver(get_ecs_client)
+)
 
-# Initialize ECS client
-def get_ecs_client():
-    session = boto3.Session(
-        profile_name=aws_profile,
-        region_name=aws_region
-    )
-    return session.client('ecs')
+# Optional background poller shared by all clients (get_changes_since)
+poller = StatePoller(get_ecs_client, args.poll_clusters, args.poll_interval) if args.poll_clusters else None
 
 # Import tools from helpers
 from src.read_tools import register_read_tools
 from src.write_tools import register_write_tools
 
-# Register both read and write tools
-register_read_tools(mcp, get_ecs_client)
-register_write_tools(mcp, get_ecs_client)
+# Register both read and write tools (sharing the attribute index)
+attribute_index = AttributeIndex()
+register_read_tools(mcp, get_ecs_client, poller, attribute_index)
+register_write_tools(mcp, get_ecs_client, attribute_index, args.snapshot_dir)
 
 if __name__ == "__main__":
-    mcp.run()
+    if poller:
+        poller.start()
+    run_server(mcp, args)
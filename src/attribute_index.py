@@ -0,0 +1,263 @@
+"""
+Indexed container instance attributes per cluster with incremental refresh
+"""
+
+import threading
+import time
+from typing import List, Dict, Any, Optional, Set
+
+from src.cluster_query import compile_query, instance_record
+from src.models import ContainerInstanceState
+from src.placement import load_task_groups
+from src.utils import paginate, chunked, run_concurrently
+
+# Seconds after which the attributes of a cluster are reloaded completely
+DEFAULT_MAX_AGE = 300
+
+# Seconds between incremental refreshes (new and removed instances)
+DEFAULT_REFRESH_INTERVAL = 30
+
+
+class _ClusterEntry:
+    """Attributes of one cluster, indexed by instance and by attribute name and value"""
+
+    def __init__(self):
+        self.attributes: Dict[str, Dict[str, Optional[str]]] = {}
+        self.by_name: Dict[str, Dict[Optional[str], Set[str]]] = {}
+        self.instances: Dict[str, ContainerInstanceState] = {}
+        self.loaded_at = 0.0
+        self.refreshed_at = 0.0
+        self.described_at = 0.0
+
+    def set(self, target: str, name: str, value: Optional[str]):
+        self.discard(target, name)
+        self.attributes.setdefault(target, {})[name] = value
+        self.by_name.setdefault(name, {}).setdefault(value, set()).add(target)
+
+    def discard(self, target: str, name: str):
+        attributes = self.attributes.get(target, {})
+        if name not in attributes:
+            return
+        value = attributes.pop(name)
+        targets = self.by_name[name][value]
+        targets.discard(target)
+        if not targets:
+            del self.by_name[name][value]
+            if not self.by_name[name]:
+                del self.by_name[name]
+
+    def remove_instance(self, target: str):
+        for name in list(self.attributes.get(target, {})):
+            self.discard(target, name)
+        self.attributes.pop(target, None)
+        self.instances.pop(target, None)
+
+
+class AttributeIndex:
+    """
+    In-memory index of container instance attributes, shared by every tool call
+
+    A cluster is loaded with a fully paginated ListAttributes. Afterwards a refresh only
+    lists the container instances, describes the new ones (their descriptions include
+    their attributes) and drops the removed ones; attribute changes on existing instances
+    are picked up by a full reload after max_age seconds, or immediately when they are
+    made through record_put/record_delete.
+    """
+
+    def __init__(self, max_age: float = DEFAULT_MAX_AGE, refresh_interval: float = DEFAULT_REFRESH_INTERVAL):
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._clusters: Dict[str, _ClusterEntry] = {}
+
+    def _describe(self, client, cluster: str, instance_arns: List[str]) -> List[Dict[str, Any]]:
+        batches = run_concurrently(
+            lambda batch: client.describe_container_instances(
+                cluster=cluster, containerInstances=batch
+            ).get('containerInstances', []),
+            list(chunked(instance_arns, 100))
+        )
+        return [instance for batch in batches for instance in batch]
+
+    def refresh(self, client, cluster: str, force: bool = False) -> Dict[str, Any]:
+        """
+        Load or incrementally refresh the attributes of a cluster
+
+        Args:
+            client: ECS client
+            cluster: Name or ARN of the cluster
+            force: Reload every attribute
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._clusters.get(cluster)
+            full = force or entry is None or now - entry.loaded_at >= self.max_age
+            if not full and now - entry.refreshed_at < self.refresh_interval:
+                return {'refresh': 'none', 'instancesDescribed': 0}
+
+        if full:
+            attributes = paginate(client.list_attributes, 'attributes', cluster=cluster,
+                                  targetType='container-instance', maxResults=100)
+            entry = _ClusterEntry()
+            for attribute in attributes:
+                entry.set(attribute['targetId'], attribute['name'], attribute.get('value'))
+            entry.loaded_at = entry.refreshed_at = now
+            with self._lock:
+                previous = self._clusters.get(cluster)
+                if previous is not None:
+                    entry.instances = {arn: i for arn, i in previous.instances.items() if arn in entry.attributes}
+                    entry.described_at = previous.described_at
+                self._clusters[cluster] = entry
+            return {'refresh': 'full', 'attributesLoaded': len(attributes), 'instancesDescribed': 0}
+
+        instance_arns = set(paginate(client.list_container_instances, 'containerInstanceArns', cluster=cluster))
+        with self._lock:
+            known = set(entry.attributes)
+        added = sorted(instance_arns - known)
+        described = self._describe(client, cluster, added) if added else []
+
+        with self._lock:
+            for target in known - instance_arns:
+                entry.remove_instance(target)
+            for instance in described:
+                target = instance['containerInstanceArn']
+                entry.instances[target] = ContainerInstanceState.from_api(instance)
+                for attribute in instance.get('attributes', []):
+                    entry.set(target, attribute['name'], attribute.get('value'))
+            entry.refreshed_at = now
+
+        return {'refresh': 'incremental', 'instancesAdded': len(added),
+                'instancesRemoved': len(known - instance_arns), 'instancesDescribed': len(described)}
+
+    def record_put(self, cluster: str, attributes: List[Dict[str, Any]]):
+        """
+        Apply attributes written with PutAttributes to a loaded cluster
+
+        Args:
+            cluster: Name or ARN of the cluster as used for refresh
+            attributes: Attributes with name, value and targetId
+        """
+        with self._lock:
+            entry = self._clusters.get(cluster)
+            if entry is not None:
+                for attribute in attributes:
+                    entry.set(attribute['targetId'], attribute['name'], attribute.get('value'))
+
+    def record_delete(self, cluster: str, attributes: List[Dict[str, Any]]):
+        """
+        Apply attributes removed with DeleteAttributes to a loaded cluster
+
+        Args:
+            cluster: Name or ARN of the cluster as used for refresh
+            attributes: Attributes with name and targetId
+        """
+        with self._lock:
+            entry = self._clusters.get(cluster)
+            if entry is not None:
+                for attribute in attributes:
+                    entry.discard(attribute['targetId'], attribute['name'])
+
+    def attributes(self, cluster: str) -> Dict[str, Dict[str, Optional[str]]]:
+        """
+        Attributes of every indexed instance of a cluster, keyed by container instance ARN
+
+        Args:
+            cluster: Name or ARN of the cluster as used for refresh
+        """
+        with self._lock:
+            entry = self._clusters.get(cluster)
+            return {target: dict(values) for target, values in entry.attributes.items()} if entry else {}
+
+    def find(self, cluster: str, name: str, value: Optional[str] = None) -> List[str]:
+        """
+        Instances that have an attribute, optionally with a given value, from the index
+
+        Args:
+            cluster: Name or ARN of the cluster as used for refresh
+            name: Attribute name
+            value: Attribute value (optional, any value when omitted)
+        """
+        with self._lock:
+            entry = self._clusters.get(cluster)
+            values = entry.by_name.get(name, {}) if entry else {}
+            if value is None:
+                return sorted(set().union(*values.values())) if values else []
+            return sorted(values.get(value, ()))
+
+    def values(self, cluster: str, name: str) -> Dict[Optional[str], int]:
+        """
+        Number of instances per value of an attribute
+
+        Args:
+            cluster: Name or ARN of the cluster as used for refresh
+            name: Attribute name
+        """
+        with self._lock:
+            entry = self._clusters.get(cluster)
+            return {value: len(targets) for value, targets in (entry.by_name.get(name, {}) if entry else {}).items()}
+
+    def query(self, client, cluster: str, expression: str) -> List[str]:
+        """
+        Instances of a cluster matching a cluster query expression
+
+        Expressions that only use attributes are answered from the index. Other subjects
+        (agentConnected, runningTasksCount, ...) need instance descriptions, which are
+        reloaded at most every refresh_interval seconds; task:group additionally lists
+        and describes the running tasks of the cluster.
+
+        Args:
+            client: ECS client
+            cluster: Name or ARN of the cluster as used for refresh
+            expression: Cluster query language expression
+        """
+        query = compile_query(expression)
+        self.refresh(client, cluster)
+
+        task_groups: Dict[str, Set[str]] = {}
+        if not query.attribute_only:
+            self._describe_instances(client, cluster)
+        if 'task:group' in query.subjects:
+            task_groups = load_task_groups(client, cluster)
+
+        with self._lock:
+            entry = self._clusters[cluster]
+            matching = []
+            for target, attributes in entry.attributes.items():
+                instance = entry.instances.get(target)
+                record = instance_record(instance.to_api() if instance else {}, task_groups.get(target))
+                record['attributes'] = attributes
+                if query.matches(record):
+                    matching.append(target)
+        return sorted(matching)
+
+    def _describe_instances(self, client, cluster: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._clusters[cluster]
+            if now - entry.described_at < self.refresh_interval:
+                return
+            targets = list(entry.attributes)
+
+        described = self._describe(client, cluster, targets)
+        with self._lock:
+            entry.instances = {
+                instance['containerInstanceArn']: ContainerInstanceState.from_api(instance) for instance in described
+            }
+            entry.described_at = now
+
+    def stats(self, cluster: str) -> Dict[str, Any]:
+        """
+        Size and age of the index of a cluster
+
+        Args:
+            cluster: Name or ARN of the cluster as used for refresh
+        """
+        with self._lock:
+            entry = self._clusters.get(cluster)
+            if entry is None:
+                return {'instancesIndexed': 0}
+            return {
+                'instancesIndexed': len(entry.attributes),
+                'attributeNames': len(entry.by_name),
+                'ageSeconds': round(time.monotonic() - entry.loaded_at, 1),
+            }
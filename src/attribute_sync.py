@@ -0,0 +1,116 @@
+"""
+Desired-state sync of container instance attributes with minimal chunked writes
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from src.attribute_index import AttributeIndex
+from src.utils import chunked, run_concurrently
+
+# Maximum number of attributes per PutAttributes and DeleteAttributes call
+ATTRIBUTES_PER_CALL = 10
+
+# Prefix of the attributes ECS maintains itself; they cannot be changed or deleted
+BUILT_IN_PREFIX = 'ecs.'
+
+
+def _target_id(target: str) -> str:
+    """Container instance ID of an ARN or ID"""
+    return target.rsplit('/', 1)[-1]
+
+
+def diff_attributes(current: Dict[str, Dict[str, Optional[str]]],
+                    desired: Dict[str, Dict[str, Optional[str]]],
+                    prune: bool = False) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Attributes to put and to delete so that the instances end up with the desired attributes
+
+    Args:
+        current: Current attributes by container instance ARN
+        desired: Desired attributes by container instance ARN or ID; a None value is an attribute without value
+        prune: Also delete custom attributes of the desired instances that are not desired
+    """
+    arns = {_target_id(arn): arn for arn in current}
+    puts, deletes = [], []
+    for target, attributes in desired.items():
+        arn = arns.get(_target_id(target), target)
+        existing = current.get(arn, {})
+        for name, value in attributes.items():
+            if name.startswith(BUILT_IN_PREFIX):
+                raise ValueError(f"Attribute {name} is maintained by ECS and cannot be set")
+            if name not in existing or existing[name] != value:
+                attribute = {'name': name, 'targetId': arn}
+                if value is not None:
+                    attribute['value'] = value
+                puts.append(attribute)
+        if prune:
+            deletes.extend(
+                {'name': name, 'targetId': arn}
+                for name in sorted(existing)
+                if name not in attributes and not name.startswith(BUILT_IN_PREFIX)
+            )
+    return puts, deletes
+
+
+def _apply(method, cluster: str, attributes: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Write attributes in chunks concurrently, returning the applied attributes and failed chunks"""
+    def write(chunk):
+        try:
+            method(cluster=cluster, attributes=chunk)
+            return chunk, None
+        except ClientError as e:
+            return [], {'attributes': chunk, 'error': e.response.get('Error', {}).get('Message', str(e))}
+
+    results = run_concurrently(write, list(chunked(attributes, ATTRIBUTES_PER_CALL)))
+    applied = [attribute for chunk, _ in results for attribute in chunk]
+    failures = [failure for _, failure in results if failure]
+    return applied, failures
+
+
+def sync_attributes(client, index: AttributeIndex, cluster: str,
+                    desired: Dict[str, Dict[str, Optional[str]]], prune: bool = False,
+                    refresh: bool = True, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Bring container instance attributes to a desired state
+
+    The current attributes come from the attribute index (reloaded with a paginated
+    ListAttributes when refresh is set), so the number of write calls only depends on
+    the number of differing attributes. Puts and deletes go out in chunks of 10
+    concurrently, and the index is updated with every chunk that succeeded.
+
+    Args:
+        client: ECS client
+        index: Attribute index shared with the read tools
+        cluster: Name or ARN of the cluster
+        desired: Desired attributes by container instance ARN or ID
+        prune: Also delete custom attributes of the desired instances that are not desired
+        refresh: Reload the current attributes instead of trusting the index
+        dry_run: Only compute the changes
+    """
+    index.refresh(client, cluster, force=refresh)
+    puts, deletes = diff_attributes(index.attributes(cluster), desired, prune)
+
+    result = {
+        'instances': len(desired),
+        'toPut': len(puts),
+        'toDelete': len(deletes),
+        'writeCalls': -(-len(puts) // ATTRIBUTES_PER_CALL) - (-len(deletes) // ATTRIBUTES_PER_CALL),
+    }
+    if dry_run:
+        result.update({'puts': puts, 'deletes': deletes, 'dryRun': True})
+        return result
+
+    # Puts and deletes never touch the same attribute, so they can run side by side
+    (put, put_failures), (deleted, delete_failures) = run_concurrently(
+        lambda job: _apply(job[0], cluster, job[1]),
+        [(client.put_attributes, puts), (client.delete_attributes, deletes)]
+    )
+    index.record_put(cluster, put)
+    index.record_delete(cluster, deleted)
+
+    result.update({'put': len(put), 'deleted': len(deleted)})
+    if put_failures or delete_failures:
+        result['failures'] = put_failures + delete_failures
+    return result
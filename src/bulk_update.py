@@ -0,0 +1,236 @@
+"""
+Rolling bulk service updates with a concurrency window
+"""
+
+import time
+from typing import List, Dict, Any, Optional
+
+from botocore.exceptions import ClientError
+
+from src.cancellation import sleep
+from src.tags import tags_to_dict
+from src.task_definitions import registration_params, task_definition_hash
+from src.utils import describe_services_batched, paginate, chunked, run_concurrently
+
+
+def select_services(client, cluster: str, services: Optional[List[str]] = None,
+                    name_prefix: Optional[str] = None,
+                    tags: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """
+    Describe the ACTIVE services of a cluster matching an explicit list, a name prefix and/or tags
+
+    Args:
+        client: ECS client
+        cluster: Name or ARN of the cluster
+        services: Service names or ARNs (optional, defaults to every service in the cluster)
+        name_prefix: Only select services whose name starts with this prefix (optional)
+        tags: Only select services carrying all of these tags (optional)
+    """
+    if not services:
+        services = paginate(client.list_services, 'serviceArns', cluster=cluster)
+
+    selected = []
+    for service in describe_services_batched(client, cluster, services, include_tags=bool(tags)):
+        if service.get('status') != 'ACTIVE':
+            continue
+        if name_prefix and not service['serviceName'].startswith(name_prefix):
+            continue
+        if tags:
+            service_tags = tags_to_dict(service.get('tags'))
+            if any(service_tags.get(key) != value for key, value in tags.items()):
+                continue
+        selected.append(service)
+
+    return selected
+
+
+def deployment_state(service: Dict[str, Any], deployment_id: Optional[str]) -> str:
+    """
+    Get the state of a deployment: COMPLETED, FAILED or IN_PROGRESS
+
+    Uses rolloutState when ECS reports it, otherwise treats a single PRIMARY
+    deployment whose running count reached the desired count as completed.
+
+    Args:
+        service: Service as returned by DescribeServices
+        deployment_id: ID of the deployment to check (optional, defaults to the PRIMARY deployment)
+    """
+    deployments = service.get('deployments', [])
+    primary = next((d for d in deployments if d.get('status') == 'PRIMARY'), None)
+    deployment = primary if deployment_id is None \
+        else next((d for d in deployments if d.get('id') == deployment_id), None)
+
+    if deployment is None:
+        # Replaced by another deployment, e.g. a circuit breaker rollback
+        return 'FAILED'
+    if deployment.get('rolloutState') == 'FAILED':
+        return 'FAILED'
+    if deployment is not primary:
+        # Superseded by a newer deployment
+        return 'FAILED'
+    if deployment.get('rolloutState') == 'COMPLETED':
+        return 'COMPLETED'
+    if 'rolloutState' not in deployment and len(deployments) == 1 and \
+            deployment.get('runningCount') == deployment.get('desiredCount'):
+        return 'COMPLETED'
+    return 'IN_PROGRESS'
+
+
+def wait_for_deployments(client, cluster: str, deployments: Dict[str, Optional[str]],
+                         timeout: float, poll_interval: float) -> Dict[str, str]:
+    """
+    Poll services with batched describe calls until their deployments finish
+
+    Args:
+        client: ECS client
+        cluster: Name or ARN of the cluster
+        deployments: Mapping of service ARN to the deployment ID to wait for
+        timeout: Maximum number of seconds to wait
+        poll_interval: Seconds between polls
+    """
+    states = {arn: 'IN_PROGRESS' for arn in deployments}
+    deadline = time.monotonic() + timeout
+
+    while True:
+        pending = [arn for arn, state in states.items() if state == 'IN_PROGRESS']
+        if not pending:
+            return states
+
+        for service in describe_services_batched(client, cluster, pending):
+            states[service['serviceArn']] = deployment_state(service, deployments[service['serviceArn']])
+
+        if all(state != 'IN_PROGRESS' for state in states.values()):
+            return states
+        if time.monotonic() + poll_interval > deadline:
+            return {arn: 'TIMED_OUT' if state == 'IN_PROGRESS' else state for arn, state in states.items()}
+        sleep(poll_interval)
+
+
+def _with_images(client, task_definition: str, container_images: Dict[str, str]) -> Optional[str]:
+    """Register a revision of a task definition with new container images
+
+    The new revision carries the tags of the one it is based on. Returns the task
+    definition ARN to deploy, or None when the images are already current.
+    """
+    response = client.describe_task_definition(taskDefinition=task_definition, include=['TAGS'])
+    current = response['taskDefinition']
+    params = registration_params(current)
+    if response.get('tags'):
+        params['tags'] = response['tags']
+    params['containerDefinitions'] = [
+        dict(c, image=container_images[c['name']]) if c['name'] in container_images else c
+        for c in params['containerDefinitions']
+    ]
+    if task_definition_hash(params) == task_definition_hash(current):
+        return None
+
+    response = client.register_task_definition(**params)
+    return response['taskDefinition']['taskDefinitionArn']
+
+
+def rolling_update(client, cluster: str, services: List[Dict[str, Any]],
+                   task_definition: Optional[str] = None,
+                   container_images: Optional[Dict[str, str]] = None,
+                   desired_count: Optional[int] = None,
+                   force_new_deployment: bool = False,
+                   batch_size: int = 5,
+                   max_failures: int = 0,
+                   wait_for_steady_state: bool = True,
+                   batch_timeout: float = 900,
+                   poll_interval: float = 15) -> List[Dict[str, Any]]:
+    """
+    Update services batch by batch, waiting for each batch to stabilize before the next
+
+    The rollout stops once more than max_failures services failed to update or
+    deploy; the remaining services are reported as SKIPPED.
+
+    Args:
+        client: ECS client
+        cluster: Name or ARN of the cluster
+        services: Services as returned by DescribeServices
+        task_definition: Task definition to deploy to every service (optional)
+        container_images: Container name to image mapping applied to each service's current task definition (optional)
+        desired_count: Desired count to set on every service (optional)
+        force_new_deployment: Whether to force a new deployment
+        batch_size: Number of services updated concurrently
+        max_failures: Number of failed services tolerated before stopping
+        wait_for_steady_state: Whether to wait for each batch's deployments to finish
+        batch_timeout: Maximum seconds to wait for one batch
+        poll_interval: Seconds between deployment status polls
+    """
+    results = {
+        s['serviceArn']: {'serviceArn': s['serviceArn'], 'serviceName': s['serviceName'], 'status': 'SKIPPED'}
+        for s in services
+    }
+    # Task definitions with replaced images, keyed by the task definition they are based on.
+    # Services sharing a task definition share one new revision.
+    image_targets: Dict[str, Any] = {}
+    failures = 0
+
+    def register_images(source):
+        try:
+            return _with_images(client, source, container_images)
+        except ClientError as e:
+            return e
+
+    def update(service):
+        result = results[service['serviceArn']]
+        params = {
+            'cluster': cluster,
+            'service': service['serviceArn'],
+            'forceNewDeployment': force_new_deployment
+        }
+
+        target = task_definition
+        if container_images:
+            target = image_targets[service['taskDefinition']]
+            if isinstance(target, ClientError):
+                result['status'] = 'FAILED'
+                result['reason'] = str(target)
+                return None
+        if target and target != service['taskDefinition']:
+            params['taskDefinition'] = target
+        if desired_count is not None and desired_count != service.get('desiredCount'):
+            params['desiredCount'] = desired_count
+
+        if 'taskDefinition' not in params and 'desiredCount' not in params and not force_new_deployment:
+            result['status'] = 'UNCHANGED'
+            return None
+
+        try:
+            updated = client.update_service(**params)['service']
+        except ClientError as e:
+            result['status'] = 'FAILED'
+            result['reason'] = str(e)
+            return None
+
+        primary = next((d for d in updated.get('deployments', []) if d.get('status') == 'PRIMARY'), {})
+        result['status'] = 'UPDATED'
+        result['taskDefinition'] = updated.get('taskDefinition')
+        result['deploymentId'] = primary.get('id')
+        return primary.get('id')
+
+    for batch in chunked(services, batch_size):
+        if container_images:
+            sources = sorted({s['taskDefinition'] for s in batch} - set(image_targets))
+            image_targets.update(zip(sources, run_concurrently(register_images, sources)))
+
+        deployment_ids = run_concurrently(update, batch, max_workers=batch_size)
+        pending = {
+            service['serviceArn']: deployment_id
+            for service, deployment_id in zip(batch, deployment_ids)
+            if results[service['serviceArn']]['status'] == 'UPDATED'
+        }
+
+        if wait_for_steady_state and pending:
+            states = wait_for_deployments(client, cluster, pending, batch_timeout, poll_interval)
+            for arn, state in states.items():
+                results[arn]['status'] = 'COMPLETED' if state == 'COMPLETED' else 'FAILED'
+                if state != 'COMPLETED':
+                    results[arn]['reason'] = f'Deployment {state.lower().replace("_", " ")}'
+
+        failures += sum(1 for s in batch if results[s['serviceArn']]['status'] == 'FAILED')
+        if failures > max_failures:
+            break
+
+    return list(results.values())
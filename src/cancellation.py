@@ -0,0 +1,156 @@
+"""
+Deadlines and cancellation of tool invocations, propagated to AWS calls
+
+Every tool invocation runs inside a CancelScope kept in a context variable. The ECS
+client checks the scope before every API call, so a cancelled or expired invocation
+stops at its next call instead of finishing work nobody waits for. Worker threads
+started with src.utils.run_concurrently inherit the scope of their caller.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+
+class ToolCancelled(Exception):
+    """
+    The tool invocation was cancelled by the client
+    """
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    The tool invocation ran past its deadline
+    """
+
+
+class CancelScope:
+    """
+    Cancellation flag and optional deadline of one tool invocation
+
+    Args:
+        timeout: Seconds until the deadline (optional, no deadline when omitted)
+        name: Name used in error messages (optional)
+    """
+
+    def __init__(self, timeout: Optional[float] = None, name: Optional[str] = None):
+        self.name = name or 'tool'
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        Cancel the invocation; its next AWS call or sleep raises ToolCancelled
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """
+        Seconds left until the deadline, or None without a deadline
+        """
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def check(self):
+        """
+        Raise if the invocation was cancelled or its deadline has passed
+        """
+        if self.cancelled:
+            raise ToolCancelled(f'{self.name} was cancelled')
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise DeadlineExceeded(f'{self.name} exceeded its deadline of {self.timeout:g} seconds')
+
+    def sleep(self, seconds: float):
+        """
+        Sleep, waking up early to raise when the invocation is cancelled or times out
+
+        Args:
+            seconds: Seconds to sleep
+        """
+        self.check()
+        remaining = self.remaining()
+        if remaining is not None and remaining < seconds:
+            self._cancelled.wait(max(0.0, remaining))
+        else:
+            self._cancelled.wait(seconds)
+        self.check()
+
+
+_current_scope: contextvars.ContextVar[Optional[CancelScope]] = contextvars.ContextVar('cancel_scope', default=None)
+
+
+def current_scope() -> Optional[CancelScope]:
+    """
+    The scope of the running tool invocation, if any
+    """
+    return _current_scope.get()
+
+
+def check_cancelled(**kwargs):
+    """
+    Raise if the running tool invocation was cancelled or timed out
+
+    Accepts and ignores keyword arguments so it can be registered as a botocore
+    before-call event handler.
+    """
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.check()
+
+
+def sleep(seconds: float):
+    """
+    time.sleep that is interrupted when the running tool invocation is cancelled
+
+    Args:
+        seconds: Seconds to sleep
+    """
+    scope = _current_scope.get()
+    if scope is None:
+        time.sleep(seconds)
+    else:
+        scope.sleep(seconds)
+
+
+def run_in_scope(scope: CancelScope, fn: Callable, *args, **kwargs) -> Any:
+    """
+    Call fn with scope as the current scope
+
+    Args:
+        scope: Scope of the invocation
+        fn: Function to call
+        *args: Positional arguments for fn
+        **kwargs: Keyword arguments for fn
+    """
+    token = _current_scope.set(scope)
+    try:
+        scope.check()
+        return fn(*args, **kwargs)
+    finally:
+        _current_scope.reset(token)
+
+
+@contextmanager
+def shielded(timeout: Optional[float] = None, name: Optional[str] = None) -> Iterator[CancelScope]:
+    """
+    Run a block under a fresh scope instead of the current one
+
+    Cleanup such as a rollback has to make AWS calls even after the invocation was
+    cancelled or ran past its deadline; the fresh scope gives it its own deadline.
+
+    Args:
+        timeout: Seconds until the deadline of the block (optional, no deadline when omitted)
+        name: Name used in error messages (optional)
+    """
+    scope = CancelScope(timeout, name)
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
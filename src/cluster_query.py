@@ -0,0 +1,252 @@
+"""
+Local evaluator for the ECS cluster query language
+
+Expressions have the form "subject operator [argument]" and can be combined with
+and (&&), or (||), not (!) and parentheses, e.g.
+
+    attribute:ecs.instance-type =~ t3.* and not attribute:ecs.availability-zone in [us-east-1a, us-east-1b]
+    runningTasksCount == 0 or task:group == service:production
+"""
+
+import re
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from typing import List, Dict, Any, Optional, Callable, Set
+
+_TOKEN = re.compile(r"""\s*(
+    \(|\)|\[|\]|,|&&|\|\||==|!=|>=|<=|=~|!~|>|<
+    |'[^']*'|"[^"]*"
+    |!?[^\s()\[\],<>=!~&|'"]+
+    |!
+)""", re.VERBOSE)
+
+_OPERATORS = {
+    '==': '==', 'equals': '==',
+    '!=': '!=', 'not_equals': '!=',
+    '>': '>', 'greater_than': '>',
+    '>=': '>=', 'greater_than_equal': '>=',
+    '<': '<', 'less_than': '<',
+    '<=': '<=', 'less_than_equal': '<=',
+    'exists': 'exists',
+    '!exists': '!exists', 'not_exists': '!exists',
+    'in': 'in',
+    '!in': '!in', 'not_in': '!in',
+    '=~': '=~', 'matches': '=~',
+    '!~': '!~', 'not_matches': '!~',
+}
+
+SUBJECTS = ['agentConnected', 'agentVersion', 'ec2InstanceId', 'registeredAt', 'runningTasksCount', 'task:group']
+
+
+def instance_record(instance: Dict[str, Any], task_groups: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """
+    Values of every query subject for a container instance
+
+    Args:
+        instance: Container instance as returned by DescribeContainerInstances
+        task_groups: Groups of the tasks running on the instance (optional)
+    """
+    return {
+        'attributes': {a['name']: a.get('value') for a in instance.get('attributes', [])},
+        'agentConnected': str(instance.get('agentConnected', False)).lower(),
+        'agentVersion': instance.get('versionInfo', {}).get('agentVersion'),
+        'ec2InstanceId': instance.get('ec2InstanceId'),
+        'registeredAt': instance.get('registeredAt'),
+        'runningTasksCount': instance.get('runningTasksCount'),
+        'taskGroups': task_groups or set(),
+    }
+
+
+def _tokenize(expression: str) -> List[str]:
+    tokens, position = [], 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Invalid cluster query near: {expression[position:]}")
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+
+def _unquote(token: str) -> str:
+    if len(token) >= 2 and token[0] == token[-1] and token[0] in '\'"':
+        return token[1:-1]
+    return token
+
+
+def _version(value: str):
+    return tuple(int(part) if part.isdigit() else part for part in re.split(r'[.\-]', value))
+
+
+def _timestamp(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _ordered(subject: str, left: Any, right: str):
+    """Comparable forms of a subject value and an argument"""
+    if subject == 'registeredAt':
+        return _timestamp(left), _timestamp(right)
+    if subject == 'agentVersion':
+        return _version(str(left)), _version(right)
+    try:
+        return float(left), float(right)
+    except (TypeError, ValueError):
+        return str(left), right
+
+
+def _equals(value: Any, argument: str) -> bool:
+    if value is None:
+        return False
+    if '*' in argument:
+        return fnmatchcase(str(value), argument)
+    return str(value) == argument
+
+
+class ClusterQuery:
+    """
+    A compiled cluster query expression
+
+    subjects holds the subjects the expression refers to (attribute:name for attributes),
+    so callers only need to load the data the expression actually uses.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.subjects: Set[str] = set()
+        self._tokens = _tokenize(expression)
+        self._position = 0
+        if not self._tokens:
+            raise ValueError("Empty cluster query")
+        self._evaluate = self._or()
+        if self._position != len(self._tokens):
+            raise ValueError(f"Unexpected token in cluster query: {self._tokens[self._position]}")
+
+    def matches(self, record: Dict[str, Any]) -> bool:
+        """
+        Whether an instance record from instance_record satisfies the expression
+
+        Args:
+            record: Subject values of a container instance
+        """
+        return self._evaluate(record)
+
+    @property
+    def attribute_only(self) -> bool:
+        """Whether the expression only refers to attributes"""
+        return all(subject.startswith('attribute:') for subject in self.subjects)
+
+    # Recursive descent parser producing closures
+
+    def _peek(self) -> Optional[str]:
+        return self._tokens[self._position] if self._position < len(self._tokens) else None
+
+    def _next(self) -> str:
+        token = self._peek()
+        if token is None:
+            raise ValueError(f"Unexpected end of cluster query: {self.expression}")
+        self._position += 1
+        return token
+
+    def _or(self) -> Callable:
+        terms = [self._and()]
+        while self._peek() in ('or', '||'):
+            self._next()
+            terms.append(self._and())
+        return terms[0] if len(terms) == 1 else lambda record: any(term(record) for term in terms)
+
+    def _and(self) -> Callable:
+        terms = [self._not()]
+        while self._peek() in ('and', '&&'):
+            self._next()
+            terms.append(self._not())
+        return terms[0] if len(terms) == 1 else lambda record: all(term(record) for term in terms)
+
+    def _not(self) -> Callable:
+        if self._peek() in ('not', '!'):
+            self._next()
+            term = self._not()
+            return lambda record: not term(record)
+        if self._peek() == '(':
+            self._next()
+            term = self._or()
+            if self._next() != ')':
+                raise ValueError(f"Missing closing parenthesis in cluster query: {self.expression}")
+            return term
+        return self._comparison()
+
+    def _arguments(self) -> List[str]:
+        # ECS documents lists as [a, b]; (a, b) is accepted as well
+        closing = {'[': ']', '(': ')'}.get(self._peek())
+        if closing is None:
+            return [_unquote(self._next())]
+        self._next()
+        arguments = []
+        while True:
+            arguments.append(_unquote(self._next()))
+            separator = self._next()
+            if separator == closing:
+                return arguments
+            if separator != ',':
+                raise ValueError(f"Expected ',' or '{closing}' in cluster query list: {self.expression}")
+
+    def _comparison(self) -> Callable:
+        subject = self._next()
+        if not subject.startswith('attribute:') and subject not in SUBJECTS:
+            raise ValueError(f"Unknown cluster query subject: {subject}")
+        operator = _OPERATORS.get(self._next())
+        if operator is None:
+            raise ValueError(f"Unknown operator in cluster query: {self._tokens[self._position - 1]}")
+        self.subjects.add(subject)
+
+        if subject.startswith('attribute:'):
+            name = subject[len('attribute:'):]
+            get_values = lambda record: [record['attributes'].get(name)] if name in record['attributes'] else []
+        elif subject == 'task:group':
+            get_values = lambda record: sorted(record.get('taskGroups', ()))
+        else:
+            get_values = lambda record: [record.get(subject)] if record.get(subject) is not None else []
+
+        if operator in ('exists', '!exists'):
+            exists = operator == 'exists'
+            return lambda record: bool(get_values(record)) == exists
+
+        arguments = self._arguments() if operator in ('in', '!in') else [_unquote(self._next())]
+        argument = arguments[0]
+
+        if operator in ('==', 'in'):
+            return lambda record: any(_equals(v, a) for v in get_values(record) for a in arguments)
+        if operator in ('!=', '!in'):
+            return lambda record: not any(_equals(v, a) for v in get_values(record) for a in arguments)
+        if operator in ('=~', '!~'):
+            pattern = re.compile(argument)
+            wanted = operator == '=~'
+            return lambda record: any(
+                v is not None and pattern.fullmatch(str(v)) for v in get_values(record)
+            ) == wanted
+
+        def compare(record):
+            for value in get_values(record):
+                left, right = _ordered(subject, value, argument)
+                try:
+                    if operator == '>' and left > right or operator == '>=' and left >= right \
+                            or operator == '<' and left < right or operator == '<=' and left <= right:
+                        return True
+                except TypeError:
+                    continue
+            return False
+
+        return compare
+
+
+def compile_query(expression: str) -> ClusterQuery:
+    """
+    Parse a cluster query expression
+
+    Args:
+        expression: Cluster query language expression
+    """
+    return ClusterQuery(expression)
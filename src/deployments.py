@@ -0,0 +1,126 @@
+"""
+Fleet-wide service deployment history and duration statistics
+"""
+
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from src.utils import paginate, chunked, run_concurrently, percentile
+
+# DescribeServiceDeployments accepts at most 20 ARNs per call
+DESCRIBE_BATCH_SIZE = 20
+
+ROLLBACK_STATUSES = {'ROLLBACK_REQUESTED', 'ROLLBACK_IN_PROGRESS', 'ROLLBACK_SUCCESSFUL', 'ROLLBACK_FAILED'}
+FINISHED_STATUSES = {'SUCCESSFUL', 'STOPPED', 'ROLLBACK_SUCCESSFUL', 'ROLLBACK_FAILED'}
+
+
+def list_deployments(client, cluster: str, service: str,
+                     created_after: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    List every deployment of a service, following pagination
+
+    Args:
+        client: ECS client
+        cluster: Name or ARN of the cluster
+        service: Name or ARN of the service
+        created_after: Only list deployments created after this time (optional)
+    """
+    params = {'cluster': cluster, 'service': service}
+    if created_after:
+        params['createdAt'] = {'after': created_after}
+    return paginate(client.list_service_deployments, 'serviceDeployments', **params)
+
+
+def describe_deployments(client, deployment_arns: List[str]) -> List[Dict[str, Any]]:
+    """
+    Describe any number of service deployments in concurrent chunks of 20
+
+    Args:
+        client: ECS client
+        deployment_arns: Service deployment ARNs
+    """
+    batches = run_concurrently(
+        lambda batch: client.describe_service_deployments(serviceDeploymentArns=batch).get('serviceDeployments', []),
+        list(chunked(deployment_arns, DESCRIBE_BATCH_SIZE))
+    )
+    return [deployment for batch in batches for deployment in batch]
+
+
+def deployment_duration(deployment: Dict[str, Any]) -> Optional[float]:
+    """
+    Get the duration of a finished deployment in seconds
+
+    Args:
+        deployment: Service deployment (brief or detailed)
+    """
+    started = deployment.get('startedAt') or deployment.get('createdAt')
+    finished = deployment.get('finishedAt') or deployment.get('stoppedAt')
+    if not started or not finished:
+        return None
+    return (finished - started).total_seconds()
+
+
+def is_failed(deployment: Dict[str, Any]) -> bool:
+    """
+    Check whether a deployment failed (was rolled back or tripped the circuit breaker)
+
+    Args:
+        deployment: Service deployment (brief or detailed)
+    """
+    if deployment.get('status') in ROLLBACK_STATUSES or deployment.get('rollback'):
+        return True
+    return deployment.get('deploymentCircuitBreaker', {}).get('status') == 'TRIGGERED'
+
+
+def _summarize(deployments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    durations = [d for d in (deployment_duration(dep) for dep in deployments) if d is not None]
+    finished = [d for d in deployments if d.get('status') in FINISHED_STATUSES]
+    failed = [d for d in finished if is_failed(d)]
+
+    statuses = {}
+    for deployment in deployments:
+        statuses[deployment.get('status')] = statuses.get(deployment.get('status'), 0) + 1
+
+    return {
+        'deployments': len(deployments),
+        'statuses': statuses,
+        'failed': len(failed),
+        'failureRate': round(len(failed) / len(finished), 4) if finished else None,
+        'durationSeconds': {
+            'p50': percentile(durations, 50),
+            'p95': percentile(durations, 95),
+            'max': max(durations) if durations else None
+        }
+    }
+
+
+def deployment_statistics(deployments: List[Dict[str, Any]], slowest: int = 10) -> Dict[str, Any]:
+    """
+    Compute duration and failure statistics per service and for the whole set
+
+    Args:
+        deployments: Service deployments (brief or detailed)
+        slowest: Number of slowest deployments to list
+    """
+    by_service: Dict[str, List[Dict[str, Any]]] = {}
+    for deployment in deployments:
+        by_service.setdefault(deployment['serviceArn'], []).append(deployment)
+
+    ranked = sorted(
+        (d for d in deployments if deployment_duration(d) is not None),
+        key=deployment_duration, reverse=True
+    )
+
+    return {
+        'total': _summarize(deployments),
+        'services': {arn: _summarize(service_deployments) for arn, service_deployments in sorted(by_service.items())},
+        'slowest': [
+            {
+                'serviceDeploymentArn': d['serviceDeploymentArn'],
+                'serviceArn': d['serviceArn'],
+                'status': d.get('status'),
+                'durationSeconds': deployment_duration(d)
+            }
+            for d in ranked[:slowest]
+        ]
+    }
@@ -0,0 +1,1354 @@
+"""
+In-process fake ECS backend for offline load and scale testing
+
+FakeECSBackend keeps clusters, services, tasks, container instances, task definitions,
+task sets, deployments, attributes and tags in memory. FakeECSClient exposes it with
+the same method names, parameters and response shapes as a boto3 ECS client, including
+parameter validation against the botocore service model, pagination, per-call batch
+limits, injected latency, random server errors and throttling.
+
+Tasks are stored in a compact form and rendered on demand, so backends with 100k tasks
+stay small enough to benchmark on a laptop.
+"""
+
+import base64
+import copy
+import itertools
+import math
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+import botocore.session
+from botocore import xform_name
+from botocore.exceptions import ClientError
+from botocore.validate import validate_parameters
+
+REGION = 'ap-northeast-1'
+ACCOUNT = '123456789012'
+
+# (default, maximum) page sizes of list operations
+PAGE_SIZES = {
+    'ListClusters': (100, 100),
+    'ListServices': (10, 100),
+    'ListServicesByNamespace': (10, 100),
+    'ListTasks': (100, 100),
+    'ListContainerInstances': (100, 100),
+    'ListTaskDefinitions': (100, 100),
+    'ListTaskDefinitionFamilies': (100, 100),
+    'ListAttributes': (100, 100),
+    'ListServiceDeployments': (20, 100),
+    'ListAccountSettings': (10, 10),
+    'DescribeCapacityProviders': (10, 10),
+}
+
+# Maximum number of items accepted by batch operations, keyed by operation and parameter
+BATCH_LIMITS = {
+    ('DescribeClusters', 'clusters'): 100,
+    ('DescribeServices', 'services'): 10,
+    ('DescribeTasks', 'tasks'): 100,
+    ('DescribeContainerInstances', 'containerInstances'): 100,
+    ('DescribeServiceDeployments', 'serviceDeploymentArns'): 20,
+    ('DescribeServiceRevisions', 'serviceRevisionArns'): 20,
+    ('DescribeCapacityProviders', 'capacityProviders'): 10,
+    ('GetTaskProtection', 'tasks'): 100,
+    ('UpdateTaskProtection', 'tasks'): 10,
+    ('PutAttributes', 'attributes'): 10,
+    ('DeleteAttributes', 'attributes'): 10,
+    ('DeleteTaskDefinitions', 'taskDefinitions'): 10,
+}
+
+_TEAMS = ['payments', 'search', 'platform', 'data', 'growth']
+_STOP_REASONS = [
+    ('EssentialContainerExited', 'Essential container in task exited', [1, 137, 139]),
+    ('TaskFailedToStart', 'CannotPullContainerError: pull image manifest has been retried 5 time(s)', [None]),
+    ('ServiceSchedulerInitiated', 'Scaling activity initiated by (deployment ecs-svc/1234567890)', [0]),
+    ('SpotInterruption', 'Your Spot Task was interrupted.', [143]),
+]
+_LAUNCH_CAPACITY = {'FARGATE': 'FARGATE', 'FARGATE_SPOT': 'FARGATE_SPOT'}
+
+_service_model = None
+
+
+def _get_service_model():
+    global _service_model
+    if _service_model is None:
+        _service_model = botocore.session.get_session().get_service_model('ecs')
+    return _service_model
+
+
+def _error(code: str, message: str, operation: str, status: int = 400) -> ClientError:
+    return ClientError({
+        'Error': {'Code': code, 'Message': message},
+        'ResponseMetadata': {'HTTPStatusCode': status}
+    }, operation)
+
+
+def _name(ref: str, resource: str) -> str:
+    """Short name of a resource given its name or ARN"""
+    if ref.startswith('arn:'):
+        return ref.split(f':{resource}/', 1)[-1].split('/')[-1]
+    return ref
+
+
+class _FakeTask:
+    """Compact task record; rendered to the DescribeTasks format on demand"""
+
+    __slots__ = (
+        'task_id', 'cluster', 'task_definition', 'group', 'started_by', 'launch_type',
+        'capacity_provider', 'availability_zone', 'container_instance', 'last_status',
+        'desired_status', 'created_at', 'pull_started_at', 'pull_stopped_at', 'started_at',
+        'connectivity_at', 'stopped_at', 'stop_code', 'stopped_reason', 'exit_code',
+        'protected', 'protection_expires_at', 'cpu', 'memory'
+    )
+
+
+class _Bucket:
+    """Token bucket used to simulate API throttling"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class FakeECSBackend:
+    """
+    In-memory ECS state shared by any number of FakeECSClient instances
+
+    Deployments and task set scale changes complete deployment_seconds after they are
+    started; a deployment_failure_rate fraction of deployments is rolled back instead.
+    """
+
+    def __init__(self, region: str = REGION, account: str = ACCOUNT, deployment_seconds: float = 0.0,
+                 deployment_failure_rate: float = 0.0, seed: int = 0):
+        self.region = region
+        self.account = account
+        self.deployment_seconds = deployment_seconds
+        self.deployment_failure_rate = deployment_failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+
+        self.clusters: Dict[str, Dict[str, Any]] = {}
+        self.services: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.tasks: Dict[str, Dict[str, _FakeTask]] = {}
+        self.instances: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.task_definitions: Dict[str, List[Dict[str, Any]]] = {}
+        self.capacity_providers: Dict[str, Dict[str, Any]] = {}
+        self.task_sets: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+        self.service_deployments: Dict[str, Dict[str, Any]] = {}
+        self.service_revisions: Dict[str, Dict[str, Any]] = {}
+        self.attributes: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = {}
+        self.tags: Dict[str, List[Dict[str, str]]] = {}
+        self.account_settings: Dict[str, Dict[str, Any]] = {}
+        self.namespaces: Dict[str, List[str]] = {}
+
+        self._rollouts: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._snapshots: "OrderedDict[str, List[Any]]" = OrderedDict()
+
+        for name in ('FARGATE', 'FARGATE_SPOT'):
+            self.capacity_providers[name] = {
+                'capacityProviderArn': self.arn('capacity-provider', name),
+                'name': name, 'status': 'ACTIVE', 'tags': []
+            }
+
+    # Helpers
+
+    def arn(self, resource: str, path: str) -> str:
+        return f'arn:aws:ecs:{self.region}:{self.account}:{resource}/{path}'
+
+    @staticmethod
+    def now() -> datetime:
+        return datetime.now(timezone.utc)
+
+    def _cluster(self, ref: Optional[str], operation: str) -> str:
+        name = _name(ref or 'default', 'cluster')
+        if name not in self.clusters or self.clusters[name]['status'] == 'INACTIVE':
+            raise _error('ClusterNotFoundException', 'Cluster not found.', operation)
+        return name
+
+    def _service(self, cluster: str, ref: str, operation: str) -> Dict[str, Any]:
+        service = self.services[cluster].get(_name(ref, 'service'))
+        if service is None:
+            raise _error('ServiceNotFoundException', 'Service not found.', operation)
+        return service
+
+    def _task_definition(self, ref: str, operation: str) -> Dict[str, Any]:
+        family, _, revision = _name(ref, 'task-definition').partition(':')
+        revisions = self.task_definitions.get(family, [])
+        if revision:
+            if 0 < int(revision) <= len(revisions) and revisions[int(revision) - 1]['status'] != 'DELETE_IN_PROGRESS':
+                return revisions[int(revision) - 1]
+        else:
+            active = [td for td in revisions if td['status'] == 'ACTIVE']
+            if active:
+                return active[-1]
+        raise _error('ClientException', 'Unable to describe task definition.', operation)
+
+    def _page(self, operation: str, params: Dict[str, Any], items: Callable[[], List[Any]]) -> Tuple[List[Any], Optional[str]]:
+        """Return one page of a listing; the full listing is snapshotted on the first call"""
+        default, maximum = PAGE_SIZES[operation]
+        size = params.get('maxResults') or default
+        if size > maximum:
+            raise _error('InvalidParameterException', f'maxResults must be at most {maximum}.', operation)
+
+        token = params.get('nextToken')
+        if token:
+            try:
+                snapshot_id, offset = base64.urlsafe_b64decode(token.encode()).decode().split(':')
+                listing = self._snapshots[snapshot_id]
+                offset = int(offset)
+            except (ValueError, KeyError):
+                raise _error('InvalidParameterException', 'Invalid nextToken.', operation)
+        else:
+            snapshot_id, listing, offset = uuid.uuid4().hex, items(), 0
+            self._snapshots[snapshot_id] = listing
+            while len(self._snapshots) > 256:
+                self._snapshots.popitem(last=False)
+
+        page = listing[offset:offset + size]
+        next_token = None
+        if offset + size < len(listing):
+            next_token = base64.urlsafe_b64encode(f'{snapshot_id}:{offset + size}'.encode()).decode()
+        return page, next_token
+
+    # Rendering
+
+    def _render_task(self, task: _FakeTask) -> Dict[str, Any]:
+        definition = self._task_definition(task.task_definition, 'DescribeTasks')
+        task_arn = self.arn('task', f'{task.cluster}/{task.task_id}')
+        containers = []
+        for container in definition['containerDefinitions']:
+            rendered = {
+                'containerArn': self.arn('container', f'{task.cluster}/{task.task_id}/{container["name"]}'),
+                'taskArn': task_arn,
+                'name': container['name'],
+                'image': container.get('image'),
+                'lastStatus': task.last_status,
+                'cpu': str(container.get('cpu', 0)),
+                'memory': str(container.get('memory', '')),
+            }
+            if task.last_status == 'STOPPED':
+                if task.exit_code is not None:
+                    rendered['exitCode'] = task.exit_code
+                rendered['reason'] = task.stopped_reason
+            containers.append(rendered)
+
+        rendered = {
+            'taskArn': task_arn,
+            'clusterArn': self.arn('cluster', task.cluster),
+            'taskDefinitionArn': definition['taskDefinitionArn'],
+            'group': task.group,
+            'startedBy': task.started_by,
+            'launchType': task.launch_type,
+            'availabilityZone': task.availability_zone,
+            'lastStatus': task.last_status,
+            'desiredStatus': task.desired_status,
+            'cpu': str(task.cpu),
+            'memory': str(task.memory),
+            'containers': containers,
+            'createdAt': task.created_at,
+            'pullStartedAt': task.pull_started_at,
+            'pullStoppedAt': task.pull_stopped_at,
+            'startedAt': task.started_at,
+            'connectivity': 'CONNECTED' if task.connectivity_at else 'CONNECTING',
+            'connectivityAt': task.connectivity_at,
+            'healthStatus': 'HEALTHY' if task.last_status == 'RUNNING' else 'UNKNOWN',
+            'tags': self.tags.get(task_arn, []),
+        }
+        if task.capacity_provider:
+            rendered['capacityProviderName'] = task.capacity_provider
+        if task.container_instance:
+            rendered['containerInstanceArn'] = self.arn('container-instance', f'{task.cluster}/{task.container_instance}')
+        if task.last_status == 'STOPPED':
+            rendered.update({
+                'stoppedAt': task.stopped_at, 'stoppingAt': task.stopped_at,
+                'stopCode': task.stop_code, 'stoppedReason': task.stopped_reason
+            })
+        return {k: v for k, v in rendered.items() if v is not None}
+
+    def _render_instance(self, cluster: str, instance: Dict[str, Any]) -> Dict[str, Any]:
+        rendered = copy.deepcopy({k: v for k, v in instance.items() if not k.startswith('_')})
+        rendered['remainingResources'] = [
+            {'name': 'CPU', 'type': 'INTEGER', 'integerValue': instance['_cpu'] - instance['_used_cpu']},
+            {'name': 'MEMORY', 'type': 'INTEGER', 'integerValue': instance['_memory'] - instance['_used_memory']},
+        ]
+        rendered['attributes'] = [
+            {'name': name, 'value': attribute.get('value')} if attribute.get('value') is not None else {'name': name}
+            for (target, name), attribute in self.attributes[cluster].items()
+            if target == instance['_id']
+        ]
+        return rendered
+
+    # Population
+
+    def populate(self, clusters: int = 1, services: int = 10, tasks_per_service: int = 10,
+                 instances: int = 0, stopped_tasks_per_service: int = 0, revisions: int = 3,
+                 deployment_history: int = 3, namespace: Optional[str] = 'internal'):
+        """
+        Generate realistic clusters, services, tasks and container instances
+
+        Args:
+            clusters: Number of clusters
+            services: Number of services per cluster
+            tasks_per_service: Number of running tasks per service
+            instances: Number of EC2 container instances per cluster (0 runs everything on Fargate);
+                more are registered when the tasks do not fit on them
+            stopped_tasks_per_service: Number of stopped tasks per service
+            revisions: Number of task definition revisions per service family
+            deployment_history: Number of past deployments per service
+            namespace: Service Connect namespace of every service (optional)
+        """
+        rng = self.random
+        zones = [f'{self.region}{suffix}' for suffix in 'acd']
+
+        with self.lock:
+            for c in range(clusters):
+                cluster_name = f'cluster-{c}'
+                self._create_cluster(cluster_name, [{'key': 'env', 'value': rng.choice(['prod', 'staging'])}])
+                cluster = self.clusters[cluster_name]
+                cluster['capacityProviders'] = ['FARGATE', 'FARGATE_SPOT']
+                cluster['defaultCapacityProviderStrategy'] = [{'capacityProvider': 'FARGATE', 'weight': 1, 'base': 0}]
+
+                for i in range(instances):
+                    self._register_instance(cluster_name, zones[i % len(zones)])
+
+                for s in range(services):
+                    family = f'{cluster_name}-svc-{s}'
+                    for r in range(revisions):
+                        self._register_task_definition({
+                            'family': family,
+                            'networkMode': 'awsvpc',
+                            'requiresCompatibilities': ['EC2'] if instances else ['FARGATE'],
+                            'cpu': '256', 'memory': '512',
+                            'containerDefinitions': [{
+                                'name': 'app', 'image': f'repo/{family}:{r + 1}', 'essential': True,
+                                'cpu': 256, 'memory': 512, 'portMappings': [{'containerPort': 8080, 'name': 'http'}]
+                            }]
+                        })
+
+                    tags = [{'key': 'team', 'value': rng.choice(_TEAMS)},
+                            {'key': 'env', 'value': rng.choice(['prod', 'staging'])}]
+                    service = self._create_service(cluster_name, {
+                        'serviceName': f'svc-{s}', 'taskDefinition': family,
+                        'desiredCount': tasks_per_service, 'tags': tags,
+                        'launchType': 'EC2' if instances else 'FARGATE',
+                        'serviceConnectConfiguration': {
+                            'enabled': True, 'namespace': namespace,
+                            'services': [{'portName': 'http', 'discoveryName': f'svc-{s}',
+                                          'clientAliases': [{'port': 80, 'dnsName': f'svc-{s}.{namespace}'}]}]
+                        } if namespace else None
+                    }, start_tasks=False)
+                    rollout = self._rollouts.pop((cluster_name, service['serviceName']))
+                    self._finish_rollout(cluster_name, service, rollout, failed=False, start_tasks=False)
+
+                    created = self.now() - timedelta(days=30)
+                    for d in range(deployment_history):
+                        self._record_history(cluster_name, service, created + timedelta(days=d * 7))
+
+                    for t in range(tasks_per_service + stopped_tasks_per_service):
+                        instance_id = None
+                        if instances:
+                            instance_id = self._fitting_instance(cluster_name, service['taskDefinition'])
+                            if instance_id is None:
+                                instance_id = self._register_instance(
+                                    cluster_name, zones[len(self.instances[cluster_name]) % len(zones)]
+                                )['_id']
+                        task = self._start_task(cluster_name, service['taskDefinition'], f'service:svc-{s}',
+                                                'ecs-svc', instance_id, rng.choice(zones))
+                        if t < tasks_per_service:
+                            continue
+                        code, reason, exit_codes = rng.choice(_STOP_REASONS)
+                        self._stop_task(task, code, f'{reason}', rng.choice(exit_codes))
+                    service['runningCount'] = tasks_per_service
+
+    def _create_cluster(self, name: str, tags: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+        arn = self.arn('cluster', name)
+        cluster = {
+            'clusterArn': arn, 'clusterName': name, 'status': 'ACTIVE',
+            'registeredContainerInstancesCount': 0, 'runningTasksCount': 0, 'pendingTasksCount': 0,
+            'activeServicesCount': 0, 'statistics': [], 'settings': [{'name': 'containerInsights', 'value': 'disabled'}],
+            'capacityProviders': [], 'defaultCapacityProviderStrategy': [], 'attachments': []
+        }
+        self.clusters[name] = cluster
+        self.services.setdefault(name, {})
+        self.tasks.setdefault(name, {})
+        self.instances.setdefault(name, {})
+        self.attributes.setdefault(name, {})
+        self.tags[arn] = list(tags or [])
+        return cluster
+
+    def _register_instance(self, cluster: str, zone: str) -> Dict[str, Any]:
+        instance_id = uuid.UUID(int=self.random.getrandbits(128)).hex
+        ec2_id = f'i-{self.random.getrandbits(68):017x}'
+        instance = {
+            '_id': instance_id, '_cpu': 4096, '_memory': 16384, '_used_cpu': 0, '_used_memory': 0,
+            'containerInstanceArn': self.arn('container-instance', f'{cluster}/{instance_id}'),
+            'ec2InstanceId': ec2_id, 'status': 'ACTIVE', 'agentConnected': True,
+            'runningTasksCount': 0, 'pendingTasksCount': 0, 'capacityProviderName': None,
+            'registeredAt': self.now(),
+            'registeredResources': [
+                {'name': 'CPU', 'type': 'INTEGER', 'integerValue': 4096},
+                {'name': 'MEMORY', 'type': 'INTEGER', 'integerValue': 16384},
+            ],
+            'versionInfo': {'agentVersion': '1.89.0', 'dockerVersion': 'DockerVersion: 25.0.3'},
+        }
+        self.instances[cluster][instance_id] = instance
+        for name, value in (('ecs.instance-type', 'm6i.xlarge'), ('ecs.availability-zone', zone),
+                            ('ecs.os-type', 'linux'), ('ecs.cpu-architecture', 'x86_64'),
+                            ('ecs.ami-id', 'ami-0123456789abcdef0')):
+            self.attributes[cluster][(instance_id, name)] = {
+                'name': name, 'value': value, 'targetType': 'container-instance',
+                'targetId': instance['containerInstanceArn']
+            }
+        self.clusters[cluster]['registeredContainerInstancesCount'] += 1
+        return instance
+
+    def _register_task_definition(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        family = params['family']
+        revisions = self.task_definitions.setdefault(family, [])
+        definition = copy.deepcopy({k: v for k, v in params.items() if k != 'tags'})
+        definition.update({
+            'taskDefinitionArn': self.arn('task-definition', f'{family}:{len(revisions) + 1}'),
+            'revision': len(revisions) + 1,
+            'status': 'ACTIVE',
+            'compatibilities': ['EC2', 'FARGATE'],
+            'registeredAt': self.now(),
+            'registeredBy': f'arn:aws:iam::{self.account}:role/deployer',
+            'volumes': definition.get('volumes', []),
+            'placementConstraints': definition.get('placementConstraints', []),
+        })
+        for container in definition['containerDefinitions']:
+            container.setdefault('essential', True)
+            container.setdefault('cpu', 0)
+            container.setdefault('environment', [])
+            container.setdefault('mountPoints', [])
+            container.setdefault('volumesFrom', [])
+            for mapping in container.get('portMappings', []):
+                mapping.setdefault('protocol', 'tcp')
+                if definition.get('networkMode') == 'awsvpc':
+                    mapping.setdefault('hostPort', mapping['containerPort'])
+        revisions.append(definition)
+        self.tags[definition['taskDefinitionArn']] = list(params.get('tags', []))
+        return definition
+
+    def _task_resources(self, definition: Dict[str, Any]) -> Tuple[int, int]:
+        cpu = definition.get('cpu') or sum(c.get('cpu', 0) for c in definition['containerDefinitions'])
+        memory = definition.get('memory') or sum(
+            c.get('memory') or c.get('memoryReservation') or 0 for c in definition['containerDefinitions']
+        )
+        return int(cpu), int(memory)
+
+    def _fitting_instance(self, cluster: str, task_definition: str) -> Optional[str]:
+        """Random ACTIVE container instance with enough remaining CPU and memory for a task, if any"""
+        cpu, memory = self._task_resources(self._task_definition(task_definition, 'RunTask'))
+        fits = [
+            instance_id for instance_id, i in self.instances[cluster].items()
+            if i['status'] == 'ACTIVE' and i['_cpu'] - i['_used_cpu'] >= cpu and i['_memory'] - i['_used_memory'] >= memory
+        ]
+        return self.random.choice(fits) if fits else None
+
+    def _start_task(self, cluster: str, task_definition: str, group: str, started_by: Optional[str],
+                    instance_id: Optional[str], zone: Optional[str] = None,
+                    launch_type: Optional[str] = None, capacity_provider: Optional[str] = None) -> _FakeTask:
+        rng = self.random
+        definition = self._task_definition(task_definition, 'RunTask')
+        now = self.now()
+
+        if instance_id:
+            # Like the scheduler, never reserve more than an instance has left
+            instance = self.instances[cluster][instance_id]
+            cpu, memory = self._task_resources(definition)
+            if instance['_cpu'] - instance['_used_cpu'] < cpu or instance['_memory'] - instance['_used_memory'] < memory:
+                raise _error('InvalidParameterException',
+                             f'Container instance {instance_id} has insufficient CPU or memory for the task.', 'RunTask')
+
+        task = _FakeTask()
+        task.task_id = uuid.UUID(int=rng.getrandbits(128)).hex
+        task.cluster = cluster
+        task.task_definition = definition['taskDefinitionArn']
+        task.group = group
+        task.started_by = started_by
+        task.container_instance = instance_id
+        task.launch_type = launch_type or ('EC2' if instance_id else 'FARGATE')
+        task.capacity_provider = capacity_provider or (None if instance_id else _LAUNCH_CAPACITY.get(task.launch_type))
+        if instance_id:
+            zone = next(
+                (a['value'] for (target, name), a in self.attributes[cluster].items()
+                 if target == instance_id and name == 'ecs.availability-zone'), zone
+            )
+        task.availability_zone = zone or f'{self.region}a'
+        task.created_at = now - timedelta(seconds=rng.uniform(60, 86400))
+        task.pull_started_at = task.created_at + timedelta(seconds=rng.uniform(1, 20))
+        task.pull_stopped_at = task.pull_started_at + timedelta(seconds=rng.lognormvariate(2.5, 0.6))
+        task.started_at = task.pull_stopped_at + timedelta(seconds=rng.uniform(1, 10))
+        task.connectivity_at = task.created_at + timedelta(seconds=rng.uniform(0.5, 5))
+        task.last_status = 'RUNNING'
+        task.desired_status = 'RUNNING'
+        task.stopped_at = task.stop_code = task.stopped_reason = task.exit_code = None
+        task.protected = False
+        task.protection_expires_at = None
+        task.cpu, task.memory = self._task_resources(definition)
+
+        self.tasks[cluster][task.task_id] = task
+        self.clusters[cluster]['runningTasksCount'] += 1
+        if instance_id:
+            instance = self.instances[cluster][instance_id]
+            instance['_used_cpu'] += task.cpu
+            instance['_used_memory'] += task.memory
+            instance['runningTasksCount'] += 1
+        return task
+
+    def _stop_task(self, task: _FakeTask, stop_code: str, reason: str, exit_code: Optional[int] = 0):
+        if task.last_status == 'STOPPED':
+            return
+        task.last_status = task.desired_status = 'STOPPED'
+        task.stopped_at = max(task.started_at, self.now() - timedelta(seconds=self.random.uniform(0, 3000)))
+        task.stop_code = stop_code
+        task.stopped_reason = reason
+        task.exit_code = exit_code
+        self.clusters[task.cluster]['runningTasksCount'] -= 1
+        if task.container_instance:
+            instance = self.instances[task.cluster][task.container_instance]
+            instance['_used_cpu'] -= task.cpu
+            instance['_used_memory'] -= task.memory
+            instance['runningTasksCount'] -= 1
+
+    def _create_service(self, cluster: str, params: Dict[str, Any], start_tasks: bool = True) -> Dict[str, Any]:
+        name = params['serviceName']
+        existing = self.services[cluster].get(name)
+        if existing and existing['status'] != 'INACTIVE':
+            raise _error('InvalidParameterException', 'Creation of service was not idempotent.', 'CreateService')
+
+        definition = self._task_definition(params['taskDefinition'], 'CreateService')
+        arn = self.arn('service', f'{cluster}/{name}')
+        service = {
+            'serviceArn': arn, 'serviceName': name, 'clusterArn': self.arn('cluster', cluster),
+            'status': 'ACTIVE', 'desiredCount': params.get('desiredCount', 0), 'runningCount': 0, 'pendingCount': 0,
+            'launchType': params.get('launchType', 'FARGATE'),
+            'taskDefinition': definition['taskDefinitionArn'],
+            'schedulingStrategy': params.get('schedulingStrategy', 'REPLICA'),
+            'deploymentConfiguration': params.get('deploymentConfiguration') or {
+                'deploymentCircuitBreaker': {'enable': True, 'rollback': True},
+                'maximumPercent': 200, 'minimumHealthyPercent': 100
+            },
+            'deploymentController': params.get('deploymentController') or {'type': 'ECS'},
+            'deployments': [], 'events': [], 'loadBalancers': params.get('loadBalancers', []),
+            'placementConstraints': params.get('placementConstraints', []),
+            'placementStrategy': params.get('placementStrategy', []),
+            'createdAt': self.now(), 'createdBy': f'arn:aws:iam::{self.account}:role/deployer',
+            'propagateTags': params.get('propagateTags', 'NONE'),
+            'enableECSManagedTags': params.get('enableECSManagedTags', False),
+        }
+        if params.get('capacityProviderStrategy'):
+            service['capacityProviderStrategy'] = params['capacityProviderStrategy']
+            del service['launchType']
+        if params.get('networkConfiguration'):
+            service['networkConfiguration'] = params['networkConfiguration']
+
+        self.services[cluster][name] = service
+        self.tags[arn] = list(params.get('tags', []))
+        self.clusters[cluster]['activeServicesCount'] += 1
+
+        connect = params.get('serviceConnectConfiguration')
+        if connect and connect.get('namespace'):
+            self.namespaces.setdefault(connect['namespace'], []).append(arn)
+        service['_serviceConnect'] = connect
+
+        if service['deploymentController']['type'] == 'ECS':
+            self._start_rollout(cluster, service, None)
+        if start_tasks:
+            self._advance(cluster, service)
+        return service
+
+    def _start_rollout(self, cluster: str, service: Dict[str, Any], previous: Optional[str]):
+        """Create a new PRIMARY deployment and its service deployment and revision records"""
+        now = self.now()
+        deployment_id = f'ecs-svc/{self.random.getrandbits(60):019d}'
+        for deployment in service['deployments']:
+            deployment['status'] = 'ACTIVE'
+
+        revision_id = f'{self.random.getrandbits(60):019d}'
+        revision_arn = self.arn('service-revision', f'{cluster}/{service["serviceName"]}/{revision_id}')
+        self.service_revisions[revision_arn] = {
+            'serviceRevisionArn': revision_arn, 'serviceArn': service['serviceArn'],
+            'clusterArn': service['clusterArn'], 'taskDefinition': service['taskDefinition'],
+            'launchType': service.get('launchType'), 'createdAt': now,
+            'capacityProviderStrategy': service.get('capacityProviderStrategy', []),
+        }
+        deployment_arn = self.arn('service-deployment', f'{cluster}/{service["serviceName"]}/{revision_id}')
+        self.service_deployments[deployment_arn] = {
+            'serviceDeploymentArn': deployment_arn, 'serviceArn': service['serviceArn'],
+            'clusterArn': service['clusterArn'], 'createdAt': now, 'startedAt': now, 'updatedAt': now,
+            'targetServiceRevision': {'arn': revision_arn, 'requestedTaskCount': service['desiredCount'],
+                                      'runningTaskCount': 0, 'pendingTaskCount': 0},
+            'sourceServiceRevisions': [],
+            'status': 'IN_PROGRESS',
+            'deploymentConfiguration': service['deploymentConfiguration'],
+            'deploymentCircuitBreaker': {'status': 'MONITORING', 'failureCount': 0, 'threshold': 10},
+        }
+
+        deployment = {
+            'id': deployment_id, 'status': 'PRIMARY', 'taskDefinition': service['taskDefinition'],
+            'desiredCount': service['desiredCount'], 'pendingCount': 0, 'runningCount': 0, 'failedTasks': 0,
+            'createdAt': now, 'updatedAt': now, 'launchType': service.get('launchType'),
+            'rolloutState': 'IN_PROGRESS', 'rolloutStateReason': 'ECS deployment in progress.',
+        }
+        if service.get('_serviceConnect'):
+            deployment['serviceConnectConfiguration'] = service['_serviceConnect']
+        service['deployments'].insert(0, deployment)
+
+        self._rollouts[(cluster, service['serviceName'])] = {
+            'deployment': deployment, 'service_deployment': deployment_arn,
+            'previous': previous, 'completes_at': time.monotonic() + self.deployment_seconds,
+            'fails': self.random.random() < self.deployment_failure_rate,
+        }
+
+    def _finish_rollout(self, cluster: str, service: Dict[str, Any], rollout: Dict[str, Any],
+                        failed: bool, start_tasks: bool = True):
+        deployment = rollout['deployment']
+        record = self.service_deployments[rollout['service_deployment']]
+        now = self.now()
+        record['finishedAt'] = record['updatedAt'] = now
+
+        if failed and rollout['previous']:
+            deployment['rolloutState'] = 'FAILED'
+            deployment['rolloutStateReason'] = 'ECS deployment circuit breaker: tasks failed to start.'
+            record['status'] = 'ROLLBACK_SUCCESSFUL'
+            record['deploymentCircuitBreaker']['status'] = 'TRIGGERED'
+            record['rollback'] = {'reason': 'Circuit breaker triggered', 'startedAt': now}
+            service['taskDefinition'] = rollout['previous']
+            service['deployments'] = [d for d in service['deployments'] if d is not deployment]
+            rollback = dict(deployment, id=f'ecs-svc/{self.random.getrandbits(60):019d}', status='PRIMARY',
+                            taskDefinition=rollout['previous'], rolloutState='COMPLETED',
+                            rolloutStateReason='ECS deployment completed.')
+            service['deployments'] = [rollback]
+        else:
+            deployment['rolloutState'] = 'COMPLETED'
+            deployment['rolloutStateReason'] = 'ECS deployment completed.'
+            deployment['runningCount'] = deployment['desiredCount'] = service['desiredCount']
+            record['status'] = 'SUCCESSFUL'
+            record['deploymentCircuitBreaker']['status'] = 'MONITORING_COMPLETE'
+            service['deployments'] = [deployment]
+
+        if start_tasks:
+            self._reconcile_tasks(cluster, service)
+
+    def _reconcile_tasks(self, cluster: str, service: Dict[str, Any]):
+        """Replace tasks running another task definition and match the desired count"""
+        group = f'service:{service["serviceName"]}'
+        running = [t for t in self.tasks[cluster].values() if t.group == group and t.last_status == 'RUNNING']
+        for task in running:
+            if task.task_definition != service['taskDefinition']:
+                self._stop_task(task, 'ServiceSchedulerInitiated', 'Deployment replaced the task.', 0)
+        current = [t for t in running if t.last_status == 'RUNNING']
+        for task in current[service['desiredCount']:]:
+            self._stop_task(task, 'ServiceSchedulerInitiated', 'Scaling activity initiated by deployment.', 0)
+
+        running_count = min(len(current), service['desiredCount'])
+        for _ in range(service['desiredCount'] - len(current)):
+            instance_id = None
+            if service.get('launchType') == 'EC2' and self.instances[cluster]:
+                instance_id = self._fitting_instance(cluster, service['taskDefinition'])
+                if instance_id is None:
+                    # No capacity left; the task stays unplaced like a pending task
+                    continue
+            self._start_task(cluster, service['taskDefinition'], group, 'ecs-svc', instance_id)
+            running_count += 1
+        service['runningCount'] = running_count
+        for deployment in service['deployments']:
+            if deployment['status'] == 'PRIMARY':
+                deployment['runningCount'] = running_count
+
+    def _record_history(self, cluster: str, service: Dict[str, Any], started: datetime):
+        """Add a finished historical service deployment"""
+        duration = timedelta(seconds=self.random.lognormvariate(5.5, 0.5))
+        failed = self.random.random() < 0.1
+        revision_id = f'{self.random.getrandbits(60):019d}'
+        arn = self.arn('service-deployment', f'{cluster}/{service["serviceName"]}/{revision_id}')
+        self.service_deployments[arn] = {
+            'serviceDeploymentArn': arn, 'serviceArn': service['serviceArn'], 'clusterArn': service['clusterArn'],
+            'createdAt': started, 'startedAt': started, 'finishedAt': started + duration,
+            'updatedAt': started + duration,
+            'targetServiceRevision': {'arn': self.arn('service-revision', f'{cluster}/{service["serviceName"]}/{revision_id}')},
+            'status': 'ROLLBACK_SUCCESSFUL' if failed else 'SUCCESSFUL',
+            'deploymentCircuitBreaker': {'status': 'TRIGGERED' if failed else 'MONITORING_COMPLETE',
+                                         'failureCount': 10 if failed else 0, 'threshold': 10},
+        }
+
+    def _advance(self, cluster: str, service: Dict[str, Any]):
+        """Complete the service's rollout once its simulated duration has passed"""
+        rollout = self._rollouts.get((cluster, service['serviceName']))
+        if rollout and time.monotonic() >= rollout['completes_at']:
+            del self._rollouts[(cluster, service['serviceName'])]
+            self._finish_rollout(cluster, service, rollout, failed=rollout['fails'])
+
+    def _advance_task_set(self, task_set: Dict[str, Any]):
+        if task_set['stabilityStatus'] == 'STABILIZING' and time.monotonic() >= task_set['_stable_at']:
+            task_set['stabilityStatus'] = 'STEADY_STATE'
+            task_set['stabilityStatusAt'] = self.now()
+            task_set['runningCount'] = task_set['computedDesiredCount']
+            task_set['pendingCount'] = 0
+
+    # Cluster operations
+
+    def create_cluster(self, params):
+        name = params.get('clusterName', 'default')
+        if name in self.clusters and self.clusters[name]['status'] == 'ACTIVE':
+            return {'cluster': copy.deepcopy(self.clusters[name])}
+        return {'cluster': copy.deepcopy(self._create_cluster(name, params.get('tags')))}
+
+    def delete_cluster(self, params):
+        name = self._cluster(params['cluster'], 'DeleteCluster')
+        if any(s['status'] == 'ACTIVE' for s in self.services[name].values()):
+            raise _error('ClusterContainsServicesException', 'The Cluster cannot be deleted while Services are active.', 'DeleteCluster')
+        self.clusters[name]['status'] = 'INACTIVE'
+        return {'cluster': copy.deepcopy(self.clusters[name])}
+
+    def list_clusters(self, params):
+        page, token = self._page('ListClusters', params, lambda: [
+            c['clusterArn'] for c in self.clusters.values() if c['status'] == 'ACTIVE'
+        ])
+        return {'clusterArns': page, 'nextToken': token}
+
+    def describe_clusters(self, params):
+        include = params.get('include', [])
+        clusters, failures = [], []
+        for ref in params.get('clusters') or ['default']:
+            cluster = self.clusters.get(_name(ref, 'cluster'))
+            if cluster is None:
+                failures.append({'arn': ref, 'reason': 'MISSING'})
+                continue
+            rendered = copy.deepcopy(cluster)
+            name = cluster['clusterName']
+            if 'TAGS' in include:
+                rendered['tags'] = self.tags.get(cluster['clusterArn'], [])
+            if 'STATISTICS' in include:
+                tasks = [t for t in self.tasks[name].values() if t.last_status == 'RUNNING']
+                services = [s for s in self.services[name].values() if s['status'] == 'ACTIVE']
+                rendered['statistics'] = [
+                    {'name': 'runningEC2TasksCount', 'value': str(sum(1 for t in tasks if t.launch_type == 'EC2'))},
+                    {'name': 'runningFargateTasksCount', 'value': str(sum(1 for t in tasks if t.launch_type == 'FARGATE'))},
+                    {'name': 'pendingEC2TasksCount', 'value': '0'},
+                    {'name': 'pendingFargateTasksCount', 'value': '0'},
+                    {'name': 'activeEC2ServiceCount', 'value': str(sum(1 for s in services if s.get('launchType') == 'EC2'))},
+                    {'name': 'activeFargateServiceCount', 'value': str(sum(1 for s in services if s.get('launchType') == 'FARGATE'))},
+                    {'name': 'drainingEC2ServiceCount', 'value': '0'},
+                    {'name': 'drainingFargateServiceCount', 'value': '0'},
+                ]
+            for key, flag in (('settings', 'SETTINGS'), ('attachments', 'ATTACHMENTS')):
+                if flag not in include:
+                    rendered.pop(key, None)
+            clusters.append(rendered)
+        return {'clusters': clusters, 'failures': failures}
+
+    # Service operations
+
+    def create_service(self, params):
+        cluster = self._cluster(params.get('cluster'), 'CreateService')
+        return {'service': self._public(self._create_service(cluster, params))}
+
+    @staticmethod
+    def _public(service: Dict[str, Any]) -> Dict[str, Any]:
+        return copy.deepcopy({k: v for k, v in service.items() if not k.startswith('_')})
+
+    def update_service(self, params):
+        cluster = self._cluster(params.get('cluster'), 'UpdateService')
+        service = self._service(cluster, params['service'], 'UpdateService')
+        if service['status'] != 'ACTIVE':
+            raise _error('ServiceNotActiveException', 'Service was not ACTIVE.', 'UpdateService')
+
+        previous = service['taskDefinition']
+        changed = params.get('forceNewDeployment', False)
+        if params.get('taskDefinition'):
+            definition = self._task_definition(params['taskDefinition'], 'UpdateService')
+            changed = changed or definition['taskDefinitionArn'] != previous
+            service['taskDefinition'] = definition['taskDefinitionArn']
+        for key in ('desiredCount', 'deploymentConfiguration', 'networkConfiguration', 'platformVersion',
+                    'healthCheckGracePeriodSeconds', 'capacityProviderStrategy', 'enableExecuteCommand',
+                    'enableECSManagedTags'):
+            if key in params:
+                service[key] = params[key]
+
+        if changed and service['deploymentController']['type'] == 'ECS':
+            self._rollouts.pop((cluster, service['serviceName']), None)
+            self._start_rollout(cluster, service, previous)
+        elif 'desiredCount' in params:
+            self._reconcile_tasks(cluster, service)
+        self._advance(cluster, service)
+        return {'service': self._public(service)}
+
+    def delete_service(self, params):
+        cluster = self._cluster(params.get('cluster'), 'DeleteService')
+        service = self._service(cluster, params['service'], 'DeleteService')
+        if service['desiredCount'] and not params.get('force'):
+            raise _error('InvalidParameterException', 'The service cannot be stopped while it is scaled above 0.', 'DeleteService')
+        service['status'] = 'DRAINING'
+        service['desiredCount'] = 0
+        self._reconcile_tasks(cluster, service)
+        service['status'] = 'INACTIVE'
+        self.clusters[cluster]['activeServicesCount'] -= 1
+        return {'service': self._public(service)}
+
+    def list_services(self, params):
+        cluster = self._cluster(params.get('cluster'), 'ListServices')
+        page, token = self._page('ListServices', params, lambda: [
+            s['serviceArn'] for s in self.services[cluster].values()
+            if s['status'] == 'ACTIVE'
+            and (not params.get('launchType') or s.get('launchType') == params['launchType'])
+            and (not params.get('schedulingStrategy') or s['schedulingStrategy'] == params['schedulingStrategy'])
+        ])
+        return {'serviceArns': page, 'nextToken': token}
+
+    def describe_services(self, params):
+        cluster = self._cluster(params.get('cluster'), 'DescribeServices')
+        services, failures = [], []
+        for ref in params['services']:
+            service = self.services[cluster].get(_name(ref, 'service'))
+            if service is None:
+                failures.append({'arn': ref, 'reason': 'MISSING'})
+                continue
+            self._advance(cluster, service)
+            rendered = self._public(service)
+            if 'TAGS' in params.get('include', []):
+                rendered['tags'] = self.tags.get(service['serviceArn'], [])
+            services.append(rendered)
+        return {'services': services, 'failures': failures}
+
+    def list_services_by_namespace(self, params):
+        namespace = _name(params['namespace'], 'namespace')
+        if namespace not in self.namespaces:
+            raise _error('NamespaceNotFoundException', 'Namespace not found.', 'ListServicesByNamespace')
+        page, token = self._page('ListServicesByNamespace', params, lambda: list(self.namespaces[namespace]))
+        return {'serviceArns': page, 'nextToken': token}
+
+    def list_service_deployments(self, params):
+        cluster = params.get('cluster')
+        if not cluster and params['service'].startswith('arn:'):
+            cluster = params['service'].split(':service/', 1)[-1].split('/')[0]
+        cluster = self._cluster(cluster, 'ListServiceDeployments')
+        service = self._service(cluster, params['service'], 'ListServiceDeployments')
+        self._advance(cluster, service)
+        created_after = params.get('createdAt', {}).get('after')
+        created_before = params.get('createdAt', {}).get('before')
+        statuses = params.get('status')
+
+        def listing():
+            records = [
+                d for d in self.service_deployments.values()
+                if d['serviceArn'] == service['serviceArn']
+                and (not statuses or d['status'] in statuses)
+                and (not created_after or d['createdAt'] > created_after)
+                and (not created_before or d['createdAt'] < created_before)
+            ]
+            records.sort(key=lambda d: d['createdAt'], reverse=True)
+            return [{
+                'serviceDeploymentArn': d['serviceDeploymentArn'], 'serviceArn': d['serviceArn'],
+                'clusterArn': d['clusterArn'], 'startedAt': d.get('startedAt'), 'createdAt': d['createdAt'],
+                'finishedAt': d.get('finishedAt'), 'targetServiceRevisionArn': d['targetServiceRevision']['arn'],
+                'status': d['status']
+            } for d in records]
+
+        page, token = self._page('ListServiceDeployments', params, listing)
+        return {'serviceDeployments': [{k: v for k, v in d.items() if v is not None} for d in page],
+                'nextToken': token}
+
+    def describe_service_deployments(self, params):
+        deployments, failures = [], []
+        for arn in params['serviceDeploymentArns']:
+            if arn in self.service_deployments:
+                deployments.append(copy.deepcopy(self.service_deployments[arn]))
+            else:
+                failures.append({'arn': arn, 'reason': 'MISSING'})
+        return {'serviceDeployments': deployments, 'failures': failures}
+
+    def describe_service_revisions(self, params):
+        revisions, failures = [], []
+        for arn in params['serviceRevisionArns']:
+            if arn in self.service_revisions:
+                revisions.append(copy.deepcopy(self.service_revisions[arn]))
+            else:
+                failures.append({'arn': arn, 'reason': 'MISSING'})
+        return {'serviceRevisions': revisions, 'failures': failures}
+
+    # Task operations
+
+    def list_tasks(self, params):
+        cluster = self._cluster(params.get('cluster'), 'ListTasks')
+        status = params.get('desiredStatus', 'RUNNING')
+        group = f'service:{_name(params["serviceName"], "service")}' if params.get('serviceName') else None
+        family = params.get('family')
+        instance = _name(params['containerInstance'], 'container-instance') if params.get('containerInstance') else None
+
+        def listing():
+            return [
+                self.arn('task', f'{cluster}/{t.task_id}') for t in self.tasks[cluster].values()
+                if t.desired_status == status
+                and (group is None or t.group == group)
+                and (family is None or _name(t.task_definition, 'task-definition').split(':')[0] == family)
+                and (instance is None or t.container_instance == instance)
+                and (not params.get('startedBy') or t.started_by == params['startedBy'])
+                and (not params.get('launchType') or t.launch_type == params['launchType'])
+            ]
+
+        page, token = self._page('ListTasks', params, listing)
+        return {'taskArns': page, 'nextToken': token}
+
+    def describe_tasks(self, params):
+        cluster = self._cluster(params.get('cluster'), 'DescribeTasks')
+        tasks, failures = [], []
+        for ref in params['tasks']:
+            task = self.tasks[cluster].get(_name(ref, 'task'))
+            if task is None:
+                failures.append({'arn': ref, 'reason': 'MISSING'})
+            else:
+                tasks.append(self._render_task(task))
+        return {'tasks': tasks, 'failures': failures}
+
+    def run_task(self, params):
+        cluster = self._cluster(params.get('cluster'), 'RunTask')
+        definition = self._task_definition(params['taskDefinition'], 'RunTask')
+        instances = [i for i in self.instances[cluster].values() if i['status'] == 'ACTIVE']
+        launch_type = params.get('launchType') or ('EC2' if instances and not params.get('capacityProviderStrategy') else 'FARGATE')
+
+        tasks, failures = [], []
+        for _ in range(params.get('count', 1)):
+            instance_id = None
+            if launch_type == 'EC2':
+                instance_id = self._fitting_instance(cluster, definition['taskDefinitionArn'])
+                if instance_id is None:
+                    failures.append({'arn': self.arn('cluster', cluster), 'reason': 'RESOURCE:MEMORY'})
+                    continue
+            task = self._start_task(cluster, definition['taskDefinitionArn'], params.get('group') or f'family:{definition["family"]}',
+                                    params.get('startedBy'), instance_id, launch_type=launch_type)
+            self.tags[self.arn('task', f'{cluster}/{task.task_id}')] = params.get('tags', [])
+            tasks.append(self._render_task(task))
+        return {'tasks': tasks, 'failures': failures}
+
+    def stop_task(self, params):
+        cluster = self._cluster(params.get('cluster'), 'StopTask')
+        task = self.tasks[cluster].get(_name(params['task'], 'task'))
+        if task is None:
+            raise _error('InvalidParameterException', 'The referenced task was not found.', 'StopTask')
+        self._stop_task(task, 'UserInitiated', params.get('reason', 'Task stopped by user'), 0)
+        return {'task': self._render_task(task)}
+
+    def get_task_protection(self, params):
+        cluster = self._cluster(params.get('cluster'), 'GetTaskProtection')
+        protected, failures = [], []
+        for ref in params.get('tasks', []):
+            task = self.tasks[cluster].get(_name(ref, 'task'))
+            if task is None:
+                failures.append({'arn': ref, 'reason': 'MISSING'})
+                continue
+            entry = {'taskArn': self.arn('task', f'{cluster}/{task.task_id}'), 'protectionEnabled': task.protected}
+            if task.protection_expires_at:
+                entry['expirationDate'] = task.protection_expires_at
+            protected.append(entry)
+        return {'protectedTasks': protected, 'failures': failures}
+
+    def update_task_protection(self, params):
+        params = dict(params, tasks=params['tasks'])
+        for ref in params['tasks']:
+            task = self.tasks[self._cluster(params.get('cluster'), 'UpdateTaskProtection')].get(_name(ref, 'task'))
+            if task is not None:
+                task.protected = params['protectionEnabled']
+                task.protection_expires_at = (
+                    self.now() + timedelta(minutes=params.get('expiresInMinutes', 120))
+                    if task.protected else None
+                )
+        return self.get_task_protection(params)
+
+    # Container instance and attribute operations
+
+    def list_container_instances(self, params):
+        cluster = self._cluster(params.get('cluster'), 'ListContainerInstances')
+        page, token = self._page('ListContainerInstances', params, lambda: [
+            i['containerInstanceArn'] for i in self.instances[cluster].values()
+            if not params.get('status') or i['status'] == params['status']
+        ])
+        return {'containerInstanceArns': page, 'nextToken': token}
+
+    def describe_container_instances(self, params):
+        cluster = self._cluster(params.get('cluster'), 'DescribeContainerInstances')
+        instances, failures = [], []
+        for ref in params['containerInstances']:
+            instance = self.instances[cluster].get(_name(ref, 'container-instance'))
+            if instance is None:
+                failures.append({'arn': ref, 'reason': 'MISSING'})
+            else:
+                instances.append(self._render_instance(cluster, instance))
+        return {'containerInstances': instances, 'failures': failures}
+
+    def _attribute_target(self, cluster: str, attribute: Dict[str, Any], operation: str) -> str:
+        target = _name(attribute.get('targetId', ''), 'container-instance')
+        if target not in self.instances[cluster]:
+            raise _error('TargetNotFoundException', f'Could not find {attribute.get("targetId")}.', operation)
+        return target
+
+    def list_attributes(self, params):
+        cluster = self._cluster(params.get('cluster'), 'ListAttributes')
+        if params.get('attributeValue') and not params.get('attributeName'):
+            raise _error('InvalidParameterException', 'attributeName is required with attributeValue.', 'ListAttributes')
+        page, token = self._page('ListAttributes', params, lambda: [
+            copy.copy(a) for a in self.attributes[cluster].values()
+            if a['targetType'] == params['targetType']
+            and (not params.get('attributeName') or a['name'] == params['attributeName'])
+            and (not params.get('attributeValue') or a.get('value') == params['attributeValue'])
+        ])
+        return {'attributes': page, 'nextToken': token}
+
+    def put_attributes(self, params):
+        cluster = self._cluster(params.get('cluster'), 'PutAttributes')
+        targets = [self._attribute_target(cluster, a, 'PutAttributes') for a in params['attributes']]
+        for target, attribute in zip(targets, params['attributes']):
+            self.attributes[cluster][(target, attribute['name'])] = {
+                'name': attribute['name'], 'value': attribute.get('value'), 'targetType': 'container-instance',
+                'targetId': self.instances[cluster][target]['containerInstanceArn']
+            }
+        return {'attributes': params['attributes']}
+
+    def delete_attributes(self, params):
+        cluster = self._cluster(params.get('cluster'), 'DeleteAttributes')
+        targets = [self._attribute_target(cluster, a, 'DeleteAttributes') for a in params['attributes']]
+        for target, attribute in zip(targets, params['attributes']):
+            self.attributes[cluster].pop((target, attribute['name']), None)
+        return {'attributes': params['attributes']}
+
+    def discover_poll_endpoint(self, params):
+        return {
+            'endpoint': f'https://ecs-a-1.{self.region}.amazonaws.com/',
+            'telemetryEndpoint': f'https://ecs-t-1.{self.region}.amazonaws.com/',
+            'serviceConnectEndpoint': f'https://ecs-sc.{self.region}.api.aws',
+        }
+
+    # Task definition operations
+
+    def register_task_definition(self, params):
+        definition = self._register_task_definition(params)
+        return {'taskDefinition': copy.deepcopy(definition), 'tags': params.get('tags', [])}
+
+    def describe_task_definition(self, params):
+        definition = self._task_definition(params['taskDefinition'], 'DescribeTaskDefinition')
+        response = {'taskDefinition': copy.deepcopy(definition)}
+        if 'TAGS' in params.get('include', []):
+            response['tags'] = self.tags.get(definition['taskDefinitionArn'], [])
+        return response
+
+    def deregister_task_definition(self, params):
+        definition = self._task_definition(params['taskDefinition'], 'DeregisterTaskDefinition')
+        definition['status'] = 'INACTIVE'
+        definition['deregisteredAt'] = self.now()
+        return {'taskDefinition': copy.deepcopy(definition)}
+
+    def delete_task_definitions(self, params):
+        deleted, failures = [], []
+        for ref in params['taskDefinitions']:
+            try:
+                definition = self._task_definition(ref, 'DeleteTaskDefinitions')
+            except ClientError:
+                failures.append({'arn': ref, 'reason': 'TASK_DEFINITION_NOT_FOUND'})
+                continue
+            if definition['status'] != 'INACTIVE':
+                failures.append({'arn': ref, 'reason': 'The specified task definition is still in ACTIVE status.'})
+                continue
+            definition['status'] = 'DELETE_IN_PROGRESS'
+            deleted.append(copy.deepcopy(definition))
+        return {'taskDefinitions': deleted, 'failures': failures}
+
+    def list_task_definitions(self, params):
+        status = params.get('status', 'ACTIVE')
+        prefix = params.get('familyPrefix')
+
+        def listing():
+            arns = [
+                td['taskDefinitionArn']
+                for family, revisions in sorted(self.task_definitions.items())
+                if not prefix or family.startswith(prefix)
+                for td in revisions if td['status'] == status
+            ]
+            return arns[::-1] if params.get('sort') == 'DESC' else arns
+
+        page, token = self._page('ListTaskDefinitions', params, listing)
+        return {'taskDefinitionArns': page, 'nextToken': token}
+
+    def list_task_definition_families(self, params):
+        status = params.get('status', 'ACTIVE')
+        prefix = params.get('familyPrefix')
+        page, token = self._page('ListTaskDefinitionFamilies', params, lambda: [
+            family for family, revisions in sorted(self.task_definitions.items())
+            if (not prefix or family.startswith(prefix))
+            and (status == 'ALL' or any(td['status'] == 'ACTIVE' for td in revisions) == (status == 'ACTIVE'))
+        ])
+        return {'families': page, 'nextToken': token}
+
+    # Capacity provider operations
+
+    def create_capacity_provider(self, params):
+        if params['name'] in self.capacity_providers:
+            raise _error('ClientException', 'The specified capacity provider already exists.', 'CreateCapacityProvider')
+        provider = {
+            'capacityProviderArn': self.arn('capacity-provider', params['name']), 'name': params['name'],
+            'status': 'ACTIVE', 'autoScalingGroupProvider': params['autoScalingGroupProvider'],
+            'tags': params.get('tags', [])
+        }
+        self.capacity_providers[params['name']] = provider
+        return {'capacityProvider': copy.deepcopy(provider)}
+
+    def delete_capacity_provider(self, params):
+        provider = self.capacity_providers.get(_name(params['capacityProvider'], 'capacity-provider'))
+        if provider is None:
+            raise _error('ClientException', 'The specified capacity provider does not exist.', 'DeleteCapacityProvider')
+        provider['status'] = 'INACTIVE'
+        return {'capacityProvider': copy.deepcopy(provider)}
+
+    def describe_capacity_providers(self, params):
+        refs = params.get('capacityProviders')
+        providers = [
+            p for p in self.capacity_providers.values()
+            if p['status'] == 'ACTIVE' and (not refs or p['name'] in {_name(r, 'capacity-provider') for r in refs})
+        ]
+        page, token = self._page('DescribeCapacityProviders', params, lambda: [copy.deepcopy(p) for p in providers])
+        return {'capacityProviders': page, 'failures': [], 'nextToken': token}
+
+    # Task set operations
+
+    def create_task_set(self, params):
+        cluster = self._cluster(params['cluster'], 'CreateTaskSet')
+        service = self._service(cluster, params['service'], 'CreateTaskSet')
+        if service['deploymentController']['type'] != 'EXTERNAL':
+            raise _error('InvalidParameterException', 'Task sets require the EXTERNAL deployment controller.', 'CreateTaskSet')
+        definition = self._task_definition(params['taskDefinition'], 'CreateTaskSet')
+        task_set_id = f'ecs-svc/{self.random.getrandbits(60):019d}'
+        scale = params.get('scale') or {'value': 100.0, 'unit': 'PERCENT'}
+        task_set = {
+            'id': task_set_id,
+            'taskSetArn': self.arn('task-set', f'{cluster}/{service["serviceName"]}/{task_set_id}'),
+            'serviceArn': service['serviceArn'], 'clusterArn': service['clusterArn'],
+            'externalId': params.get('externalId'), 'status': 'ACTIVE',
+            'taskDefinition': definition['taskDefinitionArn'], 'runningCount': 0, 'pendingCount': 0,
+            'createdAt': self.now(), 'updatedAt': self.now(), 'launchType': params.get('launchType', 'FARGATE'),
+        }
+        self.task_sets.setdefault((cluster, service['serviceName']), {})[task_set_id] = task_set
+        self._scale_task_set(service, task_set, scale)
+        return {'taskSet': self._public(task_set)}
+
+    def _scale_task_set(self, service: Dict[str, Any], task_set: Dict[str, Any], scale: Dict[str, Any]):
+        task_set['scale'] = {'value': float(scale.get('value', 0)), 'unit': scale.get('unit', 'PERCENT')}
+        task_set['computedDesiredCount'] = math.ceil(service['desiredCount'] * task_set['scale']['value'] / 100)
+        task_set['stabilityStatus'] = 'STABILIZING'
+        task_set['stabilityStatusAt'] = self.now()
+        task_set['updatedAt'] = self.now()
+        task_set['pendingCount'] = max(0, task_set['computedDesiredCount'] - task_set['runningCount'])
+        task_set['_stable_at'] = time.monotonic() + self.deployment_seconds
+
+    def _task_set(self, params, operation) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        cluster = self._cluster(params['cluster'], operation)
+        service = self._service(cluster, params['service'], operation)
+        task_set = self.task_sets.get((cluster, service['serviceName']), {}).get(_name(params['taskSet'], 'task-set'))
+        if task_set is None:
+            task_set = next((t for t in self.task_sets.get((cluster, service['serviceName']), {}).values()
+                             if t['taskSetArn'] == params['taskSet'] or t['id'] == params['taskSet']), None)
+        if task_set is None:
+            raise _error('TaskSetNotFoundException', 'The specified task set does not exist.', operation)
+        return service, task_set
+
+    def update_task_set(self, params):
+        service, task_set = self._task_set(params, 'UpdateTaskSet')
+        self._scale_task_set(service, task_set, params['scale'])
+        return {'taskSet': self._public(task_set)}
+
+    def delete_task_set(self, params):
+        service, task_set = self._task_set(params, 'DeleteTaskSet')
+        if task_set['status'] == 'PRIMARY' and not params.get('force'):
+            raise _error('InvalidParameterException', 'The PRIMARY task set cannot be deleted.', 'DeleteTaskSet')
+        task_set['status'] = 'DRAINING'
+        del self.task_sets[(_name(service['clusterArn'], 'cluster'), service['serviceName'])][task_set['id']]
+        return {'taskSet': self._public(task_set)}
+
+    def describe_task_sets(self, params):
+        cluster = self._cluster(params['cluster'], 'DescribeTaskSets')
+        service = self._service(cluster, params['service'], 'DescribeTaskSets')
+        task_sets = self.task_sets.get((cluster, service['serviceName']), {})
+        refs = params.get('taskSets')
+        selected = [
+            t for t in task_sets.values()
+            if not refs or t['taskSetArn'] in refs or t['id'] in refs
+        ]
+        for task_set in selected:
+            self._advance_task_set(task_set)
+        rendered = [self._public(t) for t in selected]
+        if 'TAGS' in params.get('include', []):
+            for task_set in rendered:
+                task_set['tags'] = self.tags.get(task_set['taskSetArn'], [])
+        return {'taskSets': rendered, 'failures': []}
+
+    # Account settings and tags
+
+    def list_account_settings(self, params):
+        page, token = self._page('ListAccountSettings', params, lambda: [
+            copy.deepcopy(s) for name, s in sorted(self.account_settings.items())
+            if (not params.get('name') or name == params['name'])
+            and (not params.get('principalArn') or s['principalArn'] == params['principalArn'])
+        ])
+        return {'settings': page, 'nextToken': token}
+
+    def delete_account_setting(self, params):
+        setting = self.account_settings.pop(params['name'], None) or {
+            'name': params['name'], 'value': 'disabled',
+            'principalArn': params.get('principalArn', f'arn:aws:iam::{self.account}:root')
+        }
+        return {'setting': setting}
+
+    def list_tags_for_resource(self, params):
+        if params['resourceArn'] not in self.tags:
+            raise _error('InvalidParameterException', 'The specified resource does not exist.', 'ListTagsForResource')
+        return {'tags': copy.deepcopy(self.tags[params['resourceArn']])}
+
+
+class _Events:
+    """Minimal stand-in for botocore's client.meta.events"""
+
+    def __init__(self):
+        self.handlers: List[Tuple[str, Callable]] = []
+
+    def register(self, event_name: str, handler: Callable):
+        self.handlers.append((event_name, handler))
+
+    def emit(self, event_name: str, **kwargs):
+        for name, handler in self.handlers:
+            if event_name == name or event_name.startswith(name + '.'):
+                handler(event_name=event_name, **kwargs)
+
+
+class FakeECSClient:
+    """
+    boto3-compatible ECS client backed by a FakeECSBackend
+
+    Args:
+        backend: Shared backend state
+        latency: Seconds added to every call
+        jitter: Maximum random seconds added on top of latency
+        failure_rate: Fraction of calls failing with a ServerException
+        throttle_rate: Calls per second per operation before ThrottlingException (optional, unlimited when omitted)
+        throttle_burst: Calls allowed in a burst above throttle_rate
+    """
+
+    def __init__(self, backend: FakeECSBackend, latency: float = 0.0, jitter: float = 0.0,
+                 failure_rate: float = 0.0, throttle_rate: Optional[float] = None, throttle_burst: int = 50):
+        self.backend = backend
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.throttle_burst = throttle_burst
+        self.meta = SimpleNamespace(events=_Events(), region_name=backend.region)
+        self.call_counts: Dict[str, int] = {}
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self._operations = {xform_name(name): name for name in _get_service_model().operation_names}
+
+    def __getattr__(self, method: str) -> Callable:
+        operations = self.__dict__.get('_operations', {})
+        handler = getattr(self.backend, method, None)
+        if method not in operations or handler is None:
+            raise AttributeError(f"'FakeECSClient' object has no attribute '{method}'")
+        operation = operations[method]
+
+        def call(**params):
+            return self._call(operation, handler, params)
+
+        call.__name__ = method
+        return call
+
+    def _call(self, operation: str, handler: Callable, params: Dict[str, Any]) -> Dict[str, Any]:
+        # Same parameter validation as a real client (raises ParamValidationError)
+        validate_parameters(params, _get_service_model().operation_model(operation).input_shape)
+        self.meta.events.emit(f'before-call.ecs.{operation}', params=params)
+
+        with self._lock:
+            self.call_counts[operation] = self.call_counts.get(operation, 0) + 1
+            throttled = False
+            if self.throttle_rate:
+                bucket = self._buckets.setdefault(operation, _Bucket(self.throttle_rate, self.throttle_burst))
+                throttled = not bucket.take()
+            failed = self._random.random() < self.failure_rate
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+
+        if delay:
+            time.sleep(delay)
+        if throttled:
+            raise _error('ThrottlingException', 'Rate exceeded', operation)
+        if failed:
+            raise _error('ServerException', 'Service unavailable. Try again later.', operation, 500)
+
+        for (limited_operation, key), limit in BATCH_LIMITS.items():
+            if limited_operation == operation and len(params.get(key) or []) > limit:
+                raise _error('InvalidParameterException', f'{key} can have at most {limit} items.', operation)
+
+        with self.backend.lock:
+            response = handler(params)
+        return {k: v for k, v in response.items() if v is not None}
+
+
+def parse_fake_spec(spec: str) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """
+    Parse a fake backend spec such as "clusters=2,services=500,tasks=50,latency=0.02"
+
+    Returns keyword arguments for FakeECSBackend, FakeECSBackend.populate and FakeECSClient.
+    Keys: clusters, services, tasks (per service), instances, stopped (tasks per service),
+    revisions, history, namespace, seed, deployment_seconds, deployment_failure_rate,
+    latency, jitter, failure_rate, throttle_rate, throttle_burst.
+
+    Args:
+        spec: Comma separated key=value pairs ("1" or empty uses the defaults)
+    """
+    populate_keys = {'clusters': 'clusters', 'services': 'services', 'tasks': 'tasks_per_service',
+                     'instances': 'instances', 'stopped': 'stopped_tasks_per_service',
+                     'revisions': 'revisions', 'history': 'deployment_history', 'namespace': 'namespace'}
+    backend_keys = {'seed', 'deployment_seconds', 'deployment_failure_rate'}
+    client_keys = {'latency', 'jitter', 'failure_rate', 'throttle_rate', 'throttle_burst'}
+
+    backend, populate, client = {}, {}, {}
+    for pair in (spec or '').split(','):
+        key, _, value = pair.strip().partition('=')
+        if not value:
+            continue
+        if key in populate_keys:
+            populate[populate_keys[key]] = value if key == 'namespace' else int(value)
+        elif key in backend_keys:
+            backend[key] = int(value) if key == 'seed' else float(value)
+        elif key in client_keys:
+            client[key] = int(value) if key == 'throttle_burst' else float(value)
+        else:
+            raise ValueError(f'Unknown fake backend option: {key}')
+    return backend, populate, client
+
+
+def create_fake_client(spec: str = '') -> FakeECSClient:
+    """
+    Build a populated backend and a client for it from a spec string
+
+    Args:
+        spec: Fake backend spec, see parse_fake_spec
+    """
+    backend_args, populate_args, client_args = parse_fake_spec(spec)
+    backend = FakeECSBackend(**backend_args)
+    backend.populate(**populate_args)
+    return FakeECSClient(backend, **client_args)
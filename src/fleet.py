@@ -0,0 +1,99 @@
+"""
+Compact statistics table of every cluster in the account
+"""
+
+from typing import List, Dict, Any, Optional
+
+from src.utils import paginate, chunked, run_concurrently
+
+# Maximum number of clusters per DescribeClusters call
+DESCRIBE_BATCH_SIZE = 100
+
+# Columns of the overview table, as (column, cluster field or statistic)
+COLUMNS = (
+    ('cluster', 'clusterName'),
+    ('status', 'status'),
+    ('runningTasks', 'runningTasksCount'),
+    ('pendingTasks', 'pendingTasksCount'),
+    ('activeServices', 'activeServicesCount'),
+    ('instances', 'registeredContainerInstancesCount'),
+    ('runningEC2Tasks', 'runningEC2TasksCount'),
+    ('runningFargateTasks', 'runningFargateTasksCount'),
+    ('drainingServices', ('drainingEC2ServiceCount', 'drainingFargateServiceCount')),
+    ('capacityProviders', 'capacityProviders'),
+    ('defaultStrategy', 'defaultCapacityProviderStrategy'),
+)
+
+# Columns summed into the fleet totals
+TOTALS = ('runningTasks', 'pendingTasks', 'activeServices', 'instances',
+          'runningEC2Tasks', 'runningFargateTasks', 'drainingServices')
+
+
+def format_strategy(strategy: List[Dict[str, Any]]) -> str:
+    """
+    Capacity provider strategy as provider:weight pairs, with :base when a base is set
+
+    Args:
+        strategy: Capacity provider strategy (capacityProvider, weight, base)
+    """
+    items = []
+    for item in strategy or []:
+        text = f"{item['capacityProvider']}:{item.get('weight', 0)}"
+        if item.get('base'):
+            text += f":{item['base']}"
+        items.append(text)
+    return ','.join(items)
+
+
+def _row(cluster: Dict[str, Any]) -> List[Any]:
+    statistics = {s['name']: int(s['value']) for s in cluster.get('statistics', []) if s.get('value', '').isdigit()}
+    row = []
+    for column, field in COLUMNS:
+        if isinstance(field, tuple):
+            row.append(sum(statistics.get(name, 0) for name in field))
+        elif column == 'capacityProviders':
+            row.append(','.join(cluster.get(field, [])))
+        elif column == 'defaultStrategy':
+            row.append(format_strategy(cluster.get(field)))
+        elif field in cluster:
+            row.append(cluster[field])
+        else:
+            row.append(statistics.get(field, 0))
+    return row
+
+
+def fleet_overview(client, cluster_arns: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    One row of task, service, instance and capacity provider figures per cluster
+
+    Clusters are listed in pages of 100 and described in concurrent batches of 100 with
+    only STATISTICS included, so the whole fleet costs one list and one describe call per
+    100 clusters. Rows are returned as a column list plus value lists to keep the output
+    small for large fleets.
+
+    Args:
+        client: ECS client
+        cluster_arns: Clusters to include (optional, defaults to all clusters)
+    """
+    if not cluster_arns:
+        cluster_arns = paginate(client.list_clusters, 'clusterArns', maxResults=100)
+
+    responses = run_concurrently(
+        lambda batch: client.describe_clusters(clusters=batch, include=['STATISTICS']),
+        list(chunked(cluster_arns, DESCRIBE_BATCH_SIZE))
+    )
+    clusters = [cluster for response in responses for cluster in response.get('clusters', [])]
+    failures = [failure for response in responses for failure in response.get('failures', [])]
+
+    rows = sorted((_row(cluster) for cluster in clusters), key=lambda row: row[0])
+    columns = [column for column, _ in COLUMNS]
+    totals = {
+        column: sum(row[columns.index(column)] for row in rows)
+        for column in TOTALS
+    }
+    totals['clusters'] = len(rows)
+
+    result = {'columns': columns, 'rows': rows, 'totals': totals}
+    if failures:
+        result['failures'] = failures
+    return result
@@ -0,0 +1,212 @@
+"""
+CPU and memory footprint and Fargate cost of services, rolled up per cluster and capacity provider
+"""
+
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+from src.placement import task_requirements
+from src.utils import describe_services_batched, paginate, run_concurrently
+
+# Number of task definition revisions kept by TaskDefinitionCache
+DEFAULT_MAX_TASK_DEFINITIONS = 2000
+
+# Hours used to turn hourly costs into monthly costs
+HOURS_PER_MONTH = 730
+
+
+class TaskDefinitionCache:
+    """
+    Bounded cache of described task definition revisions
+
+    A task definition revision never changes once registered, so entries do not expire;
+    the least recently used revisions are dropped when the cache is full.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_TASK_DEFINITIONS):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._definitions: OrderedDict = OrderedDict()
+
+    def get_many(self, client, arns: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Task definitions by ARN, describing only those that are not cached
+
+        Args:
+            client: ECS client
+            arns: Task definition revision ARNs
+        """
+        found, missing = {}, []
+        with self._lock:
+            for arn in dict.fromkeys(arns):
+                if arn in self._definitions:
+                    self._definitions.move_to_end(arn)
+                    found[arn] = self._definitions[arn]
+                else:
+                    missing.append(arn)
+
+        described = run_concurrently(
+            lambda arn: client.describe_task_definition(taskDefinition=arn)['taskDefinition'],
+            missing
+        )
+        with self._lock:
+            for arn, definition in zip(missing, described):
+                found[arn] = self._definitions[arn] = definition
+                self._definitions.move_to_end(arn)
+            while len(self._definitions) > self.max_entries:
+                self._definitions.popitem(last=False)
+        return found
+
+
+def task_footprint(task_definition: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    CPU units and memory (MiB) reserved by one task, with the per-container reservations
+
+    Args:
+        task_definition: Task definition as returned by DescribeTaskDefinition
+    """
+    required = task_requirements(task_definition)
+    return {
+        'cpu': required['cpu'],
+        'memory': required['memory'],
+        'containers': [
+            {
+                'name': container.get('name'),
+                'cpu': container.get('cpu', 0),
+                'memory': container.get('memory'),
+                'memoryReservation': container.get('memoryReservation'),
+            }
+            for container in task_definition.get('containerDefinitions', [])
+        ],
+    }
+
+
+def split_by_capacity_provider(count: float, strategy: List[Dict[str, Any]],
+                               launch_type: Optional[str]) -> Dict[str, float]:
+    """
+    Expected number of tasks on each capacity provider of a strategy
+
+    The base of each provider is filled first, the remaining tasks are split by weight.
+    Without a strategy all tasks count towards the launch type.
+
+    Args:
+        count: Number of tasks
+        strategy: Capacity provider strategy (capacityProvider, base, weight)
+        launch_type: Launch type used when there is no strategy (optional)
+    """
+    if not strategy:
+        return {launch_type or 'UNKNOWN': count}
+
+    split, remaining = {}, count
+    for item in strategy:
+        base = min(item.get('base', 0), remaining)
+        split[item['capacityProvider']] = base
+        remaining -= base
+
+    total_weight = sum(item.get('weight', 0) for item in strategy)
+    for item in strategy:
+        if total_weight:
+            split[item['capacityProvider']] += remaining * item.get('weight', 0) / total_weight
+    return split
+
+
+def hourly_cost(cpu: float, memory: float, provider: str, prices: Optional[Dict[str, float]]) -> Optional[float]:
+    """
+    Hourly Fargate cost of reserved CPU units and memory (MiB), None for other providers
+
+    Args:
+        cpu: CPU units
+        memory: Memory in MiB
+        provider: Capacity provider or launch type
+        prices: vcpu_hour and gb_hour prices, optionally spot_vcpu_hour and spot_gb_hour (optional)
+    """
+    if not prices or provider not in ('FARGATE', 'FARGATE_SPOT'):
+        return None
+    spot = 'spot_' if provider == 'FARGATE_SPOT' else ''
+    vcpu_price = prices.get(f'{spot}vcpu_hour', prices.get('vcpu_hour', 0))
+    gb_price = prices.get(f'{spot}gb_hour', prices.get('gb_hour', 0))
+    return cpu / 1024 * vcpu_price + memory / 1024 * gb_price
+
+
+def _add(totals: Dict[str, Any], cpu: float, memory: float, tasks: float, cost: Optional[float]):
+    totals['tasks'] = totals.get('tasks', 0) + tasks
+    totals['cpu'] = totals.get('cpu', 0) + cpu
+    totals['memory'] = totals.get('memory', 0) + memory
+    if cost is not None:
+        totals['hourlyCost'] = totals.get('hourlyCost', 0) + cost
+
+
+def _rounded(totals: Dict[str, Any]) -> Dict[str, Any]:
+    result = {key: round(value, 2) for key, value in totals.items()}
+    if 'hourlyCost' in totals:
+        result['hourlyCost'] = round(totals['hourlyCost'], 4)
+        result['monthlyCost'] = round(totals['hourlyCost'] * HOURS_PER_MONTH, 2)
+    return result
+
+
+def load_services(client, cluster: str) -> List[Dict[str, Any]]:
+    """
+    Describe every service of a cluster
+
+    Args:
+        client: ECS client
+        cluster: Name or ARN of the cluster
+    """
+    service_arns = paginate(client.list_services, 'serviceArns', cluster=cluster, maxResults=100)
+    return describe_services_batched(client, cluster, service_arns)
+
+
+def resource_footprint(services: List[Dict[str, Any]], task_definitions: Dict[str, Dict[str, Any]],
+                       prices: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Reserved CPU and memory of services, totalled per service, cluster and capacity provider
+
+    Every deployment of a service counts with its own task definition, so services in the
+    middle of a rollout include the tasks of both revisions. Reservations are computed for
+    the desired and the running tasks; costs use running tasks.
+
+    Args:
+        services: Services as returned by DescribeServices
+        task_definitions: Task definitions of the services' deployments by ARN
+        prices: Fargate prices per vCPU hour and GB hour (optional, see hourly_cost)
+    """
+    per_service, clusters, providers = [], {}, {}
+    for service in services:
+        desired_totals, running_totals, footprints = {}, {}, {}
+        deployments = service.get('deployments') or [service]
+        for deployment in deployments:
+            arn = deployment.get('taskDefinition', service.get('taskDefinition'))
+            footprint = footprints.get(arn)
+            if footprint is None and arn in task_definitions:
+                footprint = footprints[arn] = task_footprint(task_definitions[arn])
+            if footprint is None:
+                continue
+            strategy = deployment.get('capacityProviderStrategy') or service.get('capacityProviderStrategy', [])
+            launch_type = deployment.get('launchType') or service.get('launchType')
+            for key, totals in (('desiredCount', desired_totals), ('runningCount', running_totals)):
+                for provider, tasks in split_by_capacity_provider(deployment.get(key, 0), strategy, launch_type).items():
+                    cpu, memory = footprint['cpu'] * tasks, footprint['memory'] * tasks
+                    cost = hourly_cost(cpu, memory, provider, prices) if totals is running_totals else None
+                    _add(totals, cpu, memory, tasks, cost)
+                    if totals is running_totals:
+                        _add(clusters.setdefault(service.get('clusterArn'), {}), cpu, memory, tasks, cost)
+                        _add(providers.setdefault(provider, {}), cpu, memory, tasks, cost)
+
+        per_service.append({
+            'serviceArn': service['serviceArn'],
+            'clusterArn': service.get('clusterArn'),
+            'taskDefinitions': {arn: footprint for arn, footprint in footprints.items()},
+            'desired': _rounded(desired_totals),
+            'running': _rounded(running_totals),
+        })
+
+    total = {}
+    for totals in clusters.values():
+        _add(total, totals['cpu'], totals['memory'], totals['tasks'], totals.get('hourlyCost'))
+    return {
+        'services': per_service,
+        'byCluster': {cluster: _rounded(totals) for cluster, totals in clusters.items()},
+        'byCapacityProvider': {provider: _rounded(totals) for provider, totals in providers.items()},
+        'total': _rounded(total),
+    }
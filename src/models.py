@@ -0,0 +1,188 @@
+"""
+Compact in-memory models of services, tasks and container instances
+"""
+
+import sys
+from typing import Dict, Any, Optional, Tuple
+
+
+def _intern(value: Any) -> Any:
+    """Share one copy of repeated strings such as ARNs and statuses"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _remaining(instance: Dict[str, Any], name: str) -> Optional[int]:
+    for resource in instance.get('remainingResources', []):
+        if resource.get('name') == name:
+            return resource.get('integerValue')
+    return None
+
+
+class _Model:
+    """
+    Slotted record of the operationally relevant fields of an ECS resource
+
+    Strings are interned, so ARNs of task definitions, clusters, container instances
+    and service groups shared by many resources are stored once. FIELDS are the fields
+    returned by to_dict and compared by changes; other slots are kept for to_api.
+    """
+
+    __slots__ = ('arn',)
+
+    FIELDS: Tuple[str, ...] = ()
+
+    def __init__(self, arn: str, **values):
+        self.arn = _intern(arn)
+        for name in self.__slots__:
+            if name != 'arn':
+                setattr(self, name, _intern(values.get(name)))
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__ + ('arn',)
+        )
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.arn!r})'
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Record of the FIELDS, as reported in change events"""
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def changes(self, previous: '_Model') -> Dict[str, Dict[str, Any]]:
+        """
+        Old and new values of the FIELDS that differ from a previous state
+
+        Args:
+            previous: Earlier state of the same resource
+        """
+        changed = {}
+        for name in self.FIELDS:
+            old, new = getattr(previous, name), getattr(self, name)
+            if old != new:
+                changed[name] = {'old': old, 'new': new}
+        return changed
+
+
+class ServiceState(_Model):
+    """Service state as tracked by the state poller"""
+
+    __slots__ = ('status', 'desiredCount', 'runningCount', 'pendingCount', 'taskDefinition',
+                 'deployments', 'primaryDeploymentId', 'rolloutState')
+
+    FIELDS = __slots__
+
+    @classmethod
+    def from_api(cls, service: Dict[str, Any]) -> 'ServiceState':
+        """
+        Keep the relevant fields of a service
+
+        Args:
+            service: Service as returned by DescribeServices
+        """
+        deployments = service.get('deployments', [])
+        primary = next((d for d in deployments if d.get('status') == 'PRIMARY'), {})
+        return cls(
+            service['serviceArn'],
+            status=service.get('status'),
+            desiredCount=service.get('desiredCount'),
+            runningCount=service.get('runningCount'),
+            pendingCount=service.get('pendingCount'),
+            taskDefinition=service.get('taskDefinition'),
+            deployments=len(deployments),
+            primaryDeploymentId=primary.get('id'),
+            rolloutState=primary.get('rolloutState'),
+        )
+
+    def to_api(self) -> Dict[str, Any]:
+        """Service in the shape of DescribeServices, limited to the kept fields"""
+        service = {
+            'serviceArn': self.arn,
+            'status': self.status,
+            'desiredCount': self.desiredCount,
+            'runningCount': self.runningCount,
+            'pendingCount': self.pendingCount,
+            'taskDefinition': self.taskDefinition,
+        }
+        if self.primaryDeploymentId:
+            service['deployments'] = [{
+                'id': self.primaryDeploymentId, 'status': 'PRIMARY', 'rolloutState': self.rolloutState,
+            }]
+        return service
+
+
+class TaskState(_Model):
+    """Task state as tracked by the state poller"""
+
+    __slots__ = ('lastStatus', 'desiredStatus', 'healthStatus', 'taskDefinitionArn', 'group',
+                 'containerInstanceArn', 'stopCode')
+
+    FIELDS = __slots__
+
+    @classmethod
+    def from_api(cls, task: Dict[str, Any]) -> 'TaskState':
+        """
+        Keep the relevant fields of a task
+
+        Args:
+            task: Task as returned by DescribeTasks
+        """
+        return cls(task['taskArn'], **{name: task.get(name) for name in cls.__slots__})
+
+    def to_api(self) -> Dict[str, Any]:
+        """Task in the shape of DescribeTasks, limited to the kept fields"""
+        task = {'taskArn': self.arn}
+        task.update((name, getattr(self, name)) for name in self.__slots__ if getattr(self, name) is not None)
+        return task
+
+
+class ContainerInstanceState(_Model):
+    """Container instance state as tracked by the state poller and the attribute index"""
+
+    __slots__ = ('status', 'agentConnected', 'runningTasksCount', 'pendingTasksCount',
+                 'remainingCpu', 'remainingMemory', 'ec2InstanceId', 'agentVersion', 'registeredAt')
+
+    FIELDS = ('status', 'agentConnected', 'runningTasksCount', 'pendingTasksCount',
+              'remainingCpu', 'remainingMemory')
+
+    @classmethod
+    def from_api(cls, instance: Dict[str, Any]) -> 'ContainerInstanceState':
+        """
+        Keep the relevant fields of a container instance
+
+        Args:
+            instance: Container instance as returned by DescribeContainerInstances
+        """
+        return cls(
+            instance['containerInstanceArn'],
+            status=instance.get('status'),
+            agentConnected=instance.get('agentConnected'),
+            runningTasksCount=instance.get('runningTasksCount'),
+            pendingTasksCount=instance.get('pendingTasksCount'),
+            remainingCpu=_remaining(instance, 'CPU'),
+            remainingMemory=_remaining(instance, 'MEMORY'),
+            ec2InstanceId=instance.get('ec2InstanceId'),
+            agentVersion=instance.get('versionInfo', {}).get('agentVersion'),
+            registeredAt=instance.get('registeredAt'),
+        )
+
+    def to_api(self) -> Dict[str, Any]:
+        """Container instance in the shape of DescribeContainerInstances, limited to the kept fields"""
+        instance = {
+            'containerInstanceArn': self.arn,
+            'ec2InstanceId': self.ec2InstanceId,
+            'status': self.status,
+            'agentConnected': self.agentConnected,
+            'runningTasksCount': self.runningTasksCount,
+            'pendingTasksCount': self.pendingTasksCount,
+            'registeredAt': self.registeredAt,
+            'versionInfo': {'agentVersion': self.agentVersion},
+            'remainingResources': [
+                {'name': name, 'type': 'INTEGER', 'integerValue': value}
+                for name, value in (('CPU', self.remainingCpu), ('MEMORY', self.remainingMemory))
+                if value is not None
+            ],
+        }
+        return {key: value for key, value in instance.items() if value is not None}
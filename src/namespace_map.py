@@ -0,0 +1,149 @@
+"""
+Service Connect namespace map with incremental refresh
+"""
+
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+from src.utils import paginate, chunked, run_concurrently
+
+# Seconds after which a cached service is described again
+DEFAULT_MAX_AGE = 300
+
+
+def service_cluster_arn(service_arn: str) -> str:
+    """
+    Derive the cluster ARN from a (long format) service ARN
+
+    Args:
+        service_arn: ARN of the service
+    """
+    prefix, _, resource = service_arn.partition(':service/')
+    parts = resource.split('/')
+    cluster_name = parts[0] if len(parts) > 1 else 'default'
+    return f'{prefix}:cluster/{cluster_name}'
+
+
+def service_node(service: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce a described service to a compact namespace map node
+
+    Args:
+        service: Service as returned by DescribeServices
+    """
+    deployments = service.get('deployments', [])
+    primary = next((d for d in deployments if d.get('status') == 'PRIMARY'), {})
+    connect = primary.get('serviceConnectConfiguration', {})
+
+    endpoints = []
+    for connect_service in connect.get('services', []):
+        for alias in connect_service.get('clientAliases', []) or [{}]:
+            endpoints.append({
+                'portName': connect_service.get('portName'),
+                'discoveryName': connect_service.get('discoveryName', connect_service.get('portName')),
+                'dnsName': alias.get('dnsName', connect_service.get('discoveryName', connect_service.get('portName'))),
+                'port': alias.get('port')
+            })
+
+    return {
+        'serviceArn': service['serviceArn'],
+        'serviceName': service.get('serviceName'),
+        'clusterArn': service.get('clusterArn'),
+        'status': service.get('status'),
+        'desiredCount': service.get('desiredCount'),
+        'runningCount': service.get('runningCount'),
+        'pendingCount': service.get('pendingCount'),
+        'taskDefinition': service.get('taskDefinition'),
+        'deployments': len(deployments),
+        'rolloutState': primary.get('rolloutState'),
+        'healthy': len(deployments) == 1 and service.get('runningCount') == service.get('desiredCount'),
+        'serviceConnectEnabled': connect.get('enabled', False),
+        'endpoints': endpoints
+    }
+
+
+class NamespaceMapCache:
+    """
+    Cached namespace maps that are refreshed incrementally
+
+    A refresh lists the namespace again, drops services that left it and only
+    describes services that are new, older than max_age or were still deploying.
+    """
+
+    def __init__(self, max_age: float = DEFAULT_MAX_AGE):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._described_at: Dict[str, Dict[str, float]] = {}
+
+    def _stale(self, namespace: str, service_arn: str, now: float) -> bool:
+        node = self._nodes.get(namespace, {}).get(service_arn)
+        described_at = self._described_at.get(namespace, {}).get(service_arn)
+        if node is None or described_at is None:
+            return True
+        return now - described_at >= self.max_age or not node['healthy']
+
+    def get(self, client, namespace: str, force: bool = False) -> Dict[str, Any]:
+        """
+        Get the map of a namespace, refreshing stale entries
+
+        Args:
+            client: ECS client
+            namespace: Name or ARN of the Cloud Map namespace
+            force: Describe every service again
+        """
+        service_arns = paginate(client.list_services_by_namespace, 'serviceArns', namespace=namespace)
+        now = time.monotonic()
+
+        with self._lock:
+            stale = [arn for arn in service_arns if force or self._stale(namespace, arn, now)]
+
+        by_cluster: Dict[str, List[str]] = {}
+        for arn in stale:
+            by_cluster.setdefault(service_cluster_arn(arn), []).append(arn)
+        batches = [(cluster, batch) for cluster, arns in by_cluster.items() for batch in chunked(arns, 10)]
+        described = run_concurrently(
+            lambda item: client.describe_services(cluster=item[0], services=item[1]).get('services', []),
+            batches
+        )
+
+        current = set(service_arns)
+        with self._lock:
+            nodes = {arn: node for arn, node in self._nodes.get(namespace, {}).items() if arn in current}
+            described_at = {arn: t for arn, t in self._described_at.get(namespace, {}).items() if arn in nodes}
+            for services in described:
+                for service in services:
+                    nodes[service['serviceArn']] = service_node(service)
+                    described_at[service['serviceArn']] = now
+            self._nodes[namespace] = nodes
+            self._described_at[namespace] = described_at
+
+        return build_map(namespace, list(nodes.values()), described=len(stale))
+
+
+def build_map(namespace: str, nodes: List[Dict[str, Any]], described: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Assemble the compact namespace graph from service nodes
+
+    Args:
+        namespace: Name or ARN of the namespace
+        nodes: Service nodes from service_node
+        described: Number of services described by this refresh (optional)
+    """
+    nodes = sorted(nodes, key=lambda node: node['serviceArn'])
+    endpoints = [
+        dict(endpoint, serviceArn=node['serviceArn'])
+        for node in nodes for endpoint in node['endpoints']
+    ]
+
+    result = {
+        'namespace': namespace,
+        'services': nodes,
+        'endpoints': endpoints,
+        'clients': [node['serviceArn'] for node in nodes if node['serviceConnectEnabled']],
+        'unhealthy': [node['serviceArn'] for node in nodes if not node['healthy']]
+    }
+    if described is not None:
+        result['servicesDescribed'] = described
+    return result
@@ -0,0 +1,261 @@
+"""
+Local what-if simulation of ECS task placement on container instances
+"""
+
+import random
+from array import array
+from typing import List, Dict, Any, Optional, Set
+
+from src.cluster_query import compile_query, instance_record
+from src.utils import paginate, chunked, run_concurrently
+
+# Default strategy of services without a placement strategy
+DEFAULT_STRATEGY = [
+    {'type': 'spread', 'field': 'attribute:ecs.availability-zone'},
+    {'type': 'spread', 'field': 'instanceId'},
+]
+
+
+def load_container_instances(client, cluster: str, status: str = 'ACTIVE') -> List[Dict[str, Any]]:
+    """
+    List and describe every container instance of a cluster
+
+    Args:
+        client: ECS client
+        cluster: Name or ARN of the cluster
+        status: Only include instances with this status
+    """
+    instance_arns = paginate(client.list_container_instances, 'containerInstanceArns', cluster=cluster, status=status)
+    batches = run_concurrently(
+        lambda batch: client.describe_container_instances(
+            cluster=cluster, containerInstances=batch
+        ).get('containerInstances', []),
+        list(chunked(instance_arns, 100))
+    )
+    return [instance for batch in batches for instance in batch]
+
+
+def load_task_groups(client, cluster: str) -> Dict[str, Set[str]]:
+    """
+    Groups of the running tasks of a cluster by container instance ARN
+
+    Args:
+        client: ECS client
+        cluster: Name or ARN of the cluster
+    """
+    task_arns = paginate(client.list_tasks, 'taskArns', cluster=cluster)
+    batches = run_concurrently(
+        lambda batch: client.describe_tasks(cluster=cluster, tasks=batch).get('tasks', []),
+        list(chunked(task_arns, 100))
+    )
+    groups: Dict[str, Set[str]] = {}
+    for task in (task for batch in batches for task in batch):
+        if task.get('containerInstanceArn') and task.get('group'):
+            groups.setdefault(task['containerInstanceArn'], set()).add(task['group'])
+    return groups
+
+
+def uses_task_groups(constraints: Optional[List[Dict[str, Any]]]) -> bool:
+    """
+    Whether any memberOf constraint refers to task:group
+
+    Args:
+        constraints: Placement constraints
+    """
+    return any(
+        constraint.get('type') == 'memberOf' and 'task:group' in compile_query(constraint['expression']).subjects
+        for constraint in constraints or []
+    )
+
+
+def _resource(resources: List[Dict[str, Any]], name: str) -> Dict[str, Any]:
+    return next((r for r in resources if r.get('name') == name), {})
+
+
+def task_requirements(task_definition: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    CPU units, memory (MiB) and host ports a task of the task definition reserves
+
+    Args:
+        task_definition: Task definition as returned by DescribeTaskDefinition
+    """
+    containers = task_definition.get('containerDefinitions', [])
+    cpu = task_definition.get('cpu') or sum(c.get('cpu', 0) for c in containers)
+    memory = task_definition.get('memory') or sum(
+        c.get('memoryReservation') or c.get('memory') or 0 for c in containers
+    )
+
+    # Static host ports; awsvpc tasks get their own ENI and bridge host port 0 is dynamic
+    ports = set()
+    network_mode = task_definition.get('networkMode', 'bridge')
+    if network_mode in ('bridge', 'host'):
+        for container in containers:
+            for mapping in container.get('portMappings', []):
+                port = mapping.get('hostPort')
+                if network_mode == 'host':
+                    port = port or mapping.get('containerPort')
+                if port:
+                    ports.add(str(port))
+
+    return {'cpu': int(cpu), 'memory': int(memory), 'ports': sorted(ports)}
+
+
+class ClusterState:
+    """
+    Remaining resources of container instances as parallel arrays
+
+    Index i of every array describes the same instance, so feasibility and strategy
+    scores are computed column by column instead of per instance dict.
+    """
+
+    def __init__(self, instances: List[Dict[str, Any]], task_groups: Optional[Dict[str, Set[str]]] = None):
+        instances = [i for i in instances if i.get('status', 'ACTIVE') == 'ACTIVE' and i.get('agentConnected', True)]
+        task_groups = task_groups or {}
+        self.arns = [i['containerInstanceArn'] for i in instances]
+        self.records = [instance_record(i, task_groups.get(i['containerInstanceArn'])) for i in instances]
+        self.attributes = [record['attributes'] for record in self.records]
+        self.cpu = array('q', (_resource(i.get('remainingResources', []), 'CPU').get('integerValue', 0) for i in instances))
+        self.memory = array('q', (_resource(i.get('remainingResources', []), 'MEMORY').get('integerValue', 0) for i in instances))
+        self.ports = [
+            set(_resource(i.get('remainingResources', []), 'PORTS').get('stringSetValue', [])) for i in instances
+        ]
+        self.placed = array('q', bytes(8 * len(instances)))
+
+    def field_values(self, field: str) -> List[Any]:
+        """Value of a spread field for every instance"""
+        if field in ('instanceId', 'host'):
+            return self.arns
+        if field.startswith('attribute:'):
+            name = field[len('attribute:'):]
+            return [attributes.get(name) for attributes in self.attributes]
+        raise ValueError(f"Unsupported spread field: {field}")
+
+
+def _pick(state: ClusterState, candidates: List[int], strategies: List[Dict[str, Any]],
+          spread_values: Dict[str, List[Any]], spread_counts: Dict[str, Dict[Any, int]],
+          rng: random.Random) -> int:
+    """Apply the strategies in order, each narrowing the candidates to its best instances"""
+    for strategy in strategies:
+        if len(candidates) == 1:
+            break
+        kind = strategy['type']
+        if kind == 'random':
+            return rng.choice(candidates)
+        if kind == 'binpack':
+            column = state.memory if strategy.get('field', 'memory').lower() == 'memory' else state.cpu
+            best = min(column[i] for i in candidates)
+            candidates = [i for i in candidates if column[i] == best]
+        elif kind == 'spread':
+            values, counts = spread_values[strategy['field']], spread_counts[strategy['field']]
+            best = min(counts.get(values[i], 0) for i in candidates)
+            candidates = [i for i in candidates if counts.get(values[i], 0) == best]
+        else:
+            raise ValueError(f"Unsupported placement strategy: {kind}")
+    return candidates[0]
+
+
+def simulate_placement(instances: List[Dict[str, Any]], task_definition: Dict[str, Any], count: int,
+                       strategies: Optional[List[Dict[str, Any]]] = None,
+                       constraints: Optional[List[Dict[str, Any]]] = None,
+                       seed: Optional[int] = None,
+                       task_groups: Optional[Dict[str, Set[str]]] = None) -> Dict[str, Any]:
+    """
+    Simulate placing tasks one by one the way the ECS scheduler does
+
+    Constraints filter the instances, the tasks' resources must fit the remaining CPU,
+    memory and host ports, and the strategies choose among the remaining instances in
+    order (later strategies break ties of earlier ones). Spread counts only include the
+    tasks placed by this simulation.
+
+    Args:
+        instances: Container instances as returned by DescribeContainerInstances
+        task_definition: Task definition as returned by DescribeTaskDefinition
+        count: Number of tasks to place
+        strategies: Placement strategies (optional, defaults to spreading over zones and instances)
+        constraints: Placement constraints, distinctInstance or memberOf (optional)
+        seed: Seed for the random strategy (optional)
+        task_groups: Groups of the running tasks by container instance ARN, for task:group
+            in memberOf expressions (optional, see load_task_groups)
+    """
+    state = ClusterState(instances, task_groups)
+    required = task_requirements(task_definition)
+    strategies = strategies or DEFAULT_STRATEGY
+    rng = random.Random(seed)
+
+    eligible = list(range(len(state.arns)))
+    distinct = False
+    for constraint in constraints or []:
+        if constraint['type'] == 'distinctInstance':
+            distinct = True
+        elif constraint['type'] == 'memberOf':
+            query = compile_query(constraint['expression'])
+            eligible = [i for i in eligible if query.matches(state.records[i])]
+        else:
+            raise ValueError(f"Unsupported placement constraint: {constraint['type']}")
+
+    spread_values = {s['field']: state.field_values(s['field']) for s in strategies if s['type'] == 'spread'}
+    spread_counts: Dict[str, Dict[Any, int]] = {field: {} for field in spread_values}
+    cpu, memory, ports = required['cpu'], required['memory'], set(required['ports'])
+
+    placed = 0
+    for _ in range(count):
+        candidates = [
+            i for i in eligible
+            if state.cpu[i] >= cpu and state.memory[i] >= memory and not (ports & state.ports[i])
+            and not (distinct and state.placed[i])
+        ]
+        if not candidates:
+            break
+        chosen = _pick(state, candidates, strategies, spread_values, spread_counts, rng)
+        state.cpu[chosen] -= cpu
+        state.memory[chosen] -= memory
+        state.ports[chosen] |= ports
+        state.placed[chosen] += 1
+        for field, values in spread_values.items():
+            spread_counts[field][values[chosen]] = spread_counts[field].get(values[chosen], 0) + 1
+        placed += 1
+
+    result = {
+        'requested': count,
+        'placed': placed,
+        'failed': count - placed,
+        'taskRequirements': required,
+        'instancesConsidered': len(state.arns),
+        'instancesMatchingConstraints': len(eligible),
+        'remainingAfter': {'cpu': sum(state.cpu), 'memory': sum(state.memory)},
+        'distribution': {
+            'byInstance': {state.arns[i]: state.placed[i] for i in range(len(state.arns)) if state.placed[i]},
+            'byAvailabilityZone': _count_by(state, 'ecs.availability-zone'),
+        },
+    }
+    if placed < count:
+        result['failureReasons'] = _failure_reasons(state, eligible, required, distinct)
+    return result
+
+
+def _count_by(state: ClusterState, attribute: str) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for i, placed in enumerate(state.placed):
+        if placed:
+            zone = state.attributes[i].get(attribute) or 'unknown'
+            counts[zone] = counts.get(zone, 0) + placed
+    return counts
+
+
+def _failure_reasons(state: ClusterState, eligible: List[int], required: Dict[str, Any],
+                     distinct: bool) -> Dict[str, int]:
+    """Number of instances rejecting the next task for each reason (first failing check)"""
+    reasons = {'CONSTRAINT:memberOf': len(state.arns) - len(eligible)}
+    ports = set(required['ports'])
+    for i in eligible:
+        if distinct and state.placed[i]:
+            reason = 'CONSTRAINT:distinctInstance'
+        elif state.cpu[i] < required['cpu']:
+            reason = 'RESOURCE:CPU'
+        elif state.memory[i] < required['memory']:
+            reason = 'RESOURCE:MEMORY'
+        else:
+            reason = 'RESOURCE:PORTS'
+        reasons[reason] = reasons.get(reason, 0) + 1
+    return {reason: n for reason, n in reasons.items() if n}
+
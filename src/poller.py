@@ -0,0 +1,224 @@
+"""
+Background cluster state poller with a change-since-cursor feed
+"""
+
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from itertools import islice
+from typing import List, Dict, Any, Optional, Callable
+
+from src.models import ServiceState, TaskState, ContainerInstanceState
+from src.utils import describe_services_batched, paginate, chunked, run_concurrently
+
+logger = logging.getLogger(__name__)
+
+# Default base polling interval in seconds
+DEFAULT_POLL_INTERVAL = 30
+
+# Maximum number of change events retained for get_changes_since
+MAX_EVENTS = 10000
+
+
+def snapshot_cluster(client, cluster: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Take a compact snapshot of the services, tasks and container instances of a cluster
+
+    Resources are kept as slotted models with interned strings, which take a fraction
+    of the memory of the described dicts.
+
+    Args:
+        client: ECS client
+        cluster: Name or ARN of the cluster
+    """
+    service_arns, task_arns, instance_arns = run_concurrently(
+        lambda args: paginate(getattr(client, args[0]), args[1], cluster=cluster),
+        [
+            ('list_services', 'serviceArns'),
+            ('list_tasks', 'taskArns'),
+            ('list_container_instances', 'containerInstanceArns'),
+        ]
+    )
+
+    tasks = run_concurrently(
+        lambda batch: client.describe_tasks(cluster=cluster, tasks=batch).get('tasks', []),
+        list(chunked(task_arns, 100))
+    )
+    instances = run_concurrently(
+        lambda batch: client.describe_container_instances(
+            cluster=cluster, containerInstances=batch
+        ).get('containerInstances', []),
+        list(chunked(instance_arns, 100))
+    )
+
+    services = [ServiceState.from_api(s) for s in describe_services_batched(client, cluster, service_arns)]
+    return {
+        'service': {service.arn: service for service in services},
+        'task': {task.arn: task for task in map(TaskState.from_api, (t for batch in tasks for t in batch))},
+        'containerInstance': {
+            instance.arn: instance
+            for instance in map(ContainerInstanceState.from_api, (i for batch in instances for i in batch))
+        },
+    }
+
+
+def _cluster_name(cluster: str) -> str:
+    """Name of a cluster given by name or ARN"""
+    return cluster.rsplit('/', 1)[-1]
+
+
+def diff_snapshots(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Compute added, removed and modified resources between two snapshots
+
+    Args:
+        old: Previous snapshot from snapshot_cluster
+        new: Current snapshot from snapshot_cluster
+    """
+    changes = []
+    for resource_type in new:
+        before, after = old.get(resource_type, {}), new[resource_type]
+        for arn in after.keys() - before.keys():
+            changes.append({'type': resource_type, 'arn': arn, 'change': 'added', 'state': after[arn].to_dict()})
+        for arn in before.keys() - after.keys():
+            changes.append({'type': resource_type, 'arn': arn, 'change': 'removed', 'state': before[arn].to_dict()})
+        for arn in after.keys() & before.keys():
+            fields = after[arn].changes(before[arn])
+            if fields:
+                changes.append({'type': resource_type, 'arn': arn, 'change': 'modified', 'fields': fields})
+    return changes
+
+
+class StatePoller:
+    """
+    Polls configured clusters in a background thread and records changes as events
+
+    The interval adapts between a quarter and four times the base interval: it halves
+    after a poll that found changes and grows by half after a quiet poll. Every
+    connected client reads the same event log, so API usage does not depend on the
+    number of clients. Snapshots and events are keyed by cluster ARN, whether the
+    clusters were configured by name or ARN.
+    """
+
+    def __init__(self, get_ecs_client: Callable, clusters: List[str],
+                 interval: float = DEFAULT_POLL_INTERVAL):
+        self.get_ecs_client = get_ecs_client
+        self.clusters = clusters
+        self.min_interval = max(5.0, interval / 4)
+        self.max_interval = interval * 4
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._cluster_arns: Dict[str, str] = {}
+        self._snapshots: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._events = deque(maxlen=MAX_EVENTS)
+        self._sequence = 0
+        self._polled_at: Optional[str] = None
+
+    def start(self):
+        """
+        Start polling in a daemon thread
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='ecs-state-poller', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stop the polling thread
+        """
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                changed = self.poll()
+            except Exception:
+                logger.exception('Polling ECS state failed')
+                changed = False
+            if changed:
+                self.interval = max(self.min_interval, self.interval / 2)
+            else:
+                self.interval = min(self.max_interval, self.interval * 1.5)
+            self._stop.wait(self.interval)
+
+    def _resolve_clusters(self, client) -> List[str]:
+        """ARNs of the configured clusters, described once; unknown clusters keep their name"""
+        missing = [cluster for cluster in self.clusters if cluster not in self._cluster_arns]
+        for batch in chunked(missing, 100):
+            for found in client.describe_clusters(clusters=batch).get('clusters', []):
+                for cluster in batch:
+                    if cluster in (found['clusterArn'], found['clusterName']):
+                        self._cluster_arns[cluster] = found['clusterArn']
+        return [self._cluster_arns.get(cluster, cluster) for cluster in self.clusters]
+
+    def poll(self) -> bool:
+        """
+        Poll every configured cluster once and record the changes
+
+        The first snapshot of a cluster is a baseline and produces no events.
+        Returns whether any change was recorded.
+        """
+        client = self.get_ecs_client()
+        clusters = self._resolve_clusters(client)
+        snapshots = run_concurrently(lambda cluster: snapshot_cluster(client, cluster), clusters)
+        now = datetime.now(timezone.utc).isoformat()
+
+        changed = False
+        with self._lock:
+            for cluster, snapshot in zip(clusters, snapshots):
+                previous = self._snapshots.get(cluster)
+                self._snapshots[cluster] = snapshot
+                if previous is None:
+                    continue
+                for change in diff_snapshots(previous, snapshot):
+                    self._sequence += 1
+                    self._events.append(dict(change, sequence=self._sequence, cluster=cluster, time=now))
+                    changed = True
+            self._polled_at = now
+
+        return changed
+
+    def changes_since(self, cursor: Optional[int] = None, cluster: Optional[str] = None,
+                      limit: int = 500) -> Dict[str, Any]:
+        """
+        Get the changes recorded after a cursor
+
+        Args:
+            cursor: Sequence number returned by a previous call (optional, returns only the current cursor)
+            cluster: Only return changes of this cluster, by name or ARN (optional)
+            limit: Maximum number of changes to return
+        """
+        with self._lock:
+            oldest = self._events[0]['sequence'] if self._events else self._sequence + 1
+            result = {
+                'cursor': self._sequence,
+                'polledAt': self._polled_at,
+                'pollIntervalSeconds': round(self.interval, 1),
+                'clusters': {
+                    name: {resource_type: len(resources) for resource_type, resources in snapshot.items()}
+                    for name, snapshot in self._snapshots.items()
+                },
+                'changes': [],
+                # Events after the cursor were dropped from the bounded log
+                'truncated': cursor is not None and cursor + 1 < oldest,
+            }
+            if cursor is None:
+                return result
+
+            # Sequence numbers are contiguous, so the first event after the cursor is found by offset
+            start = max(0, cursor + 1 - oldest)
+            name = cluster and _cluster_name(cluster)
+            changes = [
+                event for event in islice(self._events, start, None)
+                if cluster is None or _cluster_name(event['cluster']) == name
+            ]
+
+        if len(changes) > limit:
+            changes = changes[:limit]
+            result['cursor'] = changes[-1]['sequence']
+            result['hasMore'] = True
+        result['changes'] = changes
+        return result
@@ -0,0 +1,241 @@
+"""
+Opt-in per-invocation profiling of tool calls
+"""
+
+import cProfile
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Callable
+
+# Number of slowest profiles kept
+DEFAULT_MAX_PROFILES = 20
+
+# Number of functions and allocation sites reported per profile
+DEFAULT_TOP = 25
+
+# Stack depth recorded by tracemalloc for allocation sites
+TRACEMALLOC_FRAMES = 10
+
+# Profiles of the worker threads started by the invocation being profiled
+_worker_profiles: contextvars.ContextVar[Optional[List[cProfile.Profile]]] = contextvars.ContextVar(
+    'worker_profiles', default=None
+)
+
+
+def _function_name(key) -> str:
+    filename, line, name = key
+    if filename == '~':
+        return name
+    return f'{os.path.relpath(filename) if not filename.startswith("<") else filename}:{line}({name})'
+
+
+def profile_worker(fn: Callable, *args) -> Any:
+    """
+    Call fn in a worker thread, adding its profile to the invocation being profiled
+
+    run_concurrently calls its workers through this, so time spent in worker threads
+    shows up in the profile of the tool that started them.
+
+    Args:
+        fn: Function to call
+        *args: Positional arguments for fn
+    """
+    profiles = _worker_profiles.get()
+    if profiles is None:
+        return fn(*args)
+
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler is active in this process
+        return fn(*args)
+    try:
+        return fn(*args)
+    finally:
+        profile.disable()
+        profiles.append(profile)
+
+
+def hot_functions(profile: cProfile.Profile, top: int = DEFAULT_TOP,
+                  workers: Optional[List[cProfile.Profile]] = None) -> List[Dict[str, Any]]:
+    """
+    Functions with the most time spent in themselves, from a finished profile
+
+    Args:
+        profile: Disabled cProfile profile
+        top: Number of functions to return
+        workers: Disabled profiles of worker threads merged into the result (optional)
+    """
+    # Imported here because every run_concurrently caller imports this module, profiled or not
+    import pstats
+
+    stats = pstats.Stats(profile)
+    for worker in workers or []:
+        stats.add(worker)
+    stats = stats.stats
+    ranked = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+    return [
+        {
+            'function': _function_name(key),
+            'calls': calls,
+            'ownSeconds': round(own, 6),
+            'cumulativeSeconds': round(cumulative, 6)
+        }
+        for key, (_, calls, own, cumulative, _) in ranked
+    ]
+
+
+def allocation_sites(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot,
+                     top: int = DEFAULT_TOP) -> List[Dict[str, Any]]:
+    """
+    Source lines that allocated the most memory between two snapshots
+
+    Args:
+        before: Snapshot taken when the invocation started
+        after: Snapshot taken when the invocation finished
+        top: Number of allocation sites to return
+    """
+    differences = after.compare_to(before, 'lineno')
+    return [
+        {
+            'site': f'{os.path.relpath(diff.traceback[0].filename)}:{diff.traceback[0].lineno}',
+            'sizeBytes': diff.size_diff,
+            'count': diff.count_diff
+        }
+        for diff in differences[:top] if diff.size_diff > 0
+    ]
+
+
+class ToolProfiler:
+    """
+    Profiles tool invocations with cProfile (and optionally tracemalloc) and keeps the slowest
+
+    Profiles are kept in a bounded min-heap keyed by duration, so a profile is only
+    summarized when it is slower than the fastest one kept. cProfile can only profile
+    one invocation per thread at a time; on Python versions where only one profiler may
+    be active per process, overlapping invocations are timed without a profile.
+
+    Worker threads of run_concurrently are profiled separately and merged into the
+    invocation's profile, so own and cumulative seconds add up across threads and may
+    exceed the wall time. Converting the result to MCP content happens in FastMCP after
+    the invocation returns and is not part of the profile.
+    """
+
+    def __init__(self, tools: Optional[List[str]] = None, memory: bool = False,
+                 max_profiles: int = DEFAULT_MAX_PROFILES, top: int = DEFAULT_TOP):
+        self.tools = set(tools) if tools else None
+        self.memory = memory
+        self.max_profiles = max_profiles
+        self.top = top
+        self._lock = threading.Lock()
+        self._profiles: List[Any] = []
+        self._sequence = itertools.count()
+        self.invocations = 0
+
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    def enabled_for(self, tool: str) -> bool:
+        """
+        Whether invocations of a tool are profiled
+
+        Args:
+            tool: Tool name
+        """
+        return self.tools is None or tool in self.tools
+
+    def _qualifies(self, seconds: float) -> bool:
+        return len(self._profiles) < self.max_profiles or seconds > self._profiles[0][0]
+
+    def profile(self, tool: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Call fn and record its profile if it is among the slowest invocations
+
+        Args:
+            tool: Tool name recorded with the profile
+            fn: Function to call
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+        """
+        before = tracemalloc.take_snapshot() if self.memory else None
+        workers: List[cProfile.Profile] = []
+        token = _worker_profiles.set(workers)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active in this process
+            profile = None
+
+        started_at = datetime.now(timezone.utc).isoformat()
+        started = time.perf_counter()
+        error = None
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            if profile is not None:
+                profile.disable()
+            _worker_profiles.reset(token)
+            with self._lock:
+                self.invocations += 1
+                qualifies = self._qualifies(seconds)
+
+            if qualifies:
+                record = {
+                    'tool': tool,
+                    'startedAt': started_at,
+                    'seconds': round(seconds, 6),
+                    'arguments': sorted(kwargs),
+                    'hotFunctions': hot_functions(profile, self.top, workers) if profile is not None else None,
+                    'workerThreadsProfiled': len(workers),
+                }
+                if error:
+                    record['error'] = error
+                if before is not None:
+                    record['allocations'] = allocation_sites(before, tracemalloc.take_snapshot(), self.top)
+
+                with self._lock:
+                    entry = (seconds, next(self._sequence), record)
+                    if len(self._profiles) < self.max_profiles:
+                        heapq.heappush(self._profiles, entry)
+                    elif seconds > self._profiles[0][0]:
+                        heapq.heapreplace(self._profiles, entry)
+
+    def profiles(self, tool: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get the kept profiles, slowest first
+
+        Args:
+            tool: Only return profiles of this tool (optional)
+            limit: Maximum number of profiles to return (optional)
+        """
+        with self._lock:
+            records = [record for _, _, record in sorted(self._profiles, key=lambda entry: entry[0], reverse=True)]
+            invocations = self.invocations
+
+        if tool:
+            records = [record for record in records if record['tool'] == tool]
+        return {
+            'invocationsProfiled': invocations,
+            'kept': self.max_profiles,
+            'memory': self.memory,
+            'profiles': records[:limit] if limit else records
+        }
+
+    def clear(self):
+        """
+        Drop every kept profile
+        """
+        with self._lock:
+            self._profiles = []
@@ -2,18 +2,66 @@
 Read-only tools for AWS ECS MCP Server
 """
 
+import time
+from datetime import datetime
 from typing import List, Dict, Any, Optional, Callable
 
-def register_read_tools(mcp, get_ecs_client: Callable):
+from botocore.exceptions import ClientError
+
+from src.attribute_index import AttributeIndex
+from src.deployments import list_deployments, describe_deployments, deployment_statistics
+from src.fleet import fleet_overview
+from src.footprint import TaskDefinitionCache, load_services, resource_footprint
+from src.namespace_map import NamespaceMapCache
+from src.placement import load_container_instances, load_task_groups, simulate_placement, uses_task_groups
+from src.poller import StatePoller
+from src.startup_latency import collect_startup_timeline, startup_statistics
+from src.stopped_tasks import StoppedTaskAggregator, iter_stopped_tasks
+from src.tags import TagIndex, tags_to_dict
+from src.task_definitions import task_definition_hash, diff_task_definitions, parse_task_definition_arn
+from src.utils import paginate, chunked, run_concurrently
+
+def register_read_tools(mcp, get_ecs_client: Callable, poller: Optional[StatePoller] = None,
+                        attribute_index: Optional[AttributeIndex] = None):
     """
     Register all read-only ECS tools with the MCP server
     
     Args:
         mcp: The FastMCP server instance
         get_ecs_client: Function to get the ECS client
+        poller: Background state poller; get_changes_since is only registered when given (optional)
+        attribute_index: Attribute index shared with the write tools (optional)
     """
-    
-    @mcp.tool()
+    tag_index = TagIndex()
+    attribute_index = attribute_index or AttributeIndex()
+    namespace_maps = NamespaceMapCache()
+    task_definition_cache = TaskDefinitionCache()
+
+    @mcp.tool(group='tasks', prefix_names=True)
+    def analyze_stopped_tasks(cluster_arn: str, service_name: Optional[str] = None,
+                              family: Optional[str] = None, max_tasks: Optional[int] = None,
+                              top: int = 20) -> Dict[str, Any]:
+        """
+        Summarize why tasks stopped in a cluster
+        Pages through stopped tasks, describes them concurrently and groups them by stop code,
+        stopped reason, container exit code and task definition with example task ARNs
+
+        Args:
+            cluster_arn: ARN of the cluster
+            service_name: Only include tasks of this service (optional)
+            family: Only include tasks of this task definition family (optional)
+            max_tasks: Maximum number of stopped tasks to analyze (optional)
+            top: Number of groups to return for each dimension (default: 20)
+        """
+        client = get_ecs_client()
+        aggregator = StoppedTaskAggregator()
+
+        for task in iter_stopped_tasks(client, cluster_arn, service_name, family, max_tasks):
+            aggregator.add(task)
+
+        return aggregator.summary(top)
+
+    @mcp.tool(group='capacity', prefix_names=True)
     def describe_capacity_providers(capacity_provider_arns: List[str]) -> List[Dict[str, Any]]:
         """
         Get detailed information for the specified capacity providers
@@ -25,7 +73,7 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         response = client.describe_capacity_providers(capacityProviders=capacity_provider_arns)
         return response.get('capacityProviders', [])
 
-    @mcp.tool()
+    @mcp.tool(group='clusters', prefix_names=True)
     def describe_clusters(cluster_arns: List[str]) -> List[Dict[str, Any]]:
         """
         Get detailed information for multiple clusters at once
@@ -37,7 +85,7 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         response = client.describe_clusters(clusters=cluster_arns)
         return response.get('clusters', [])
 
-    @mcp.tool()
+    @mcp.tool(group='capacity', prefix_names=True)
     def describe_container_instances(cluster_arn: str, container_instance_arns: List[str]) -> List[Dict[str, Any]]:
         """
         Get detailed information for the specified container instances
@@ -53,7 +101,7 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         )
         return response.get('containerInstances', [])
 
-    @mcp.tool()
+    @mcp.tool(group='services', prefix_names=True)
     def describe_service(cluster_arn: str, service_arn: str) -> List[Dict[str, Any]]:
         """
         Get detailed information for a specific service
@@ -66,41 +114,45 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         response = client.describe_services(cluster=cluster_arn, services=[service_arn])
         return response.get('services', [])
 
-    @mcp.tool()
+    @mcp.tool(group='deployments', prefix_names=True)
     def describe_service_deployments(deployment_ids: List[str]) -> List[Dict[str, Any]]:
         """
         Get detailed information for service deployments
+        Any number of deployments can be given; they are described in concurrent chunks of 20
 
         Args:
-            deployment_ids: List of deployment IDs
+            deployment_ids: List of service deployment ARNs
         """
         client = get_ecs_client()
-        response = client.describe_service_deployments(deploymentIds=deployment_ids)
-        return response.get('deployments', [])
+        return describe_deployments(client, deployment_ids)
 
-    @mcp.tool()
+    @mcp.tool(group='deployments', prefix_names=True)
     def describe_service_revisions(cluster_arn: str, service_arn: str, revision_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Get detailed information about service revisions
+        Without revision_ids, the target revisions of the service's deployments are described
 
         Args:
             cluster_arn: ARN of the cluster
             service_arn: ARN of the service
-            revision_ids: List of revision IDs (optional)
+            revision_ids: List of service revision ARNs (optional)
         """
         client = get_ecs_client()
-        params = {
-            'cluster': cluster_arn,
-            'service': service_arn
-        }
-
-        if revision_ids:
-            params['revisionIds'] = revision_ids
-
-        response = client.describe_service_revisions(**params)
-        return response.get('revisions', [])
+        revision_arns = revision_ids
+        if not revision_arns:
+            deployments = paginate(client.list_service_deployments, 'serviceDeployments',
+                                   cluster=cluster_arn, service=service_arn)
+            revision_arns = list(dict.fromkeys(
+                d['targetServiceRevisionArn'] for d in deployments if d.get('targetServiceRevisionArn')
+            ))
+
+        batches = run_concurrently(
+            lambda batch: client.describe_service_revisions(serviceRevisionArns=batch).get('serviceRevisions', []),
+            list(chunked(revision_arns, 20))
+        )
+        return [revision for batch in batches for revision in batch]
 
-    @mcp.tool()
+    @mcp.tool(group='services', prefix_names=True)
     def describe_services(cluster_arn: str, service_arns: List[str]) -> List[Dict[str, Any]]:
         """
         Get detailed information for multiple services at once
@@ -113,7 +165,7 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         response = client.describe_services(cluster=cluster_arn, services=service_arns)
         return response.get('services', [])
 
-    @mcp.tool()
+    @mcp.tool(group='task_definitions', prefix_names=True)
     def describe_task_definition(task_definition: str, include: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Get detailed information about a task definition
@@ -138,7 +190,7 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         
         return result
 
-    @mcp.tool()
+    @mcp.tool(group='deployments', prefix_names=True)
     def describe_task_sets(cluster_arn: str, service_arn: str, task_sets: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Get detailed information for task sets within a specified service
@@ -160,7 +212,7 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         response = client.describe_task_sets(**params)
         return response.get('taskSets', [])
 
-    @mcp.tool()
+    @mcp.tool(group='tasks', prefix_names=True)
     def describe_tasks(cluster_arn: str, task_arns: List[str]) -> List[Dict[str, Any]]:
         """
         Get detailed information for the specified tasks
@@ -173,7 +225,68 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         response = client.describe_tasks(cluster=cluster_arn, tasks=task_arns)
         return response.get('tasks', [])
 
-    @mcp.tool()
+    @mcp.tool(group='task_definitions', prefix_names=True)
+    def diff_task_definition_revisions(family: str, revisions: Optional[List[int]] = None,
+                                       max_revisions: int = 10) -> Dict[str, Any]:
+        """
+        Compare revisions of a task definition family and report what changed between them
+        Revisions are fetched concurrently and identical revisions share the same hash
+
+        Args:
+            family: Task definition family name
+            revisions: Revision numbers to compare (optional, defaults to the latest revisions)
+            max_revisions: Number of latest revisions to compare when revisions is omitted (default: 10)
+        """
+        client = get_ecs_client()
+
+        if revisions:
+            revision_numbers = sorted(set(revisions))
+        else:
+            # familyPrefix also matches longer families, so page until enough revisions of this one
+            params = {'familyPrefix': family, 'sort': 'DESC'}
+            revision_numbers = []
+            while len(revision_numbers) < max_revisions:
+                response = client.list_task_definitions(**params)
+                for arn in response.get('taskDefinitionArns', []):
+                    name, revision = parse_task_definition_arn(arn)
+                    if name == family:
+                        revision_numbers.append(revision)
+                params['nextToken'] = response.get('nextToken')
+                if not params['nextToken']:
+                    break
+            revision_numbers = sorted(revision_numbers[:max_revisions])
+
+        definitions = run_concurrently(
+            lambda revision: client.describe_task_definition(
+                taskDefinition=f'{family}:{revision}'
+            ).get('taskDefinition', {}),
+            revision_numbers
+        )
+
+        result = {
+            'family': family,
+            'revisions': [
+                {
+                    'revision': definition.get('revision'),
+                    'taskDefinitionArn': definition.get('taskDefinitionArn'),
+                    'status': definition.get('status'),
+                    'hash': task_definition_hash(definition)
+                }
+                for definition in definitions
+            ],
+            'diffs': []
+        }
+
+        for old, new in zip(definitions, definitions[1:]):
+            result['diffs'].append({
+                'fromRevision': old.get('revision'),
+                'toRevision': new.get('revision'),
+                'changes': diff_task_definitions(old, new)
+            })
+
+        return result
+
+    @mcp.tool(group='admin', prefix_names=True)
     def discover_poll_endpoint(cluster_arn: Optional[str] = None,
                               container_instance: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -199,7 +312,82 @@ def register_read_tools(mcp, get_ecs_client: Callable):
             'serviceConnectEndpoint': response.get('serviceConnectEndpoint', '')
         }
 
-    @mcp.tool()
+    @mcp.tool(group='tags', prefix_names=True)
+    def find_resources_by_tags(tags: Dict[str, Optional[str]], cluster_arns: Optional[List[str]] = None,
+                               resource_types: Optional[List[str]] = None,
+                               refresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        Find clusters and services carrying all of the given tags
+        Tags are answered from an in-memory index that is loaded with describe calls
+        (include=['TAGS']) and reloaded when older than a few minutes
+
+        Args:
+            tags: Tag keys and values to match, e.g. {"team": "payments"}; a null value matches any value
+            cluster_arns: Only search these clusters (optional, defaults to all clusters)
+            resource_types: Only return these resource types, cluster and/or service (optional)
+            refresh: Reload the index from AWS before answering (default: False)
+        """
+        client = get_ecs_client()
+
+        if refresh or not tag_index.is_fresh('clusters'):
+            all_cluster_arns = paginate(client.list_clusters, 'clusterArns')
+            clusters = {}
+            for batch in chunked(all_cluster_arns, 100):
+                response = client.describe_clusters(clusters=batch, include=['TAGS'])
+                for cluster in response.get('clusters', []):
+                    clusters[cluster['clusterArn']] = tags_to_dict(cluster.get('tags'))
+            tag_index.replace_scope('clusters', clusters)
+
+        scoped_clusters = cluster_arns or sorted(tag_index.scope_members('clusters'))
+        stale_clusters = [arn for arn in scoped_clusters if refresh or not tag_index.is_fresh(arn)]
+
+        if stale_clusters and (not resource_types or 'service' in resource_types):
+            service_arns = run_concurrently(
+                lambda cluster_arn: paginate(client.list_services, 'serviceArns', cluster=cluster_arn),
+                stale_clusters
+            )
+            batches = [
+                (cluster_arn, batch)
+                for cluster_arn, arns in zip(stale_clusters, service_arns)
+                for batch in chunked(arns, 10)
+            ]
+            described = run_concurrently(
+                lambda item: client.describe_services(
+                    cluster=item[0], services=item[1], include=['TAGS']
+                ).get('services', []),
+                batches
+            )
+
+            services = {arn: {} for arn in stale_clusters}
+            for (cluster_arn, _), batch_services in zip(batches, described):
+                for service in batch_services:
+                    services[cluster_arn][service['serviceArn']] = tags_to_dict(service.get('tags'))
+            for cluster_arn, cluster_services in services.items():
+                tag_index.replace_scope(cluster_arn, cluster_services)
+
+        candidates = set(scoped_clusters)
+        for cluster_arn in scoped_clusters:
+            candidates |= tag_index.scope_members(cluster_arn)
+
+        return tag_index.query(tags, resource_types=resource_types, arns=candidates)
+
+    if poller:
+        @mcp.tool(group='clusters', prefix_names=True)
+        def get_changes_since(cursor: Optional[int] = None, cluster_arn: Optional[str] = None,
+                              limit: int = 500) -> Dict[str, Any]:
+            """
+            Get changes to services, tasks and container instances of the polled clusters
+            Call without a cursor to get the current cursor, then pass the returned cursor
+            on later calls to receive only what changed in between
+
+            Args:
+                cursor: Cursor returned by a previous call (optional)
+                cluster_arn: Only return changes of this polled cluster (optional)
+                limit: Maximum number of changes to return (default: 500)
+            """
+            return poller.changes_since(cursor, cluster_arn, limit)
+
+    @mcp.tool(group='capacity', prefix_names=True)
     def get_cluster_capacity_providers(cluster_arn: str) -> Dict[str, Any]:
         """
         Get capacity providers and default strategy associated with a cluster
@@ -208,10 +396,7 @@ def register_read_tools(mcp, get_ecs_client: Callable):
             cluster_arn: ARN of the cluster
         """
         client = get_ecs_client()
-        cluster_details = client.describe_clusters(
-            clusters=[cluster_arn],
-            include=['ATTACHMENTS', 'SETTINGS', 'CONFIGURATIONS', 'STATISTICS']
-        )
+        cluster_details = client.describe_clusters(clusters=[cluster_arn])
 
         clusters = cluster_details.get('clusters', [])
         if not clusters:
@@ -226,7 +411,120 @@ def register_read_tools(mcp, get_ecs_client: Callable):
             'defaultCapacityProviderStrategy': cluster.get('defaultCapacityProviderStrategy', [])
         }
 
-    @mcp.tool()
+    @mcp.tool(group='deployments', prefix_names=True)
+    def get_deployment_statistics(cluster_arn: str, service_arns: Optional[List[str]] = None,
+                                  created_after: Optional[str] = None,
+                                  include_details: bool = False) -> Dict[str, Any]:
+        """
+        Gather deployment history for services in a cluster and compute duration and failure statistics
+        Reports p50/p95/max deployment duration, status counts and failure (rollback) rate per service
+        and for the whole cluster, plus the slowest deployments
+
+        Args:
+            cluster_arn: ARN of the cluster
+            service_arns: List of service ARNs (optional, defaults to all services in the cluster)
+            created_after: Only include deployments created after this ISO 8601 timestamp (optional)
+            include_details: Describe every deployment to detect circuit breaker and rollback details (default: False)
+        """
+        client = get_ecs_client()
+
+        if not service_arns:
+            service_arns = paginate(client.list_services, 'serviceArns', cluster=cluster_arn)
+        after = datetime.fromisoformat(created_after) if created_after else None
+
+        per_service = run_concurrently(
+            lambda service_arn: list_deployments(client, cluster_arn, service_arn, after),
+            service_arns
+        )
+        deployments = [deployment for service_deployments in per_service for deployment in service_deployments]
+
+        if include_details and deployments:
+            deployments = describe_deployments(client, [d['serviceDeploymentArn'] for d in deployments])
+
+        return deployment_statistics(deployments)
+
+    @mcp.tool(group='clusters', prefix_names=True)
+    def get_fleet_overview(cluster_arns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Get a compact table of running and pending tasks, active services, container instances
+        and capacity provider strategies for every cluster, with fleet totals
+        Describes clusters 100 at a time with statistics, so large fleets take only a few calls
+
+        Args:
+            cluster_arns: List of cluster ARNs (optional, defaults to all clusters)
+        """
+        client = get_ecs_client()
+        return fleet_overview(client, cluster_arns)
+
+    @mcp.tool(group='services', prefix_names=True)
+    def get_resource_footprint(cluster_arns: Optional[List[str]] = None,
+                               fargate_prices: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        Compute the CPU and memory reserved by every service, totalled per service, cluster and capacity provider
+        Combines desired and running counts of every deployment with task and container level
+        reservations from cached task definitions; with Fargate prices also reports hourly and
+        monthly cost of the running Fargate and Fargate Spot tasks
+
+        Args:
+            cluster_arns: List of cluster ARNs (optional, defaults to all clusters)
+            fargate_prices: Prices per hour with keys vcpu_hour and gb_hour, optionally spot_vcpu_hour and spot_gb_hour (optional)
+        """
+        client = get_ecs_client()
+
+        if not cluster_arns:
+            cluster_arns = paginate(client.list_clusters, 'clusterArns')
+        per_cluster = run_concurrently(lambda cluster_arn: load_services(client, cluster_arn), cluster_arns)
+        services = [service for cluster_services in per_cluster for service in cluster_services]
+
+        arns = [
+            deployment['taskDefinition']
+            for service in services for deployment in service.get('deployments') or [service]
+            if deployment.get('taskDefinition')
+        ]
+        task_definitions = task_definition_cache.get_many(client, arns)
+        return resource_footprint(services, task_definitions, fargate_prices)
+
+    @mcp.tool(group='services', prefix_names=True)
+    def get_namespace_map(namespace: str, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get a compact map of the services in a Service Connect namespace
+        Lists every service in the namespace, describes them concurrently across their clusters and
+        returns their endpoints and deployment health. Results are cached and later calls only
+        describe services that are new, still deploying or older than a few minutes
+
+        Args:
+            namespace: Name or ARN of the namespace
+            refresh: Describe every service again instead of using cached results (default: False)
+        """
+        client = get_ecs_client()
+        return namespace_maps.get(client, namespace, force=refresh)
+
+    @mcp.tool(group='tasks', prefix_names=True)
+    def get_startup_latency(cluster_arn: str, service_arns: Optional[List[str]] = None,
+                            include_stopped: bool = False,
+                            max_tasks_per_service: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Compute task startup latency percentiles for services in a cluster
+        Splits startup into provisioning (created to pull start), image pull, container start and
+        total time and reports p50/p90/p99/max overall and per task definition, availability zone
+        and capacity provider, slowest groups first
+
+        Args:
+            cluster_arn: ARN of the cluster
+            service_arns: List of service ARNs (optional, defaults to all tasks in the cluster)
+            include_stopped: Also include recently stopped tasks (default: False)
+            max_tasks_per_service: Maximum number of tasks per service and status (optional)
+        """
+        client = get_ecs_client()
+        timeline, failures = collect_startup_timeline(
+            client, cluster_arn, service_arns, include_stopped, max_tasks_per_service
+        )
+        result = startup_statistics(timeline)
+        if failures:
+            result['failures'] = failures
+        return result
+
+    @mcp.tool(group='tasks', prefix_names=True)
     def get_task_protection(cluster_arn: str, task_arns: List[str]) -> List[Dict[str, Any]]:
         """
         Get protection settings for the specified tasks
@@ -239,7 +537,7 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         response = client.get_task_protection(cluster=cluster_arn, tasks=task_arns)
         return response.get('protectedTasks', [])
 
-    @mcp.tool()
+    @mcp.tool(group='admin', prefix_names=True)
     def list_account_settings(effective_settings: bool = True, principal_arn: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         List account settings for the AWS account
@@ -257,43 +555,40 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         response = client.list_account_settings(**params)
         return response.get('settings', [])
 
-    @mcp.tool()
-    def list_attributes(cluster_arn: Optional[str] = None, target_type: Optional[str] = None,
+    @mcp.tool(group='capacity', prefix_names=True)
+    def list_attributes(cluster_arn: Optional[str] = None, target_type: str = 'container-instance',
                        attribute_name: Optional[str] = None, attribute_value: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        List attributes of ECS resources
+        List attributes of ECS resources, following pagination
 
         Args:
             cluster_arn: ARN of the cluster (optional)
-            target_type: Target type of the attribute (e.g., container-instance) (optional)
+            target_type: Target type of the attribute (default: container-instance)
             attribute_name: Filter by attribute name (optional)
-            attribute_value: Filter by attribute value (optional)
+            attribute_value: Filter by attribute value, requires attribute_name (optional)
         """
         client = get_ecs_client()
-        params = {}
+        params = {'targetType': target_type}
 
         if cluster_arn:
             params['cluster'] = cluster_arn
-        if target_type:
-            params['targetType'] = target_type
         if attribute_name:
             params['attributeName'] = attribute_name
         if attribute_value:
             params['attributeValue'] = attribute_value
 
-        response = client.list_attributes(**params)
-        return response.get('attributes', [])
+        return paginate(client.list_attributes, 'attributes', **params)
 
-    @mcp.tool()
+    @mcp.tool(group='capacity', prefix_names=True)
     def list_capacity_providers() -> List[str]:
         """
         Get a list of available capacity providers
         """
         client = get_ecs_client()
-        response = client.list_capacity_providers()
-        return response.get('capacityProviderArns', [])
+        providers = paginate(client.describe_capacity_providers, 'capacityProviders')
+        return [provider['capacityProviderArn'] for provider in providers]
 
-    @mcp.tool()
+    @mcp.tool(group='clusters', prefix_names=True)
     def list_clusters() -> List[str]:
         """
         Get a list of available ECS clusters
@@ -302,7 +597,7 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         response = client.list_clusters()
         return response.get('clusterArns', [])
 
-    @mcp.tool()
+    @mcp.tool(group='capacity', prefix_names=True)
     def list_container_instances(cluster_arn: str) -> List[str]:
         """
         List container instances within a specified cluster
@@ -314,25 +609,20 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         response = client.list_container_instances(cluster=cluster_arn)
         return response.get('containerInstanceArns', [])
 
-    @mcp.tool()
+    @mcp.tool(group='deployments', prefix_names=True)
     def list_service_deployments(service_arn: str, max_results: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        List deployments for a service
+        List deployments for a service, following pagination
 
         Args:
             service_arn: ARN of the service
             max_results: Maximum number of results to return (optional)
         """
         client = get_ecs_client()
-        params = {'service': service_arn}
+        return paginate(client.list_service_deployments, 'serviceDeployments',
+                        limit=max_results, service=service_arn)
 
-        if max_results:
-            params['maxResults'] = max_results
-
-        response = client.list_service_deployments(**params)
-        return response.get('deploymentIds', [])
-
-    @mcp.tool()
+    @mcp.tool(group='services', prefix_names=True)
     def list_services(cluster_arn: str) -> List[str]:
         """
         List services within a specified cluster
@@ -344,25 +634,20 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         response = client.list_services(cluster=cluster_arn)
         return response.get('serviceArns', [])
 
-    @mcp.tool()
+    @mcp.tool(group='services', prefix_names=True)
     def list_services_by_namespace(namespace: str, max_results: Optional[int] = None) -> List[str]:
         """
-        List services associated with the specified namespace
+        List services associated with the specified namespace, following pagination
 
         Args:
             namespace: Name or ARN of the namespace
             max_results: Maximum number of results to return (optional)
         """
         client = get_ecs_client()
-        params = {'namespace': namespace}
+        return paginate(client.list_services_by_namespace, 'serviceArns',
+                        limit=max_results, namespace=namespace)
 
-        if max_results:
-            params['maxResults'] = max_results
-
-        response = client.list_services_by_namespace(**params)
-        return response.get('serviceArns', [])
-
-    @mcp.tool()
+    @mcp.tool(group='services', prefix_names=True)
     def list_services_with_details(cluster_arn: str) -> List[Dict[str, Any]]:
         """
         List services in a cluster and get detailed information for each service
@@ -400,7 +685,7 @@ def register_read_tools(mcp, get_ecs_client: Callable):
 
         return all_services
 
-    @mcp.tool()
+    @mcp.tool(group='tags', prefix_names=True)
     def list_tags_for_resource(resource_arn: str) -> Dict[str, str]:
         """
         List tags associated with the specified resource
@@ -416,7 +701,40 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         tags_dict = {tag['key']: tag['value'] for tag in tags_list}
         return tags_dict
 
-    @mcp.tool()
+    @mcp.tool(group='tags', prefix_names=True)
+    def list_tags_for_resources(resource_arns: List[str]) -> Dict[str, Any]:
+        """
+        List tags for multiple resources at once
+        Tags are fetched concurrently; resources already in the tag index used by
+        find_resources_by_tags get their indexed tags updated
+
+        Args:
+            resource_arns: List of resource ARNs to get tags for
+        """
+        client = get_ecs_client()
+
+        def fetch(resource_arn):
+            try:
+                response = client.list_tags_for_resource(resourceArn=resource_arn)
+            except ClientError as e:
+                return resource_arn, None, str(e)
+            return resource_arn, tags_to_dict(response.get('tags', [])), None
+
+        tags = {}
+        failures = []
+        for resource_arn, resource_tags, error in run_concurrently(fetch, resource_arns):
+            if error:
+                failures.append({'arn': resource_arn, 'reason': error})
+            else:
+                tags[resource_arn] = resource_tags
+                tag_index.update_tags(resource_arn, resource_tags)
+
+        return {
+            'tags': tags,
+            'failures': failures
+        }
+
+    @mcp.tool(group='task_definitions', prefix_names=True)
     def list_task_definition_families(family_prefix: Optional[str] = None, status: str = "ACTIVE") -> List[str]:
         """
         List task definition families
@@ -434,7 +752,7 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         response = client.list_task_definition_families(**params)
         return response.get('families', [])
 
-    @mcp.tool()
+    @mcp.tool(group='task_definitions', prefix_names=True)
     def list_task_definitions() -> List[str]:
         """
         Get a list of registered task definitions
@@ -443,21 +761,94 @@ def register_read_tools(mcp, get_ecs_client: Callable):
         response = client.list_task_definitions()
         return response.get('taskDefinitionArns', [])
 
-    @mcp.tool()
-    def list_tasks(cluster_arn: str, service_arn: Optional[str] = None) -> List[str]:
+    @mcp.tool(group='tasks', prefix_names=True)
+    def list_tasks(cluster_arn: str, service_arn: Optional[str] = None,
+                   desired_status: Optional[str] = None) -> List[str]:
         """
         List tasks within a specified cluster
-        Optional filtering by service is available
+        Optional filtering by service and desired status is available
 
         Args:
             cluster_arn: ARN of the cluster
             service_arn: ARN of the service (optional)
+            desired_status: Task desired status, either RUNNING, PENDING or STOPPED (optional, default: RUNNING)
         """
         client = get_ecs_client()
         params = {'cluster': cluster_arn}
 
         if service_arn:
             params['serviceName'] = service_arn
+        if desired_status:
+            params['desiredStatus'] = desired_status
 
         response = client.list_tasks(**params)
         return response.get('taskArns', [])
+
+    @mcp.tool(group='capacity', prefix_names=True)
+    def query_container_instances(cluster_arn: str, expression: Optional[str] = None,
+                                  attribute_name: Optional[str] = None, attribute_value: Optional[str] = None,
+                                  refresh: bool = False) -> Dict[str, Any]:
+        """
+        Find container instances matching a cluster query expression or an attribute, from an in-memory index
+        The cluster's attributes are loaded once with full pagination and refreshed incrementally;
+        use it to check which instances a memberOf placement constraint would allow
+
+        Args:
+            cluster_arn: ARN of the cluster
+            expression: Cluster query language expression, e.g. "attribute:ecs.instance-type =~ t3.* and runningTasksCount < 10" (optional)
+            attribute_name: Attribute to look up instead of an expression; without attribute_value, the instance count per value is returned as well (optional)
+            attribute_value: Value of attribute_name to match (optional)
+            refresh: Reload every attribute of the cluster first (default: False)
+        """
+        if not expression and not attribute_name:
+            raise ValueError("Either expression or attribute_name is required")
+
+        client = get_ecs_client()
+        refreshed = attribute_index.refresh(client, cluster_arn, force=refresh)
+
+        if expression:
+            matching = attribute_index.query(client, cluster_arn, expression)
+        else:
+            matching = attribute_index.find(cluster_arn, attribute_name, attribute_value)
+
+        result = {
+            'containerInstanceArns': matching,
+            'count': len(matching),
+            'index': dict(attribute_index.stats(cluster_arn), **refreshed)
+        }
+        if attribute_name and not attribute_value:
+            result['values'] = attribute_index.values(cluster_arn, attribute_name)
+        return result
+
+    @mcp.tool(group='capacity', prefix_names=True)
+    def simulate_task_placement(cluster_arn: str, task_definition: str, count: int,
+                                placement_strategy: Optional[List[Dict[str, str]]] = None,
+                                placement_constraints: Optional[List[Dict[str, str]]] = None,
+                                seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Predict whether tasks would place on the cluster's container instances, without launching anything
+        Simulates the scheduler against the instances' current remaining CPU, memory and ports and
+        returns the number of tasks placed, failure reasons and the resulting distribution
+
+        Args:
+            cluster_arn: ARN of the cluster
+            task_definition: The family and revision (family:revision) or full ARN of the task definition
+            count: Number of tasks to place
+            placement_strategy: Strategies such as [{"type": "binpack", "field": "memory"}], types binpack, spread and random (optional, defaults to spreading over zones and instances)
+            placement_constraints: Constraints such as [{"type": "memberOf", "expression": "attribute:ecs.instance-type == t3.large"}] or [{"type": "distinctInstance"}] (optional)
+            seed: Seed for the random strategy (optional)
+        """
+        client = get_ecs_client()
+        loads = [
+            lambda: client.describe_task_definition(taskDefinition=task_definition)['taskDefinition'],
+            lambda: load_container_instances(client, cluster_arn)
+        ]
+        if uses_task_groups(placement_constraints):
+            loads.append(lambda: load_task_groups(client, cluster_arn))
+        definition, instances, *task_groups = run_concurrently(lambda load: load(), loads)
+
+        started = time.perf_counter()
+        result = simulate_placement(instances, definition, count, placement_strategy, placement_constraints, seed,
+                                    task_groups[0] if task_groups else None)
+        result['simulationMilliseconds'] = round((time.perf_counter() - started) * 1000, 3)
+        return result
@@ -0,0 +1,210 @@
+"""
+Resolution of short names and name prefixes to ECS ARNs
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from botocore.exceptions import ClientError
+
+from src.utils import paginate
+
+# Seconds after which an index is rebuilt on its next use
+DEFAULT_MAX_AGE = 300
+
+# Minimum seconds between rebuilds triggered by names that are not in an index
+DEFAULT_MISS_REFRESH_INTERVAL = 10
+
+# Number of candidates listed when a prefix is ambiguous
+MAX_CANDIDATES = 10
+
+# Tool arguments holding a cluster, services or a task definition
+CLUSTER_ARGUMENTS = ('cluster_arn', 'cluster')
+CLUSTER_LIST_ARGUMENTS = ('cluster_arns',)
+SERVICE_ARGUMENTS = ('service_arn', 'service')
+SERVICE_LIST_ARGUMENTS = ('service_arns', 'services')
+TASK_DEFINITION_ARGUMENTS = ('task_definition',)
+
+
+class PrefixIndex:
+    """
+    Sorted name index answering exact and prefix lookups with binary search
+    """
+
+    def __init__(self, entries: Dict[str, str]):
+        self._keys = sorted(entries)
+        self._values = [entries[key] for key in self._keys]
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, name: str) -> Optional[str]:
+        i = bisect_left(self._keys, name)
+        if i < len(self._keys) and self._keys[i] == name:
+            return self._values[i]
+        return None
+
+    def prefixed(self, prefix: str, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+        """(name, value) pairs of every name starting with prefix, in name order"""
+        matches = []
+        for i in range(bisect_left(self._keys, prefix), len(self._keys)):
+            if not self._keys[i].startswith(prefix) or (limit is not None and len(matches) >= limit):
+                break
+            matches.append((self._keys[i], self._values[i]))
+        return matches
+
+
+class ArnResolver:
+    """
+    Resolves cluster and service names and task definition family prefixes locally
+
+    Clusters, the services of each cluster and the active task definition families are
+    indexed lazily on first use. An index is rebuilt after max_age seconds, or earlier
+    when a name is not found (at most every miss_refresh_interval seconds). Values that
+    already are ARNs are returned unchanged, and names that still cannot be resolved
+    (or cannot be listed, e.g. without ListClusters permission) are passed through for
+    ECS to handle.
+
+    Unique prefixes are only expanded when asked for; write tools resolve exact names
+    only, so a short name can never select a different resource by prefix.
+    """
+
+    def __init__(self, get_ecs_client: Callable, max_age: float = DEFAULT_MAX_AGE,
+                 miss_refresh_interval: float = DEFAULT_MISS_REFRESH_INTERVAL):
+        self.get_ecs_client = get_ecs_client
+        self.max_age = max_age
+        self.miss_refresh_interval = miss_refresh_interval
+        self._lock = threading.Lock()
+        self._indexes: Dict[Tuple[str, str], PrefixIndex] = {}
+
+    def _load(self, kind: str, scope: str) -> PrefixIndex:
+        client = self.get_ecs_client()
+        if kind == 'cluster':
+            arns = paginate(client.list_clusters, 'clusterArns')
+            entries = {arn.split('/', 1)[-1]: arn for arn in arns}
+        elif kind == 'service':
+            arns = paginate(client.list_services, 'serviceArns', cluster=scope, maxResults=100)
+            entries = {arn.rsplit('/', 1)[-1]: arn for arn in arns}
+        else:
+            families = paginate(client.list_task_definition_families, 'families', status='ACTIVE')
+            entries = {family: family for family in families}
+        return PrefixIndex(entries)
+
+    def _index(self, kind: str, scope: str = '', miss: bool = False) -> PrefixIndex:
+        key = (kind, scope)
+        with self._lock:
+            index = self._indexes.get(key)
+        age = time.monotonic() - index.built_at if index is not None else None
+        if index is None or age >= self.max_age or (miss and age >= self.miss_refresh_interval):
+            index = self._load(kind, scope)
+            with self._lock:
+                self._indexes[key] = index
+        return index
+
+    def _resolve(self, kind: str, name: str, scope: str = '', prefixes: bool = True) -> str:
+        for miss in (False, True):
+            try:
+                index = self._index(kind, scope, miss)
+            except ClientError:
+                return name
+            exact = index.get(name)
+            if exact is not None:
+                return exact
+            if not prefixes:
+                continue
+            matches = index.prefixed(name, limit=MAX_CANDIDATES + 1)
+            if len(matches) == 1:
+                return matches[0][1]
+            if len(matches) > 1:
+                candidates = ', '.join(match[0] for match in matches[:MAX_CANDIDATES])
+                more = ', ...' if len(matches) > MAX_CANDIDATES else ''
+                raise ValueError(f"{kind.capitalize()} name '{name}' is ambiguous, matches: {candidates}{more}")
+        return name
+
+    def resolve_cluster(self, cluster: str, prefixes: bool = True) -> str:
+        """
+        ARN of a cluster given its ARN, name or a unique name prefix
+
+        Args:
+            cluster: Cluster ARN, name or name prefix
+            prefixes: Also accept unique name prefixes
+        """
+        if cluster.startswith('arn:'):
+            return cluster
+        return self._resolve('cluster', cluster, prefixes=prefixes)
+
+    def resolve_service(self, cluster: Optional[str], service: str, prefixes: bool = True) -> str:
+        """
+        ARN of a service given its ARN, name or a unique name prefix within its cluster
+
+        Args:
+            cluster: Cluster ARN or name (optional, defaults to the default cluster)
+            service: Service ARN, name or name prefix
+            prefixes: Also accept unique name prefixes
+        """
+        if service.startswith('arn:'):
+            return service
+        return self._resolve('service', service, self.resolve_cluster(cluster or 'default', prefixes), prefixes)
+
+    def resolve_task_definition(self, task_definition: str, prefixes: bool = True) -> str:
+        """
+        Task definition family given a unique family prefix; ARNs and family:revision are unchanged
+
+        Args:
+            task_definition: Task definition ARN, family:revision, family or family prefix
+            prefixes: Also accept unique family prefixes
+        """
+        if task_definition.startswith('arn:') or ':' in task_definition:
+            return task_definition
+        return self._resolve('task definition', task_definition, prefixes=prefixes)
+
+    def resolve_arguments(self, arguments: Dict[str, Any], prefixes: bool = True) -> Dict[str, Any]:
+        """
+        Resolve the cluster, service and task definition arguments of a tool call
+
+        Args:
+            arguments: Tool arguments by name
+            prefixes: Also accept unique name prefixes (only exact names otherwise)
+        """
+        arguments = dict(arguments)
+        cluster = None
+        for name in CLUSTER_ARGUMENTS:
+            if isinstance(arguments.get(name), str):
+                arguments[name] = cluster = self.resolve_cluster(arguments[name], prefixes)
+        for name in CLUSTER_LIST_ARGUMENTS:
+            if isinstance(arguments.get(name), list):
+                arguments[name] = [self.resolve_cluster(c, prefixes) for c in arguments[name]]
+        for name in SERVICE_ARGUMENTS:
+            if isinstance(arguments.get(name), str):
+                arguments[name] = self.resolve_service(cluster, arguments[name], prefixes)
+        for name in SERVICE_LIST_ARGUMENTS:
+            if isinstance(arguments.get(name), list):
+                arguments[name] = [self.resolve_service(cluster, s, prefixes) for s in arguments[name]]
+        for name in TASK_DEFINITION_ARGUMENTS:
+            if isinstance(arguments.get(name), str):
+                arguments[name] = self.resolve_task_definition(arguments[name], prefixes)
+        return arguments
+
+    def search(self, prefix: str, resource_type: str = 'service', cluster: Optional[str] = None,
+               limit: int = 50) -> List[Dict[str, str]]:
+        """
+        Names and ARNs starting with a prefix
+
+        Args:
+            prefix: Name prefix (empty lists everything up to limit)
+            resource_type: cluster, service or task_definition_family
+            cluster: Cluster of the services (optional, defaults to the default cluster)
+            limit: Maximum number of matches
+        """
+        if resource_type == 'cluster':
+            index = self._index('cluster')
+        elif resource_type == 'service':
+            index = self._index('service', self.resolve_cluster(cluster or 'default'))
+        elif resource_type == 'task_definition_family':
+            index = self._index('task definition')
+        else:
+            raise ValueError(f"Unknown resource type: {resource_type}")
+        return [{'name': name, 'arn': value} for name, value in index.prefixed(prefix, limit)]
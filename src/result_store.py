@@ -0,0 +1,165 @@
+"""
+Bounded, expiring server-side store for paging oversized tool results
+"""
+
+import json
+import threading
+import time
+import typing
+import uuid
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+# Tool results larger than this many bytes of JSON are split into pages
+DEFAULT_MAX_RESULT_BYTES = 100_000
+
+# Seconds a stored result stays available
+DEFAULT_TTL = 600
+
+# Upper bounds for everything kept in the store
+DEFAULT_MAX_ENTRIES = 100
+DEFAULT_MAX_STORE_BYTES = 64 * 1024 * 1024
+
+
+def _json_size(value: Any) -> int:
+    return len(json.dumps(value, default=str, separators=(',', ':')))
+
+
+def _pages(items: List[Any], max_bytes: int, max_total: int) -> Tuple[List[List[Any]], int]:
+    """
+    Greedily pack items into pages of at most max_bytes of JSON (at least one item per page)
+
+    Packing stops before the pages exceed max_total bytes, so a result larger than the
+    whole store is cut short instead of being stored and evicted right away.
+    """
+    pages, page, page_bytes, total = [], [], 0, 0
+    for item in items:
+        size = _json_size(item) + 1
+        if total + size > max_total and (pages or page):
+            break
+        total += size
+        if page and page_bytes + size > max_bytes:
+            pages.append(page)
+            page, page_bytes = [], 0
+        page.append(item)
+        page_bytes += size
+    if page:
+        pages.append(page)
+    return pages, total
+
+
+def paged_annotation(annotation: Any) -> Any:
+    """
+    Return annotation of a tool whose results may be paged
+
+    Paged list results are returned as an object with items and resultPaging, so list
+    annotations become a union with that object; other annotations are kept.
+
+    Args:
+        annotation: Declared return annotation of the tool
+    """
+    if annotation is list or typing.get_origin(annotation) is list:
+        return Union[annotation, Dict[str, Any]]
+    return annotation
+
+
+class ResultStore:
+    """
+    Keeps the pages of oversized results so later pages can be fetched without re-querying
+
+    Entries expire after ttl seconds; the oldest entries are evicted once the store
+    holds more than max_entries results or max_store_bytes of JSON.
+    """
+
+    def __init__(self, max_result_bytes: int = DEFAULT_MAX_RESULT_BYTES, ttl: float = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, max_store_bytes: int = DEFAULT_MAX_STORE_BYTES):
+        self.max_result_bytes = max_result_bytes
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_store_bytes = max_store_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+
+    def _evict(self, now: float):
+        for handle in [h for h, entry in self._entries.items() if entry['expires'] <= now]:
+            self._bytes -= self._entries.pop(handle)['bytes']
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_store_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry['bytes']
+
+    def _paging(self, handle: str, entry: Dict[str, Any], page: int) -> Dict[str, Any]:
+        paging = {
+            'handle': handle,
+            'page': page,
+            'pages': len(entry['pages']),
+            'totalItems': entry['total'],
+            'expiresInSeconds': max(0, int(entry['expires'] - time.monotonic()))
+        }
+        if entry['field']:
+            paging['field'] = entry['field']
+        if entry['stored'] < entry['total']:
+            paging['truncated'] = True
+            paging['storedItems'] = entry['stored']
+        return paging
+
+    def spill(self, result: Any) -> Any:
+        """
+        Return the result unchanged when it is small, otherwise store it and return the first page
+
+        Lists are paged as an object with the first page under items (see paged_annotation).
+        For dicts the list value with the most bytes of JSON is paged and the other keys are
+        returned with the first page. Paging details are returned under resultPaging; when
+        the result does not fit in max_store_bytes, only the leading items that do are kept
+        and resultPaging has truncated set.
+
+        Args:
+            result: Tool result
+        """
+        if not self.max_result_bytes or not isinstance(result, (list, dict)):
+            return result
+        if _json_size(result) <= self.max_result_bytes:
+            return result
+
+        field = None
+        items = result
+        if isinstance(result, dict):
+            lists = [(k, v) for k, v in result.items() if isinstance(v, list)]
+            if not lists:
+                return result
+            field, items = max(lists, key=lambda kv: _json_size(kv[1]))
+
+        pages, size = _pages(items, self.max_result_bytes, self.max_store_bytes)
+        if len(pages) <= 1 and sum(map(len, pages)) == len(items):
+            return result
+
+        handle = uuid.uuid4().hex
+        now = time.monotonic()
+        entry = {'pages': pages, 'total': len(items), 'stored': sum(map(len, pages)), 'field': field,
+                 'bytes': size, 'expires': now + self.ttl}
+        with self._lock:
+            self._entries[handle] = entry
+            self._bytes += size
+            self._evict(now)
+            paging = self._paging(handle, entry, 0)
+
+        if field:
+            return dict(result, **{field: pages[0], 'resultPaging': paging})
+        return {'items': pages[0], 'resultPaging': paging}
+
+    def page(self, handle: str, page: int) -> Optional[Dict[str, Any]]:
+        """
+        Get one page of a stored result, or None when the handle is unknown or expired
+
+        Args:
+            handle: Handle returned in resultPaging
+            page: Zero-based page number
+        """
+        with self._lock:
+            self._evict(time.monotonic())
+            entry = self._entries.get(handle)
+            if entry is None:
+                return None
+            if not 0 <= page < len(entry['pages']):
+                raise ValueError(f"Page {page} out of range, result has {len(entry['pages'])} pages")
+            return {'items': entry['pages'][page], 'resultPaging': self._paging(handle, entry, page)}
@@ -0,0 +1,208 @@
+"""
+Bulk cleanup of stale task definition revisions with retention policies
+"""
+
+from typing import List, Dict, Any, Optional, Callable, Set
+
+from botocore.exceptions import ClientError
+
+from src.task_definitions import parse_task_definition_arn
+from src.utils import RateLimiter, describe_services_batched, paginate, chunked, run_concurrently
+
+# Maximum number of task definitions per DeleteTaskDefinitions call
+DELETE_BATCH_SIZE = 10
+
+# Number of write calls between progress reports
+PROGRESS_INTERVAL = 50
+
+# Deployment controllers whose services deploy through task sets
+TASK_SET_CONTROLLERS = ('EXTERNAL', 'CODE_DEPLOY')
+
+
+def list_revisions(client, status: str, family_prefix: Optional[str] = None,
+                   families: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    """
+    Task definition ARNs with a status grouped by family, newest revision first
+
+    Without explicit families a single paginated sweep covers every family (matching
+    the prefix), which takes one call per 100 revisions instead of one per family.
+
+    Args:
+        client: ECS client
+        status: ACTIVE or INACTIVE
+        family_prefix: Only include families starting with this prefix (optional)
+        families: Only include these families (optional)
+    """
+    if families:
+        sweeps = run_concurrently(
+            lambda family: paginate(client.list_task_definitions, 'taskDefinitionArns',
+                                    familyPrefix=family, status=status, maxResults=100),
+            families
+        )
+        arns = [arn for sweep in sweeps for arn in sweep]
+    else:
+        params = {'familyPrefix': family_prefix} if family_prefix else {}
+        arns = paginate(client.list_task_definitions, 'taskDefinitionArns', status=status, maxResults=100, **params)
+
+    wanted = set(families) if families else None
+    grouped: Dict[str, List[str]] = {}
+    for arn in dict.fromkeys(arns):
+        family, _ = parse_task_definition_arn(arn)
+        if wanted is None or family in wanted:
+            grouped.setdefault(family, []).append(arn)
+    for revisions in grouped.values():
+        revisions.sort(key=lambda arn: parse_task_definition_arn(arn)[1], reverse=True)
+    return grouped
+
+
+def referenced_task_definitions(client, cluster_arns: Optional[List[str]] = None) -> Set[str]:
+    """
+    Task definition ARNs used by any service deployment or task set
+
+    Args:
+        client: ECS client
+        cluster_arns: Clusters to scan (optional, defaults to all clusters)
+    """
+    if not cluster_arns:
+        cluster_arns = paginate(client.list_clusters, 'clusterArns')
+
+    def scan(cluster_arn):
+        service_arns = paginate(client.list_services, 'serviceArns', cluster=cluster_arn, maxResults=100)
+        services = describe_services_batched(client, cluster_arn, service_arns)
+        referenced = set()
+        for service in services:
+            referenced.add(service.get('taskDefinition'))
+            referenced.update(d.get('taskDefinition') for d in service.get('deployments', []))
+            task_sets = service.get('taskSets')
+            if task_sets is None and service.get('deploymentController', {}).get('type') in TASK_SET_CONTROLLERS:
+                task_sets = client.describe_task_sets(cluster=cluster_arn, service=service['serviceArn']).get('taskSets', [])
+            referenced.update(t.get('taskDefinition') for t in task_sets or [])
+        return referenced
+
+    return set().union(*run_concurrently(scan, cluster_arns)) - {None}
+
+
+def plan_cleanup(active: Dict[str, List[str]], inactive: Dict[str, List[str]], referenced: Set[str],
+                 keep_last: int, delete: bool) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Revisions to keep, deregister and delete per family
+
+    The newest keep_last ACTIVE revisions and every referenced revision are kept. The
+    other ACTIVE revisions are deregistered, and with delete they are deleted afterwards
+    together with unreferenced INACTIVE revisions.
+
+    Args:
+        active: ACTIVE revision ARNs per family, newest first
+        inactive: INACTIVE revision ARNs per family
+        referenced: Revision ARNs used by services and task sets
+        keep_last: Number of newest ACTIVE revisions to keep per family
+        delete: Whether to delete deregistered revisions
+    """
+    plans = {}
+    for family in sorted(set(active) | set(inactive)):
+        revisions = active.get(family, [])
+        keep = revisions[:keep_last] + [arn for arn in revisions[keep_last:] if arn in referenced]
+        deregister = [arn for arn in revisions[keep_last:] if arn not in referenced]
+        remove = deregister + [arn for arn in inactive.get(family, []) if arn not in referenced] if delete else []
+        plans[family] = {'keep': keep, 'deregister': deregister, 'delete': remove}
+    return plans
+
+
+def _revisions(arns: List[str]) -> List[int]:
+    return sorted(parse_task_definition_arn(arn)[1] for arn in arns)
+
+
+def cleanup_revisions(client, keep_last: int = 5, family_prefix: Optional[str] = None,
+                      families: Optional[List[str]] = None, cluster_arns: Optional[List[str]] = None,
+                      delete: bool = False, dry_run: bool = True, max_concurrency: int = 5,
+                      calls_per_second: float = 5, progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """
+    Deregister and delete stale task definition revisions
+
+    Deregistrations run concurrently, deletions go out in concurrent batches of 10, and
+    both are additionally limited to calls_per_second (write APIs have lower throttling
+    limits than reads). A revision that fails to deregister is not deleted.
+
+    Args:
+        client: ECS client
+        keep_last: Number of newest ACTIVE revisions to keep per family
+        family_prefix: Only clean up families starting with this prefix (optional)
+        families: Only clean up these families (optional)
+        cluster_arns: Clusters whose services and task sets protect revisions (optional, defaults to all)
+        delete: Delete the deregistered and unreferenced INACTIVE revisions
+        dry_run: Only compute the plan
+        max_concurrency: Maximum number of concurrent write calls
+        calls_per_second: Maximum rate of write calls
+        progress: Called with the number of finished and total write calls (optional)
+    """
+    if keep_last < 1:
+        raise ValueError("keep_last must be at least 1")
+
+    active = list_revisions(client, 'ACTIVE', family_prefix, families)
+    inactive = list_revisions(client, 'INACTIVE', family_prefix, families) if delete else {}
+    referenced = referenced_task_definitions(client, cluster_arns)
+    plans = plan_cleanup(active, inactive, referenced, keep_last, delete)
+
+    deregister = [arn for plan in plans.values() for arn in plan['deregister']]
+    remove = [arn for plan in plans.values() for arn in plan['delete']]
+    result = {
+        'families': len(plans),
+        'revisionsScanned': sum(len(r) for r in active.values()) + sum(len(r) for r in inactive.values()),
+        'kept': sum(len(plan['keep']) for plan in plans.values()),
+        'toDeregister': len(deregister),
+        'toDelete': len(remove),
+    }
+    if dry_run:
+        result['dryRun'] = True
+        result['byFamily'] = {
+            family: {action: _revisions(arns) for action, arns in plan.items()}
+            for family, plan in plans.items() if plan['deregister'] or plan['delete']
+        }
+        return result
+
+    limiter = RateLimiter(rate=calls_per_second, burst=max_concurrency)
+
+    def deregister_one(arn):
+        limiter.acquire()
+        try:
+            client.deregister_task_definition(taskDefinition=arn)
+            return None
+        except ClientError as e:
+            return {'arn': arn, 'action': 'deregister', 'reason': str(e)}
+
+    def delete_batch(batch):
+        limiter.acquire()
+        try:
+            response = client.delete_task_definitions(taskDefinitions=batch)
+            return len(response.get('taskDefinitions', [])), [
+                {'arn': f.get('arn'), 'action': 'delete', 'reason': f.get('reason')}
+                for f in response.get('failures', [])
+            ]
+        except ClientError as e:
+            return 0, [{'arn': arn, 'action': 'delete', 'reason': str(e)} for arn in batch]
+
+    # Calls go out in rounds so progress is reported from the calling thread
+    failed = []
+    total = len(deregister) + -(-len(remove) // DELETE_BATCH_SIZE)
+    for done, arns in enumerate(chunked(deregister, PROGRESS_INTERVAL), 1):
+        failed.extend(f for f in run_concurrently(deregister_one, arns, max_workers=max_concurrency) if f)
+        if progress:
+            progress(min(done * PROGRESS_INTERVAL, len(deregister)), total)
+
+    failed_arns = {f['arn'] for f in failed}
+    remove = [arn for arn in remove if arn not in failed_arns]
+    batches = list(chunked(remove, DELETE_BATCH_SIZE))
+    total = len(deregister) + len(batches)
+
+    deleted, failures = 0, list(failed)
+    for done, round_batches in enumerate(chunked(batches, PROGRESS_INTERVAL), 1):
+        for count, batch_failures in run_concurrently(delete_batch, round_batches, max_workers=max_concurrency):
+            deleted += count
+            failures.extend(batch_failures)
+        if progress:
+            progress(len(deregister) + min(done * PROGRESS_INTERVAL, len(batches)), total)
+
+    result.update({'deregistered': len(deregister) - len(failed), 'deleted': deleted})
+    if failures:
+        result['failures'] = failures
+    return result
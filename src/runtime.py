@@ -0,0 +1,447 @@
+"""
+Shared runtime for the AWS ECS MCP Server entry points
+
+Provides the process-wide ECS client (one connection pool and one rate limiter
+shared by every tool and every connected client), a FastMCP server that runs the
+synchronous tools in worker threads and only registers the enabled tool groups,
+and command line handling for transport selection.
+"""
+
+import argparse
+import functools
+import inspect
+import os
+import threading
+from typing import TYPE_CHECKING, List, Dict, Any, Callable, Optional
+
+import anyio
+import boto3
+from botocore.config import Config
+from mcp.server.fastmcp import Context, FastMCP
+
+from src.cancellation import CancelScope, DeadlineExceeded, check_cancelled, run_in_scope
+from src.poller import DEFAULT_POLL_INTERVAL
+from src.profiling import DEFAULT_MAX_PROFILES
+from src.resolver import ArnResolver
+from src.result_store import DEFAULT_MAX_RESULT_BYTES, ResultStore, paged_annotation
+from src.snapshot import DEFAULT_SNAPSHOT_DIR
+from src.utils import DEFAULT_BURST, DEFAULT_MAX_CALLS_PER_SECOND, RateLimiter
+
+if TYPE_CHECKING:
+    from src.profiling import ToolProfiler
+
+# Maximum number of HTTP connections kept open to the ECS endpoint
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+
+# Maximum number of tool invocations running at the same time
+DEFAULT_TOOL_WORKERS = 40
+
+# Seconds a tool invocation may run before it is stopped at its next AWS call
+DEFAULT_TOOL_TIMEOUT = 300
+
+# Connect and read timeout of a single ECS API call in seconds
+DEFAULT_CALL_TIMEOUT = 20
+
+TRANSPORTS = ['stdio', 'sse', 'streamable-http']
+
+# Tool groups that can be enabled individually to keep tools/list small
+TOOL_GROUPS = [
+    'clusters', 'services', 'tasks', 'task_definitions',
+    'capacity', 'deployments', 'tags', 'admin'
+]
+
+
+def parse_tool_groups(value: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma separated list of tool groups; empty or "all" enables every group
+
+    Args:
+        value: Comma separated group names
+    """
+    if not value or value.strip() == 'all':
+        return None
+
+    groups = [group.strip() for group in value.split(',') if group.strip()]
+    unknown = sorted(set(groups) - set(TOOL_GROUPS))
+    if unknown:
+        raise ValueError(f"Unknown tool groups: {', '.join(unknown)} (available: {', '.join(TOOL_GROUPS)})")
+    return groups
+
+
+def parse_tool_timeouts(value: Optional[str]) -> Dict[str, float]:
+    """
+    Parse per-tool deadlines given as comma separated tool=seconds pairs
+
+    Args:
+        value: e.g. "list_services_with_details=60,bulk_update_services=3600"
+    """
+    timeouts = {}
+    for pair in (value or '').split(','):
+        if not pair.strip():
+            continue
+        tool, _, seconds = pair.partition('=')
+        try:
+            timeouts[tool.strip()] = float(seconds)
+        except ValueError:
+            raise ValueError(f"Invalid tool timeout: {pair.strip()} (expected tool=seconds)")
+    return timeouts
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+def parse_server_args(description: str) -> argparse.Namespace:
+    """
+    Parse the server command line, falling back to environment variables
+
+    Unknown arguments are ignored so the servers can still be started by tools
+    that pass their own arguments (e.g. mcp dev).
+
+    Args:
+        description: Description shown in --help
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--transport', choices=TRANSPORTS,
+                        default=os.environ.get('MCP_TRANSPORT', 'stdio'),
+                        help='Transport to serve (default: stdio, or MCP_TRANSPORT)')
+    parser.add_argument('--host', help='Host to bind for HTTP transports (default: FASTMCP_HOST or 0.0.0.0)')
+    parser.add_argument('--port', type=int, help='Port to bind for HTTP transports (default: FASTMCP_PORT or 8000)')
+    parser.add_argument('--tool-groups', default=os.environ.get('ECS_TOOL_GROUPS'),
+                        help=f"Comma separated tool groups to enable (default: all, or ECS_TOOL_GROUPS). "
+                             f"Available: {', '.join(TOOL_GROUPS)}")
+    parser.add_argument('--compact-descriptions', action='store_true',
+                        default=_env_flag('ECS_COMPACT_TOOL_DESCRIPTIONS'),
+                        help='Omit the Args section from tool descriptions (default: ECS_COMPACT_TOOL_DESCRIPTIONS)')
+    parser.add_argument('--poll-clusters', default=os.environ.get('ECS_POLL_CLUSTERS'),
+                        help='Comma separated clusters to poll in the background for get_changes_since '
+                             '(default: ECS_POLL_CLUSTERS, polling disabled when empty)')
+    parser.add_argument('--poll-interval', type=float,
+                        default=float(os.environ.get('ECS_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)),
+                        help=f'Base background polling interval in seconds (default: ECS_POLL_INTERVAL or {DEFAULT_POLL_INTERVAL})')
+    parser.add_argument('--fake-backend', default=os.environ.get('ECS_FAKE_BACKEND'),
+                        help='Serve from an in-process fake ECS backend instead of AWS, e.g. '
+                             '"clusters=2,services=500,tasks=50,latency=0.02" (default: ECS_FAKE_BACKEND)')
+    parser.add_argument('--snapshot', default=os.environ.get('ECS_SNAPSHOT'),
+                        help='Serve the read tools from a snapshot file written by capture_snapshot instead of AWS '
+                             '(default: ECS_SNAPSHOT)')
+    parser.add_argument('--snapshot-dir', default=os.environ.get('ECS_SNAPSHOT_DIR', DEFAULT_SNAPSHOT_DIR),
+                        help='Directory capture_snapshot writes snapshot files to '
+                             f'(default: ECS_SNAPSHOT_DIR or ./{DEFAULT_SNAPSHOT_DIR})')
+    parser.add_argument('--profile-tools', default=os.environ.get('ECS_PROFILE_TOOLS'),
+                        help='Profile invocations of these comma separated tools, or "all" '
+                             '(default: ECS_PROFILE_TOOLS, profiling disabled when empty)')
+    parser.add_argument('--profile-memory', action='store_true', default=_env_flag('ECS_PROFILE_MEMORY'),
+                        help='Also record allocation sites with tracemalloc when profiling (default: ECS_PROFILE_MEMORY)')
+    parser.add_argument('--profile-keep', type=int,
+                        default=int(os.environ.get('ECS_PROFILE_KEEP', DEFAULT_MAX_PROFILES)),
+                        help=f'Number of slowest profiles kept (default: ECS_PROFILE_KEEP or {DEFAULT_MAX_PROFILES})')
+    args, _ = parser.parse_known_args()
+
+    args.poll_clusters = [c.strip() for c in (args.poll_clusters or '').split(',') if c.strip()]
+
+    try:
+        args.tool_groups = parse_tool_groups(args.tool_groups)
+    except ValueError as e:
+        parser.error(str(e))
+
+    return args
+
+
+def create_profiler(args: argparse.Namespace) -> Optional['ToolProfiler']:
+    """
+    Create the tool profiler selected on the command line, or None when profiling is disabled
+
+    Args:
+        args: Parsed arguments from parse_server_args
+    """
+    if not args.profile_tools:
+        return None
+
+    from src.profiling import ToolProfiler
+
+    tools = None
+    if args.profile_tools.strip() != 'all':
+        tools = [tool.strip() for tool in args.profile_tools.split(',') if tool.strip()]
+    return ToolProfiler(tools=tools, memory=args.profile_memory, max_profiles=args.profile_keep)
+
+
+def create_ecs_client_factory(profile_name: Optional[str], region_name: str,
+                              rate_limiter: Optional[RateLimiter] = None,
+                              fake_backend: Optional[str] = None, snapshot: Optional[str] = None) -> Callable:
+    """
+    Create a get_ecs_client function that returns one shared, rate limited ECS client
+
+    boto3 clients are thread-safe, so a single client (and its connection pool) is
+    shared by every tool invocation instead of creating a session per call.
+
+    Args:
+        profile_name: AWS profile name (optional)
+        region_name: AWS region
+        rate_limiter: Rate limiter applied to every ECS API call (optional, created from
+            ECS_MAX_CALLS_PER_SECOND and ECS_MAX_CALLS_BURST when omitted)
+        fake_backend: Spec of an in-process fake ECS backend to use instead of AWS, see
+            src.fake_ecs.parse_fake_spec (optional)
+        snapshot: Snapshot file to answer read calls from instead of AWS (optional)
+    """
+    if rate_limiter is None:
+        rate_limiter = RateLimiter(
+            rate=float(os.environ.get('ECS_MAX_CALLS_PER_SECOND', DEFAULT_MAX_CALLS_PER_SECOND)),
+            burst=int(os.environ.get('ECS_MAX_CALLS_BURST', DEFAULT_BURST))
+        )
+
+    lock = threading.Lock()
+    clients = []
+
+    def get_ecs_client():
+        if clients:
+            return clients[0]
+
+        with lock:
+            if not clients:
+                # Offline backends are only imported when selected
+                if snapshot:
+                    from src.snapshot import create_snapshot_client
+                    client = create_snapshot_client(snapshot)
+                elif fake_backend:
+                    from src.fake_ecs import create_fake_client
+                    client = create_fake_client(fake_backend)
+                else:
+                    client = _create_aws_client(profile_name, region_name)
+                # Cancelled or expired invocations stop before their next call
+                client.meta.events.register('before-call.ecs', check_cancelled)
+                client.meta.events.register('before-call.ecs', lambda **kwargs: rate_limiter.acquire())
+                clients.append(client)
+
+        return clients[0]
+
+    return get_ecs_client
+
+
+def _create_aws_client(profile_name: Optional[str], region_name: str):
+    session = boto3.Session(
+        profile_name=profile_name,
+        region_name=region_name
+    )
+    call_timeout = float(os.environ.get('ECS_CALL_TIMEOUT', DEFAULT_CALL_TIMEOUT))
+    return session.client('ecs', config=Config(
+        max_pool_connections=DEFAULT_MAX_POOL_CONNECTIONS,
+        retries={'mode': 'standard', 'max_attempts': 5},
+        connect_timeout=call_timeout,
+        read_timeout=call_timeout
+    ))
+
+
+def progress_reporter(ctx: Optional[Context]) -> Optional[Callable[[int, int], None]]:
+    """
+    Progress callback for a synchronous tool that reports to the client through its Context
+
+    The callback must be called from the tool's worker thread (not from run_concurrently
+    workers). Reports are dropped outside a client request, e.g. when a tool is called
+    in-process.
+
+    Args:
+        ctx: Context injected by FastMCP (optional, no callback without it)
+    """
+    if ctx is None:
+        return None
+
+    def report(done: int, total: int):
+        try:
+            anyio.from_thread.run(ctx.report_progress, done, total)
+        except (RuntimeError, ValueError):
+            # Not running in a worker thread of the server, or called outside a client request
+            pass
+
+    return report
+
+
+class ECSFastMCP(FastMCP):
+    """
+    FastMCP server that runs synchronous tools in worker threads
+
+    FastMCP calls synchronous tools directly on the event loop, so one slow AWS call
+    would stall every other request. Running them in threads lets many clients share
+    one server process over HTTP.
+
+    Tools declare a group (@mcp.tool(group='tasks')); when tool_groups is set, tools of
+    other groups are skipped at registration time. Tools without a group are always
+    registered.
+
+    Results larger than max_result_bytes of JSON are split into pages kept in a
+    server-side ResultStore; the first page is returned together with a handle for
+    the get_result_page tool. A paged list comes back as an object with items and
+    resultPaging, so the registered return annotation of list tools includes it.
+
+    With a profiler, invocations of the profiled tools (including result paging) run
+    under the profiler and the slowest profiles are available from get_profiles.
+
+    Every invocation runs in a CancelScope with a deadline (tool_timeout, a per-tool
+    timeout passed to @mcp.tool or an entry of tool_timeouts; 0 disables it). When the
+    client cancels the request, the server stops waiting for the worker thread right
+    away and the invocation stops before its next AWS call or sleep.
+
+    With a resolver, cluster, service and task definition arguments may be short names;
+    they are resolved to ARNs before the tool runs. Unique name prefixes are only
+    expanded for tools registered with prefix_names=True (the read tools), so a write
+    tool never acts on a resource that was selected by prefix.
+    """
+
+    def __init__(self, *args, tool_groups: Optional[List[str]] = None, compact_descriptions: bool = False,
+                 tool_workers: int = DEFAULT_TOOL_WORKERS, max_result_bytes: Optional[int] = None,
+                 profiler: Optional['ToolProfiler'] = None, tool_timeout: Optional[float] = None,
+                 tool_timeouts: Optional[Dict[str, float]] = None, resolver: Optional[ArnResolver] = None,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tool_groups = tool_groups
+        self.compact_descriptions = compact_descriptions
+        self.profiler = profiler
+        self.resolver = resolver
+        self._tool_limiter = anyio.CapacityLimiter(tool_workers)
+
+        if tool_timeout is None:
+            tool_timeout = float(os.environ.get('ECS_TOOL_TIMEOUT', DEFAULT_TOOL_TIMEOUT))
+        if tool_timeouts is None:
+            tool_timeouts = parse_tool_timeouts(os.environ.get('ECS_TOOL_TIMEOUTS'))
+        self.tool_timeout = tool_timeout
+        self.tool_timeouts = tool_timeouts
+
+        if max_result_bytes is None:
+            max_result_bytes = int(os.environ.get('ECS_MAX_RESULT_BYTES', DEFAULT_MAX_RESULT_BYTES))
+        self.result_store = ResultStore(max_result_bytes=max_result_bytes)
+        if max_result_bytes:
+            self.tool()(self.get_result_page)
+        if profiler is not None:
+            self.tool()(self.get_profiles)
+        if resolver is not None:
+            self.tool()(self.find_names)
+
+    def get_result_page(self, handle: str, page: int) -> Dict[str, Any]:
+        """
+        Get a page of a large tool result
+        Tools whose result is too large return the first page with a resultPaging object;
+        pass its handle and a page number to fetch the remaining pages
+
+        Args:
+            handle: Handle from the resultPaging object of a previous result
+            page: Zero-based page number
+        """
+        result = self.result_store.page(handle, page)
+        if result is None:
+            raise ValueError(f"Result {handle} is unknown or has expired, run the original tool again")
+        return result
+
+    def get_profiles(self, tool: Optional[str] = None, limit: Optional[int] = None,
+                     clear: bool = False) -> Dict[str, Any]:
+        """
+        Get the profiles of the slowest profiled tool invocations
+        Each profile lists the functions with the most own time and, when memory
+        profiling is enabled, the source lines that allocated the most memory
+
+        Args:
+            tool: Only return profiles of this tool (optional)
+            limit: Maximum number of profiles to return, slowest first (optional)
+            clear: Drop the kept profiles after returning them (default: False)
+        """
+        result = self.profiler.profiles(tool=tool, limit=limit)
+        if clear:
+            self.profiler.clear()
+        return result
+
+    def find_names(self, prefix: str = '', resource_type: str = 'service', cluster: Optional[str] = None,
+                   limit: int = 50) -> List[Dict[str, str]]:
+        """
+        Find clusters, services or task definition families whose name starts with a prefix
+        Every tool accepts short names in place of cluster, service and task definition ARNs,
+        and read tools also accept unique prefixes, so this is only needed to browse names
+
+        Args:
+            prefix: Name prefix (default: list all names up to limit)
+            resource_type: One of cluster, service or task_definition_family (default: service)
+            cluster: Cluster name or ARN of the services (optional, defaults to the default cluster)
+            limit: Maximum number of names to return (default: 50)
+        """
+        return self.resolver.search(prefix, resource_type, cluster, limit)
+
+    def tool(self, name: Optional[str] = None, description: Optional[str] = None,
+             group: Optional[str] = None, timeout: Optional[float] = None,
+             prefix_names: bool = False, **kwargs) -> Callable:
+        if group is not None and group not in TOOL_GROUPS:
+            raise ValueError(f"Unknown tool group: {group}")
+
+        def decorator(fn: Callable) -> Callable:
+            # Tools of disabled groups are never registered, so no schema is built for them
+            if group is not None and self.tool_groups is not None and group not in self.tool_groups:
+                return fn
+
+            tool_description = description
+            if tool_description is None and self.compact_descriptions:
+                tool_description = inspect.cleandoc(fn.__doc__ or '').split('Args:')[0].strip()
+
+            register = super(ECSFastMCP, self).tool(name=name, description=tool_description, **kwargs)
+
+            if inspect.iscoroutinefunction(fn):
+                return register(fn)
+
+            tool_name = name or fn.__name__
+            tool_timeout = self.tool_timeouts.get(tool_name, self.tool_timeout if timeout is None else timeout)
+            profiled = (self.profiler is not None and self.profiler.enabled_for(tool_name)
+                        and fn not in (self.get_result_page, self.get_profiles))
+            resolved = self.resolver is not None and fn != self.find_names
+
+            def invoke(*args, **kwargs):
+                if resolved:
+                    kwargs = self.resolver.resolve_arguments(kwargs, prefixes=prefix_names)
+                result = fn(*args, **kwargs)
+                return result if fn == self.get_result_page else self.result_store.spill(result)
+
+            def call(*args, **kwargs):
+                if profiled:
+                    return self.profiler.profile(tool_name, invoke, *args, **kwargs)
+                return invoke(*args, **kwargs)
+
+            @functools.wraps(fn)
+            async def run_in_thread(*args, **kwargs):
+                scope = CancelScope(tool_timeout, tool_name)
+                try:
+                    # Abandoning the thread on cancellation lets the request finish right
+                    # away; the scope makes the thread stop at its next AWS call
+                    with anyio.fail_after(tool_timeout or None):
+                        return await anyio.to_thread.run_sync(
+                            functools.partial(run_in_scope, scope, call, *args, **kwargs),
+                            limiter=self._tool_limiter,
+                            abandon_on_cancel=True
+                        )
+                except TimeoutError:
+                    scope.cancel()
+                    raise DeadlineExceeded(f'{tool_name} exceeded its deadline of {tool_timeout:g} seconds')
+                except anyio.get_cancelled_exc_class():
+                    scope.cancel()
+                    raise
+
+            if self.result_store.max_result_bytes and fn != self.get_result_page:
+                signature = inspect.signature(fn)
+                annotation = paged_annotation(signature.return_annotation)
+                if annotation is not signature.return_annotation:
+                    run_in_thread.__signature__ = signature.replace(return_annotation=annotation)
+                    run_in_thread.__annotations__ = dict(fn.__annotations__, **{'return': annotation})
+            register(run_in_thread)
+            return fn
+
+        return decorator
+
+
+def run_server(mcp: FastMCP, args: argparse.Namespace):
+    """
+    Run the server with the transport selected on the command line or environment
+
+    Args:
+        mcp: The FastMCP server instance
+        args: Parsed arguments from parse_server_args
+    """
+    if args.host:
+        mcp.settings.host = args.host
+    if args.port:
+        mcp.settings.port = args.port
+
+    mcp.run(transport=args.transport)
@@ -0,0 +1,685 @@
+"""
+Offline snapshots of ECS state and a read-only backend serving them
+
+A snapshot file holds one zlib-compressed JSON record per cluster, service, task,
+container instance and task definition, followed by a compact index and a fixed-size
+footer. All records are compressed with a shared dictionary built from sample records,
+so small records still compress well. The index stores ARNs as a common prefix plus
+IDs and the columns used by list filters (service group, desired status, ...) as
+integer codes into one string table.
+
+Opening a snapshot only maps the file and decodes the index; records are decompressed
+when a describe call asks for them, so large snapshots load quickly and stay small in
+memory. SnapshotBackend answers the read APIs the tools use and plugs into
+FakeECSClient, so every read tool works unchanged against a snapshot.
+"""
+
+import base64
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
+
+from src.cluster_query import compile_query, instance_record
+from src.fake_ecs import FakeECSClient, PAGE_SIZES, _error
+from src.utils import describe_services_batched, paginate, chunked, run_concurrently
+
+MAGIC = b'ECSSNAP1'
+VERSION = 1
+
+# Index offset, index length and magic at the end of the file
+FOOTER = struct.Struct('<QQ8s')
+
+# Size of the shared compression dictionary
+DICTIONARY_SIZE = 32 * 1024
+
+# Number of decompressed records kept in memory
+DEFAULT_CACHE_SIZE = 2048
+
+# Directory capture_snapshot writes to when none is configured
+DEFAULT_SNAPSHOT_DIR = 'snapshots'
+
+# Number of listings kept for paging
+LISTING_CACHE_SIZE = 64
+
+CLUSTER_INCLUDE = ['ATTACHMENTS', 'CONFIGURATIONS', 'SETTINGS', 'STATISTICS', 'TAGS']
+
+# Operations that change resources; everything else that is not captured is unsupported
+_WRITE_PREFIXES = ('create_', 'update_', 'delete_', 'put_', 'register_', 'deregister_', 'run_', 'start_',
+                   'stop_', 'submit_', 'tag_', 'untag_', 'execute_')
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'$date': value.isoformat()}
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def _json_object(value: Dict[str, Any]) -> Any:
+    if len(value) == 1 and '$date' in value:
+        return datetime.fromisoformat(value['$date'])
+    return value
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, separators=(',', ':'), default=_json_default).encode()
+
+
+def _decode(data: bytes) -> Any:
+    return json.loads(data, object_hook=_json_object)
+
+
+def _resource_id(ref: str) -> str:
+    """Last path element of an ARN (name, ID or family:revision), or the reference itself"""
+    return ref.rsplit('/', 1)[-1]
+
+
+class _Strings:
+    """String table shared by the index columns"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        if value not in self.codes:
+            self.codes[value] = len(self.values)
+            self.values.append(value)
+        return self.codes[value]
+
+
+class _TableWriter:
+    """Rows of one resource kind: ARN, record location and filter columns"""
+
+    def __init__(self, strings: _Strings, columns: Tuple[str, ...] = ()):
+        self.strings = strings
+        self.arns: List[str] = []
+        self.offsets: List[int] = []
+        self.lengths: List[int] = []
+        self.columns = {name: [] for name in columns}
+
+    def add(self, arn: str, location: Tuple[int, int], **columns):
+        self.arns.append(arn)
+        self.offsets.append(location[0])
+        self.lengths.append(location[1])
+        for name, values in self.columns.items():
+            values.append(self.strings.code(columns.get(name)))
+
+    def encode(self) -> Dict[str, Any]:
+        prefixes = {arn.rsplit('/', 1)[0] for arn in self.arns}
+        prefix = prefixes.pop() + '/' if len(prefixes) == 1 else ''
+        return {
+            'prefix': prefix,
+            'ids': [arn[len(prefix):] for arn in self.arns],
+            'offsets': self.offsets,
+            'lengths': self.lengths,
+            'columns': self.columns,
+        }
+
+
+class _Table:
+    """Decoded index table; rows are looked up by ID and filtered by column codes"""
+
+    def __init__(self, data: Dict[str, Any], strings: List[str]):
+        self.prefix = data['prefix']
+        self.ids: List[str] = data['ids']
+        self.offsets = array('q', data['offsets'])
+        self.lengths = array('q', data['lengths'])
+        self.columns = {name: array('l', codes) for name, codes in data['columns'].items()}
+        self.strings = strings
+        self._codes: Optional[Dict[str, int]] = None
+        self._rows: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def arn(self, row: int) -> str:
+        return self.prefix + self.ids[row]
+
+    def find(self, ref: str) -> Optional[int]:
+        """Row of a resource given its ARN, name or ID"""
+        if self._rows is None:
+            self._rows = {resource_id: row for row, resource_id in enumerate(self.ids)}
+        return self._rows.get(_resource_id(ref))
+
+    def value(self, column: str, row: int) -> Optional[str]:
+        code = self.columns[column][row]
+        return self.strings[code] if code >= 0 else None
+
+    def rows(self, **filters) -> Iterator[int]:
+        """Rows whose columns equal every given (non-None) filter value"""
+        if not self.ids:
+            return
+        if self._codes is None:
+            self._codes = {value: code for code, value in enumerate(self.strings)}
+        wanted = []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if value not in self._codes:
+                return
+            wanted.append((self.columns[column], self._codes[value]))
+        for row in range(len(self.ids)):
+            if all(codes[row] == code for codes, code in wanted):
+                yield row
+
+
+_EMPTY_TABLE = {'prefix': '', 'ids': [], 'offsets': [], 'lengths': [], 'columns': {}}
+
+
+class SnapshotWriter:
+    """
+    Writes records to a snapshot file and finishes it with the index
+
+    Args:
+        path: File to write; it only replaces an existing file once complete
+        samples: Encoded sample records used to build the compression dictionary
+    """
+
+    def __init__(self, path: str, samples: List[bytes]):
+        self.path = path
+        self._file = open(path + '.tmp', 'wb')
+        self._file.write(MAGIC)
+        self.dictionary = b''.join(samples)[-DICTIONARY_SIZE:]
+        self.dictionary_location = self._write(self.dictionary)
+        self.strings = _Strings()
+
+    def _write(self, data: bytes) -> Tuple[int, int]:
+        offset = self._file.tell()
+        self._file.write(data)
+        return offset, len(data)
+
+    def add(self, value: Any) -> Tuple[int, int]:
+        """Compress and append a record, returning its offset and length"""
+        compressor = zlib.compressobj(level=6, zdict=self.dictionary) if self.dictionary else zlib.compressobj(level=6)
+        return self._write(compressor.compress(_encode(value)) + compressor.flush())
+
+    def table(self, columns: Tuple[str, ...] = ()) -> _TableWriter:
+        return _TableWriter(self.strings, columns)
+
+    def close(self, index: Dict[str, Any]) -> int:
+        """Write the index and footer and move the file into place, returning its size"""
+        index = dict(index, version=VERSION, dictionary=list(self.dictionary_location), strings=self.strings.values)
+        offset, length = self._write(zlib.compress(_encode(index), 6))
+        self._file.write(FOOTER.pack(offset, length, MAGIC))
+        size = self._file.tell()
+        self._file.close()
+        os.replace(self.path + '.tmp', self.path)
+        return size
+
+
+class Snapshot:
+    """
+    Read access to a snapshot file through a memory map
+
+    Args:
+        path: Snapshot file
+        cache_size: Number of decompressed records kept in memory
+    """
+
+    def __init__(self, path: str, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an ECS snapshot")
+        offset, length, magic = FOOTER.unpack(self._map[-FOOTER.size:])
+        if magic != MAGIC:
+            raise ValueError(f"{path} is truncated")
+
+        index = _decode(zlib.decompress(self._map[offset:offset + length]))
+        if index.get('version') != VERSION:
+            raise ValueError(f"Unsupported snapshot version: {index.get('version')}")
+        dictionary_offset, dictionary_length = index['dictionary']
+        self.dictionary = bytes(self._map[dictionary_offset:dictionary_offset + dictionary_length])
+        self.strings: List[str] = index['strings']
+        self.region: str = index['region']
+        self.captured_at: datetime = index['capturedAt']
+        self.families: Dict[str, List[str]] = index['families']
+        self.capacity_providers: Tuple[int, int] = tuple(index['capacityProviders'])
+        self.clusters = _Table(index['clusters'], self.strings)
+        self.task_definitions = _Table(index['taskDefinitions'], self.strings)
+        self._attributes: Dict[str, Tuple[int, int]] = {k: tuple(v) for k, v in index['attributes'].items()}
+        self._scoped = {kind: index[kind] for kind in ('services', 'tasks', 'instances')}
+        self._tables: Dict[Tuple[str, str], _Table] = {}
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def table(self, kind: str, cluster_arn: str) -> _Table:
+        """Services, tasks or container instances of a cluster, decoded on first use"""
+        key = (kind, cluster_arn)
+        with self._lock:
+            if key not in self._tables:
+                self._tables[key] = _Table(self._scoped[kind].get(cluster_arn, _EMPTY_TABLE), self.strings)
+            return self._tables[key]
+
+    def load(self, location: Tuple[int, int]) -> Any:
+        """Decode the record at a location; decompressed bytes are cached, decoded objects are not shared"""
+        offset, length = location
+        if offset < 0:
+            return None
+        with self._lock:
+            data = self._cache.get(offset)
+            if data is not None:
+                self._cache.move_to_end(offset)
+        if data is None:
+            decompressor = zlib.decompressobj(zdict=self.dictionary) if self.dictionary else zlib.decompressobj()
+            data = decompressor.decompress(self._map[offset:offset + length])
+            with self._lock:
+                self._cache[offset] = data
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return _decode(data)
+
+    def record(self, table: _Table, row: int) -> Any:
+        return self.load((table.offsets[row], table.lengths[row]))
+
+    def attributes(self, cluster_arn: str) -> List[Dict[str, Any]]:
+        location = self._attributes.get(cluster_arn)
+        return self.load(location) if location else []
+
+
+def _describe_all(method: Callable, key: str, cluster: str, arns: List[str], param: str) -> List[Dict[str, Any]]:
+    batches = run_concurrently(
+        lambda batch: method(cluster=cluster, include=['TAGS'], **{param: batch}).get(key, []),
+        list(chunked(arns, 100))
+    )
+    return [item for batch in batches for item in batch]
+
+
+def _capture_cluster(client, cluster_arn: str, include_stopped_tasks: bool) -> Dict[str, Any]:
+    service_arns = paginate(client.list_services, 'serviceArns', cluster=cluster_arn, maxResults=100)
+    task_arns = []
+    for status in ('RUNNING', 'STOPPED') if include_stopped_tasks else ('RUNNING',):
+        task_arns += paginate(client.list_tasks, 'taskArns', cluster=cluster_arn, desiredStatus=status)
+    instance_arns = paginate(client.list_container_instances, 'containerInstanceArns', cluster=cluster_arn)
+    return {
+        'services': describe_services_batched(client, cluster_arn, service_arns, include_tags=True),
+        'tasks': _describe_all(client.describe_tasks, 'tasks', cluster_arn, task_arns, 'tasks'),
+        'instances': _describe_all(client.describe_container_instances, 'containerInstances', cluster_arn,
+                                   instance_arns, 'containerInstances'),
+        'attributes': paginate(client.list_attributes, 'attributes', cluster=cluster_arn,
+                               targetType='container-instance', maxResults=100),
+    }
+
+
+def snapshot_path(directory: str, name: str) -> str:
+    """
+    Path of a snapshot file inside the snapshot directory, creating missing subdirectories
+
+    Callers only choose a relative name, so a tool call cannot write outside the
+    directory configured on the server.
+
+    Args:
+        directory: Directory snapshots are written to
+        name: Relative file name chosen by the caller
+    """
+    if not name or os.path.isabs(name) or '..' in name.replace('\\', '/').split('/'):
+        raise ValueError("Snapshot path must be a relative file name without '..'")
+    root = os.path.realpath(directory)
+    path = os.path.realpath(os.path.join(root, name))
+    if path == root or os.path.commonpath([root, path]) != root:
+        raise ValueError("Snapshot path must be a file inside the snapshot directory")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def capture_snapshot_file(client, path: str, cluster_arns: Optional[List[str]] = None,
+                          include_stopped_tasks: bool = True) -> Dict[str, Any]:
+    """
+    Capture clusters, services, tasks, container instances and task definitions into a snapshot file
+
+    Every task definition revision used by a service deployment or task is described;
+    the ARNs of the other ACTIVE revisions and all family names are listed only.
+
+    Args:
+        client: ECS client
+        path: Snapshot file to write
+        cluster_arns: Clusters to capture (optional, defaults to all clusters)
+        include_stopped_tasks: Also capture the stopped tasks ECS still reports
+    """
+    started = time.monotonic()
+    if not cluster_arns:
+        cluster_arns = paginate(client.list_clusters, 'clusterArns')
+    clusters = [
+        cluster for batch in chunked(cluster_arns, 100)
+        for cluster in client.describe_clusters(clusters=batch, include=CLUSTER_INCLUDE).get('clusters', [])
+    ]
+    captured = run_concurrently(
+        lambda cluster: _capture_cluster(client, cluster['clusterArn'], include_stopped_tasks), clusters
+    )
+
+    used = sorted({
+        arn
+        for state in captured
+        for item in state['services'] + state['tasks']
+        for arn in [item.get('taskDefinition'), item.get('taskDefinitionArn')]
+        + [d.get('taskDefinition') for d in item.get('deployments', [])]
+        if arn
+    })
+    described = run_concurrently(
+        lambda arn: client.describe_task_definition(taskDefinition=arn, include=['TAGS']), used
+    )
+    definitions = {response['taskDefinition']['taskDefinitionArn']: response for response in described}
+    active_arns = paginate(client.list_task_definitions, 'taskDefinitionArns', status='ACTIVE', maxResults=100)
+    families = {
+        status: paginate(client.list_task_definition_families, 'families', status=status, maxResults=100)
+        for status in ('ACTIVE', 'INACTIVE')
+    }
+    capacity_providers = paginate(client.describe_capacity_providers, 'capacityProviders', include=['TAGS'])
+
+    samples = [_encode(item) for item in clusters[:4] + list(definitions.values())[:8]]
+    for state in captured[:4]:
+        samples += [_encode(item) for kind in ('instances', 'services', 'tasks') for item in state[kind][:8]]
+    writer = SnapshotWriter(path, samples)
+
+    index: Dict[str, Any] = {'region': client.meta.region_name, 'capturedAt': datetime.now(timezone.utc),
+                             'families': families, 'services': {}, 'tasks': {}, 'instances': {}, 'attributes': {}}
+    cluster_table = writer.table()
+    for cluster, state in zip(clusters, captured):
+        arn = cluster['clusterArn']
+        cluster_table.add(arn, writer.add(cluster))
+
+        services = writer.table(('launchType', 'schedulingStrategy', 'status'))
+        for service in state['services']:
+            services.add(service['serviceArn'], writer.add(service), launchType=service.get('launchType'),
+                         schedulingStrategy=service.get('schedulingStrategy'), status=service.get('status'))
+
+        tasks = writer.table(('group', 'desiredStatus', 'containerInstance', 'family', 'startedBy', 'launchType'))
+        for task in state['tasks']:
+            instance = task.get('containerInstanceArn')
+            tasks.add(task['taskArn'], writer.add(task), group=task.get('group'),
+                      desiredStatus=task.get('desiredStatus'),
+                      containerInstance=_resource_id(instance) if instance else None,
+                      family=_resource_id(task.get('taskDefinitionArn', '')).split(':')[0] or None,
+                      startedBy=task.get('startedBy'), launchType=task.get('launchType'))
+
+        instances = writer.table(('status',))
+        for instance in state['instances']:
+            instances.add(instance['containerInstanceArn'], writer.add(instance), status=instance.get('status'))
+
+        index['services'][arn] = services.encode()
+        index['tasks'][arn] = tasks.encode()
+        index['instances'][arn] = instances.encode()
+        index['attributes'][arn] = writer.add(state['attributes'])
+
+    # Listed revisions that were not described have no record (offset -1)
+    task_definitions = writer.table(('status',))
+    for arn in sorted(set(active_arns) | set(definitions)):
+        definition = definitions.get(arn)
+        location = writer.add(definition) if definition else (-1, 0)
+        task_definitions.add(arn, location, status=definition['taskDefinition'].get('status') if definition else 'ACTIVE')
+
+    index['clusters'] = cluster_table.encode()
+    index['taskDefinitions'] = task_definitions.encode()
+    index['capacityProviders'] = writer.add(capacity_providers)
+    size = writer.close(index)
+
+    return {
+        'path': path,
+        'bytes': size,
+        'seconds': round(time.monotonic() - started, 2),
+        'clusters': len(clusters),
+        'services': sum(len(state['services']) for state in captured),
+        'tasks': sum(len(state['tasks']) for state in captured),
+        'containerInstances': sum(len(state['instances']) for state in captured),
+        'taskDefinitions': len(definitions),
+    }
+
+
+class SnapshotBackend:
+    """
+    Read-only ECS backend answering from a snapshot, for use with FakeECSClient
+
+    Write operations fail with AccessDeniedException and read operations whose data
+    is not part of a snapshot (deployments, task sets, ...) with UnsupportedOperation.
+
+    Args:
+        snapshot: Opened snapshot
+    """
+
+    def __init__(self, snapshot: Snapshot):
+        self.snapshot = snapshot
+        self.region = snapshot.region
+        self.lock = threading.Lock()
+        self._listings: OrderedDict = OrderedDict()
+        self._families: Optional[Dict[str, List[int]]] = None
+
+    def __getattr__(self, method: str) -> Callable:
+        if method.startswith('_'):
+            raise AttributeError(method)
+
+        def unavailable(params):
+            operation = ''.join(part.capitalize() for part in method.split('_'))
+            if method.startswith(_WRITE_PREFIXES):
+                raise _error('AccessDeniedException', 'The server is serving a read-only snapshot.', operation)
+            raise _error('UnsupportedOperation', f'{operation} is not available from a snapshot.', operation)
+
+        return unavailable
+
+    def _page(self, operation: str, params: Dict[str, Any], items: Callable[[], List[Any]]) -> Tuple[List[Any], Optional[str]]:
+        """One page of a listing; listings are kept for paging since the snapshot never changes"""
+        default, maximum = PAGE_SIZES[operation]
+        size = params.get('maxResults') or default
+        if size > maximum:
+            raise _error('InvalidParameterException', f'maxResults must be at most {maximum}.', operation)
+
+        key = (operation, _encode({k: v for k, v in params.items() if k not in ('nextToken', 'maxResults')}))
+        listing = self._listings.get(key)
+        if listing is None:
+            listing = self._listings[key] = items()
+            while len(self._listings) > LISTING_CACHE_SIZE:
+                self._listings.popitem(last=False)
+        self._listings.move_to_end(key)
+
+        offset = 0
+        if params.get('nextToken'):
+            try:
+                offset = int(base64.urlsafe_b64decode(params['nextToken'].encode()))
+            except ValueError:
+                raise _error('InvalidParameterException', 'Invalid nextToken.', operation)
+        next_token = base64.urlsafe_b64encode(str(offset + size).encode()).decode() if offset + size < len(listing) else None
+        return listing[offset:offset + size], next_token
+
+    def _cluster(self, ref: Optional[str], operation: str) -> str:
+        row = self.snapshot.clusters.find(ref or 'default')
+        if row is None:
+            raise _error('ClusterNotFoundException', 'Cluster not found.', operation)
+        return self.snapshot.clusters.arn(row)
+
+    def _describe(self, table: _Table, refs: List[str], include: List[str]) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+        items, failures = [], []
+        for ref in refs:
+            row = table.find(ref)
+            if row is None:
+                failures.append({'arn': ref, 'reason': 'MISSING'})
+                continue
+            item = self.snapshot.record(table, row)
+            if 'TAGS' not in include:
+                item.pop('tags', None)
+            items.append(item)
+        return items, failures
+
+    # Clusters
+
+    def list_clusters(self, params):
+        clusters = self.snapshot.clusters
+        page, token = self._page('ListClusters', params, lambda: [clusters.arn(row) for row in range(len(clusters))])
+        return {'clusterArns': page, 'nextToken': token}
+
+    def describe_clusters(self, params):
+        include = params.get('include', [])
+        clusters, failures = self._describe(self.snapshot.clusters, params.get('clusters') or ['default'], include)
+        for cluster in clusters:
+            for key, flag in (('statistics', 'STATISTICS'), ('settings', 'SETTINGS'),
+                              ('attachments', 'ATTACHMENTS'), ('configuration', 'CONFIGURATIONS')):
+                if flag not in include:
+                    cluster.pop(key, None)
+        return {'clusters': clusters, 'failures': failures}
+
+    # Services
+
+    def list_services(self, params):
+        table = self.snapshot.table('services', self._cluster(params.get('cluster'), 'ListServices'))
+        page, token = self._page('ListServices', params, lambda: [
+            table.arn(row) for row in table.rows(status='ACTIVE', launchType=params.get('launchType'),
+                                                 schedulingStrategy=params.get('schedulingStrategy'))
+        ])
+        return {'serviceArns': page, 'nextToken': token}
+
+    def describe_services(self, params):
+        table = self.snapshot.table('services', self._cluster(params.get('cluster'), 'DescribeServices'))
+        services, failures = self._describe(table, params['services'], params.get('include', []))
+        return {'services': services, 'failures': failures}
+
+    # Tasks
+
+    def list_tasks(self, params):
+        table = self.snapshot.table('tasks', self._cluster(params.get('cluster'), 'ListTasks'))
+        service = params.get('serviceName')
+        instance = params.get('containerInstance')
+        page, token = self._page('ListTasks', params, lambda: [
+            table.arn(row) for row in table.rows(
+                desiredStatus=params.get('desiredStatus', 'RUNNING'),
+                group=f'service:{_resource_id(service)}' if service else None,
+                family=params.get('family'),
+                containerInstance=_resource_id(instance) if instance else None,
+                startedBy=params.get('startedBy'),
+                launchType=params.get('launchType'))
+        ])
+        return {'taskArns': page, 'nextToken': token}
+
+    def describe_tasks(self, params):
+        table = self.snapshot.table('tasks', self._cluster(params.get('cluster'), 'DescribeTasks'))
+        tasks, failures = self._describe(table, params['tasks'], params.get('include', []))
+        return {'tasks': tasks, 'failures': failures}
+
+    # Container instances
+
+    def list_container_instances(self, params):
+        table = self.snapshot.table('instances', self._cluster(params.get('cluster'), 'ListContainerInstances'))
+
+        def listing():
+            rows = list(table.rows(status=params.get('status')))
+            if params.get('filter'):
+                query = compile_query(params['filter'])
+                rows = [row for row in rows if query.matches(instance_record(self.snapshot.record(table, row)))]
+            return [table.arn(row) for row in rows]
+
+        page, token = self._page('ListContainerInstances', params, listing)
+        return {'containerInstanceArns': page, 'nextToken': token}
+
+    def describe_container_instances(self, params):
+        table = self.snapshot.table('instances', self._cluster(params.get('cluster'), 'DescribeContainerInstances'))
+        instances, failures = self._describe(table, params['containerInstances'], params.get('include', []))
+        return {'containerInstances': instances, 'failures': failures}
+
+    def list_attributes(self, params):
+        cluster = self._cluster(params.get('cluster'), 'ListAttributes')
+        page, token = self._page('ListAttributes', params, lambda: [
+            a for a in self.snapshot.attributes(cluster)
+            if a.get('targetType', 'container-instance') == params['targetType']
+            and (not params.get('attributeName') or a['name'] == params['attributeName'])
+            and (not params.get('attributeValue') or a.get('value') == params['attributeValue'])
+        ])
+        return {'attributes': page, 'nextToken': token}
+
+    # Task definitions
+
+    def _family_rows(self) -> Dict[str, List[int]]:
+        if self._families is None:
+            families: Dict[str, List[int]] = {}
+            for row, resource_id in enumerate(self.snapshot.task_definitions.ids):
+                families.setdefault(resource_id.rsplit(':', 1)[0], []).append(row)
+            for rows in families.values():
+                rows.sort(key=lambda row: int(self.snapshot.task_definitions.ids[row].rsplit(':', 1)[1]))
+            self._families = families
+        return self._families
+
+    def list_task_definitions(self, params):
+        table = self.snapshot.task_definitions
+        prefix = params.get('familyPrefix')
+
+        def listing():
+            arns = [
+                table.arn(row) for family, rows in sorted(self._family_rows().items())
+                if not prefix or family.startswith(prefix)
+                for row in rows if table.value('status', row) == params.get('status', 'ACTIVE')
+            ]
+            return arns[::-1] if params.get('sort') == 'DESC' else arns
+
+        page, token = self._page('ListTaskDefinitions', params, listing)
+        return {'taskDefinitionArns': page, 'nextToken': token}
+
+    def list_task_definition_families(self, params):
+        status = params.get('status', 'ACTIVE')
+        families = self.snapshot.families
+        names = sorted(set(families['ACTIVE']) | set(families['INACTIVE'])) if status == 'ALL' else families.get(status, [])
+        page, token = self._page('ListTaskDefinitionFamilies', params, lambda: [
+            family for family in names if not params.get('familyPrefix') or family.startswith(params['familyPrefix'])
+        ])
+        return {'families': page, 'nextToken': token}
+
+    def describe_task_definition(self, params):
+        table = self.snapshot.task_definitions
+        ref = _resource_id(params['taskDefinition'])
+        if ':' in ref:
+            row = table.find(ref)
+        else:
+            active = [row for row in self._family_rows().get(ref, []) if table.value('status', row) == 'ACTIVE']
+            row = active[-1] if active else None
+        response = self.snapshot.record(table, row) if row is not None else None
+        if response is None:
+            raise _error('ClientException', 'Unable to describe task definition (not captured in the snapshot).',
+                         'DescribeTaskDefinition')
+        if 'TAGS' not in params.get('include', []):
+            response.pop('tags', None)
+        return response
+
+    # Capacity providers and tags
+
+    def describe_capacity_providers(self, params):
+        refs = {_resource_id(ref) for ref in params.get('capacityProviders') or []}
+        page, token = self._page('DescribeCapacityProviders', params, lambda: [
+            p for p in self.snapshot.load(self.snapshot.capacity_providers) if not refs or p['name'] in refs
+        ])
+        return {'capacityProviders': page, 'failures': [], 'nextToken': token}
+
+    def list_tags_for_resource(self, params):
+        arn = params['resourceArn']
+        resource = arn.split(':', 5)[-1]
+        kind, _, path = resource.partition('/')
+        if kind == 'cluster':
+            table = self.snapshot.clusters
+        elif kind == 'task-definition':
+            table = self.snapshot.task_definitions
+        elif kind in ('service', 'task', 'container-instance') and '/' in path:
+            cluster = self._cluster(path.split('/')[0], 'ListTagsForResource')
+            table = self.snapshot.table({'service': 'services', 'task': 'tasks'}.get(kind, 'instances'), cluster)
+        else:
+            table = None
+        row = table.find(arn) if table is not None else None
+        record = self.snapshot.record(table, row) if row is not None else None
+        if record is None:
+            raise _error('InvalidParameterException', 'The specified resource is not in the snapshot.', 'ListTagsForResource')
+        return {'tags': record.get('tags', [])}
+
+
+def create_snapshot_client(path: str) -> FakeECSClient:
+    """
+    ECS client answering read calls from a snapshot file
+
+    Args:
+        path: Snapshot file written by capture_snapshot_file
+    """
+    return FakeECSClient(SnapshotBackend(Snapshot(path)))
@@ -0,0 +1,188 @@
+"""
+Task startup latency analytics over columnar timestamp arrays
+"""
+
+import math
+from array import array
+from typing import List, Dict, Any, Optional, Tuple
+
+from src.utils import paginate, percentile, chunked, run_concurrently
+
+# ListTasks and DescribeTasks both handle at most 100 tasks per call
+PAGE_SIZE = 100
+
+# Timestamps collected per task, in lifecycle order
+TIMESTAMPS = ('createdAt', 'pullStartedAt', 'pullStoppedAt', 'startedAt', 'connectivityAt')
+
+# Startup phases as (name, from timestamp, to timestamp)
+PHASES = (
+    ('provisioning', 'createdAt', 'pullStartedAt'),
+    ('pull', 'pullStartedAt', 'pullStoppedAt'),
+    ('start', 'pullStoppedAt', 'startedAt'),
+    ('total', 'createdAt', 'startedAt'),
+    ('connectivity', 'createdAt', 'connectivityAt'),
+)
+
+# Dimensions the phases are broken down by, as (output key, task field)
+DIMENSIONS = (
+    ('byTaskDefinition', 'taskDefinitionArn'),
+    ('byAvailabilityZone', 'availabilityZone'),
+    ('byCapacityProvider', 'capacityProviderName'),
+)
+
+PERCENTILES = (50, 90, 99)
+
+_MISSING = math.nan
+
+
+def _seconds(value: Any) -> float:
+    """Epoch seconds of a datetime, NaN when absent"""
+    return value.timestamp() if value is not None else _MISSING
+
+
+def _capacity_provider(task: Dict[str, Any]) -> str:
+    return task.get('capacityProviderName') or task.get('launchType') or 'UNKNOWN'
+
+
+class StartupTimeline:
+    """
+    Startup timestamps of many tasks stored as one array('d') column per timestamp
+
+    Missing timestamps are NaN. The dimensions are stored as array('l') codes into a
+    shared strings table, so a task costs a few dozen bytes instead of a task dict.
+    """
+
+    def __init__(self):
+        self.columns = {name: array('d') for name in TIMESTAMPS}
+        self.dimensions = {field: array('l') for _, field in DIMENSIONS}
+        self.strings: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.columns['createdAt'])
+
+    def _code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def add(self, task: Dict[str, Any]):
+        """
+        Append the timestamps and dimensions of one described task
+
+        Args:
+            task: Task as returned by DescribeTasks
+        """
+        for name, column in self.columns.items():
+            column.append(_seconds(task.get(name)))
+        self.dimensions['taskDefinitionArn'].append(self._code(task.get('taskDefinitionArn') or 'UNKNOWN'))
+        self.dimensions['availabilityZone'].append(self._code(task.get('availabilityZone') or 'UNKNOWN'))
+        self.dimensions['capacityProviderName'].append(self._code(_capacity_provider(task)))
+
+    def phase(self, start: str, end: str) -> array:
+        """
+        Durations in seconds between two timestamps for every task, NaN when either is missing
+
+        Args:
+            start: Timestamp the phase starts at
+            end: Timestamp the phase ends at
+        """
+        return array('d', map(float.__sub__, self.columns[end], self.columns[start]))
+
+
+def _percentiles(values: List[float]) -> Dict[str, Any]:
+    """Count, percentiles and max of values, skipping missing (NaN) and negative durations"""
+    # Sorted up front, so percentile's own sort of the already ordered list is linear
+    ordered = sorted(v for v in values if v == v and v >= 0)
+    if not ordered:
+        return {'count': 0}
+
+    summary = {'count': len(ordered)}
+    for p in PERCENTILES:
+        summary[f'p{p}'] = round(percentile(ordered, p), 3)
+    summary['max'] = round(ordered[-1], 3)
+    return summary
+
+
+def _group_rows(codes: array) -> Dict[int, array]:
+    """Row numbers per dimension code"""
+    rows: Dict[int, array] = {}
+    for row, code in enumerate(codes):
+        group = rows.get(code)
+        if group is None:
+            group = rows[code] = array('l')
+        group.append(row)
+    return rows
+
+
+def startup_statistics(timeline: StartupTimeline) -> Dict[str, Any]:
+    """
+    Percentiles of every startup phase, overall and per task definition, AZ and capacity provider
+
+    Each phase column is computed once for all tasks and then sliced per group, so the
+    cost is one pass per phase plus one sort per group.
+
+    Args:
+        timeline: Collected task timestamps
+    """
+    phases = {name: timeline.phase(start, end) for name, start, end in PHASES}
+    result = {
+        'tasksAnalyzed': len(timeline),
+        'phasesSeconds': {name: _percentiles(durations) for name, durations in phases.items()},
+    }
+    for key, field in DIMENSIONS:
+        groups = []
+        for code, rows in _group_rows(timeline.dimensions[field]).items():
+            groups.append({
+                field: timeline.strings[code],
+                'tasks': len(rows),
+                'phasesSeconds': {
+                    name: _percentiles([durations[row] for row in rows]) for name, durations in phases.items()
+                },
+            })
+        groups.sort(key=lambda group: group['phasesSeconds']['total'].get('p50', -1), reverse=True)
+        result[key] = groups
+    return result
+
+
+def collect_startup_timeline(client, cluster: str, services: Optional[List[str]] = None,
+                             include_stopped: bool = False,
+                             max_tasks_per_service: Optional[int] = None) -> Tuple[StartupTimeline, List[Dict[str, Any]]]:
+    """
+    List and describe the tasks of services into a startup timeline
+
+    Listings run concurrently per service and status, then all task ARNs are described
+    concurrently in batches of 100. Only the timestamps and dimensions of each task are
+    kept.
+
+    Args:
+        client: ECS client
+        cluster: Name or ARN of the cluster
+        services: Names or ARNs of the services (optional, defaults to all tasks of the cluster)
+        include_stopped: Also include stopped tasks, which covers tasks replaced by scaling and deployments
+        max_tasks_per_service: Maximum number of tasks per service and status (optional)
+    """
+    statuses = ('RUNNING', 'STOPPED') if include_stopped else ('RUNNING',)
+    listings = [(service, status) for service in (services or [None]) for status in statuses]
+
+    def list_arns(listing):
+        service, status = listing
+        params = {'cluster': cluster, 'desiredStatus': status, 'maxResults': PAGE_SIZE}
+        if service:
+            params['serviceName'] = service.rsplit('/', 1)[-1]
+        return paginate(client.list_tasks, 'taskArns', limit=max_tasks_per_service, **params)
+
+    task_arns = list(dict.fromkeys(arn for arns in run_concurrently(list_arns, listings) for arn in arns))
+    responses = run_concurrently(
+        lambda batch: client.describe_tasks(cluster=cluster, tasks=batch),
+        list(chunked(task_arns, PAGE_SIZE))
+    )
+
+    timeline, failures = StartupTimeline(), []
+    for response in responses:
+        for task in response.get('tasks', []):
+            timeline.add(task)
+        failures.extend(response.get('failures', []))
+    return timeline, failures
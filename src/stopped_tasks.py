@@ -0,0 +1,174 @@
+"""
+Streaming analysis of stopped ECS tasks
+"""
+
+import contextvars
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+from src.utils import DEFAULT_MAX_WORKERS, chunked
+
+# ListTasks and DescribeTasks both handle at most 100 tasks per call
+PAGE_SIZE = 100
+
+# Maximum number of distinct values tracked per dimension; the rest are counted as "<other>"
+MAX_GROUPS = 1000
+
+# Number of example task ARNs kept per group
+MAX_SAMPLES = 3
+
+_REASON_PATTERNS = [
+    (re.compile(r'arn:aws[\w-]*:[^\s,;)]+'), '<arn>'),
+    (re.compile(r'sha256:[0-9a-f]{64}'), '<digest>'),
+    (re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b'), '<ip>'),
+    (re.compile(r'\b[0-9a-f]{8,}(?:-[0-9a-f]{4,})*\b'), '<id>'),
+    (re.compile(r'\b\d+\b'), '<n>'),
+]
+
+
+def normalize_reason(reason: Optional[str]) -> str:
+    """
+    Replace ARNs, IDs, addresses and numbers in a stop reason so similar reasons group together
+
+    Args:
+        reason: stoppedReason or container reason
+    """
+    if not reason:
+        return ''
+    for pattern, replacement in _REASON_PATTERNS:
+        reason = pattern.sub(replacement, reason)
+    return reason
+
+
+def iter_stopped_tasks(client, cluster: str, service_name: Optional[str] = None,
+                       family: Optional[str] = None, max_tasks: Optional[int] = None,
+                       max_workers: int = DEFAULT_MAX_WORKERS) -> Iterator[Dict[str, Any]]:
+    """
+    Yield described stopped tasks while listing continues in the background
+
+    Pages are described concurrently as they are listed; at most max_workers describe
+    calls are in flight, so memory stays bounded regardless of the number of tasks.
+
+    Args:
+        client: ECS client
+        cluster: Name or ARN of the cluster
+        service_name: Only include tasks of this service (optional)
+        family: Only include tasks of this task definition family (optional)
+        max_tasks: Stop after this many tasks (optional)
+        max_workers: Maximum number of concurrent describe calls
+    """
+    params = {'cluster': cluster, 'desiredStatus': 'STOPPED', 'maxResults': PAGE_SIZE}
+    if service_name:
+        params['serviceName'] = service_name
+    if family:
+        params['family'] = family
+
+    def describe(task_arns):
+        return client.describe_tasks(cluster=cluster, tasks=task_arns).get('tasks', [])
+
+    listed = 0
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            response = client.list_tasks(**params)
+            task_arns = response.get('taskArns', [])
+            if max_tasks is not None:
+                task_arns = task_arns[:max_tasks - listed]
+            listed += len(task_arns)
+
+            for batch in chunked(task_arns, PAGE_SIZE):
+                in_flight.append(executor.submit(contextvars.copy_context().run, describe, batch))
+            while len(in_flight) >= max_workers:
+                yield from in_flight.popleft().result()
+
+            params['nextToken'] = response.get('nextToken')
+            if not params['nextToken'] or (max_tasks is not None and listed >= max_tasks):
+                break
+
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+class _Counter:
+    """Bounded counter of group keys with sample task ARNs"""
+
+    def __init__(self):
+        self.groups: Dict[Any, List] = {}
+
+    def add(self, key: Any, task_arn: str):
+        if key not in self.groups and len(self.groups) >= MAX_GROUPS:
+            key = '<other>'
+        group = self.groups.setdefault(key, [0, []])
+        group[0] += 1
+        if len(group[1]) < MAX_SAMPLES:
+            group[1].append(task_arn)
+
+    def top(self, n: int) -> List[Tuple[Any, int, List[str]]]:
+        ranked = sorted(self.groups.items(), key=lambda item: item[1][0], reverse=True)
+        return [(key, count, samples) for key, (count, samples) in ranked[:n]]
+
+
+class StoppedTaskAggregator:
+    """
+    Aggregate stopped tasks by stop code, stop reason, container exit code and task definition
+    """
+
+    def __init__(self):
+        self.tasks = 0
+        self._stop_codes = _Counter()
+        self._reasons = _Counter()
+        self._exit_codes = _Counter()
+        self._task_definitions = _Counter()
+
+    def add(self, task: Dict[str, Any]):
+        """
+        Add one described task to the aggregates
+
+        Args:
+            task: Task as returned by DescribeTasks
+        """
+        task_arn = task.get('taskArn', '')
+        self.tasks += 1
+        self._stop_codes.add(task.get('stopCode', 'UNKNOWN'), task_arn)
+        self._reasons.add(normalize_reason(task.get('stoppedReason')), task_arn)
+        self._task_definitions.add(task.get('taskDefinitionArn', ''), task_arn)
+
+        for container in task.get('containers', []):
+            if container.get('exitCode') is None and not container.get('reason'):
+                continue
+            self._exit_codes.add(
+                (container.get('name', ''), container.get('exitCode'), normalize_reason(container.get('reason'))),
+                task_arn
+            )
+
+    def summary(self, top: int = 20) -> Dict[str, Any]:
+        """
+        Get the most frequent groups of every dimension
+
+        Args:
+            top: Number of groups to return per dimension
+        """
+        def groups(counter, field):
+            return [
+                {field: key, 'count': count, 'sampleTaskArns': samples}
+                for key, count, samples in counter.top(top)
+            ]
+
+        return {
+            'tasksAnalyzed': self.tasks,
+            'byStopCode': groups(self._stop_codes, 'stopCode'),
+            'byStoppedReason': groups(self._reasons, 'stoppedReason'),
+            'byTaskDefinition': groups(self._task_definitions, 'taskDefinitionArn'),
+            'byContainerExit': [
+                {
+                    'container': key[0] if key != '<other>' else key,
+                    'exitCode': key[1] if key != '<other>' else None,
+                    'reason': key[2] if key != '<other>' else '',
+                    'count': count,
+                    'sampleTaskArns': samples
+                }
+                for key, count, samples in self._exit_codes.top(top)
+            ]
+        }
@@ -0,0 +1,145 @@
+"""
+In-memory tag index for answering tag queries across ECS resources
+"""
+
+import threading
+import time
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+# Seconds before an indexed scope is considered stale and reloaded
+DEFAULT_MAX_AGE = 300
+
+
+def tags_to_dict(tags_list: Optional[List[Dict[str, str]]]) -> Dict[str, str]:
+    """
+    Convert an ECS tag list ([{'key': ..., 'value': ...}]) to a dictionary
+
+    Args:
+        tags_list: Tags as returned by the ECS API
+    """
+    return {tag['key']: tag.get('value', '') for tag in tags_list or []}
+
+
+def resource_type(arn: str) -> str:
+    """
+    Get the ECS resource type (cluster, service, task, ...) from an ARN
+
+    Args:
+        arn: ARN of the resource
+    """
+    return arn.split(':', 5)[-1].split('/', 1)[0]
+
+
+class TagIndex:
+    """
+    Inverted index from tags to resource ARNs
+
+    Resources are loaded per scope (for example the cluster list, or the services of
+    one cluster) so that each scope can be refreshed independently once it is older
+    than max_age seconds.
+    """
+
+    def __init__(self, max_age: float = DEFAULT_MAX_AGE):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._tags: Dict[str, Dict[str, str]] = {}
+        self._by_pair: Dict[Tuple[str, str], Set[str]] = {}
+        self._by_key: Dict[str, Set[str]] = {}
+        self._scopes: Dict[str, Set[str]] = {}
+        self._loaded_at: Dict[str, float] = {}
+
+    def _remove(self, arn: str):
+        for key, value in self._tags.pop(arn, {}).items():
+            self._by_pair.get((key, value), set()).discard(arn)
+            self._by_key.get(key, set()).discard(arn)
+
+    def _add(self, arn: str, tags: Dict[str, str]):
+        self._remove(arn)
+        self._tags[arn] = dict(tags)
+        for key, value in tags.items():
+            self._by_pair.setdefault((key, value), set()).add(arn)
+            self._by_key.setdefault(key, set()).add(arn)
+
+    def update_tags(self, arn: str, tags: Dict[str, str]) -> bool:
+        """
+        Re-index the tags of a resource that is already indexed, returning whether it was
+
+        Resources outside every scope are ignored: queries only consider scope members,
+        and nothing would ever remove them again.
+
+        Args:
+            arn: ARN of the resource
+            tags: Current tags of the resource
+        """
+        with self._lock:
+            if arn not in self._tags:
+                return False
+            self._add(arn, tags)
+            return True
+
+    def replace_scope(self, scope: str, resources: Dict[str, Dict[str, str]]):
+        """
+        Replace every resource of a scope, dropping resources that no longer exist
+
+        Args:
+            scope: Scope identifier
+            resources: Mapping of resource ARN to tags
+        """
+        with self._lock:
+            for arn in self._scopes.get(scope, set()) - set(resources):
+                self._remove(arn)
+            for arn, tags in resources.items():
+                self._add(arn, tags)
+            self._scopes[scope] = set(resources)
+            self._loaded_at[scope] = time.monotonic()
+
+    def is_fresh(self, scope: str) -> bool:
+        """
+        Check whether a scope has been loaded within max_age seconds
+
+        Args:
+            scope: Scope identifier
+        """
+        loaded_at = self._loaded_at.get(scope)
+        return loaded_at is not None and time.monotonic() - loaded_at < self.max_age
+
+    def scope_members(self, scope: str) -> Set[str]:
+        """
+        Get the resource ARNs loaded for a scope
+
+        Args:
+            scope: Scope identifier
+        """
+        with self._lock:
+            return set(self._scopes.get(scope, set()))
+
+    def query(self, tags: Dict[str, Optional[str]], resource_types: Optional[List[str]] = None,
+              arns: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Find resources that carry all of the given tags
+
+        Args:
+            tags: Tag keys and values to match; a None value matches any value of the key
+            resource_types: Only return resources of these types (optional)
+            arns: Only consider these resource ARNs (optional)
+        """
+        with self._lock:
+            matches = None
+            for key, value in tags.items():
+                candidates = self._by_key.get(key, set()) if value is None \
+                    else self._by_pair.get((key, value), set())
+                matches = set(candidates) if matches is None else matches & candidates
+                if not matches:
+                    return []
+
+            if matches is None:
+                matches = set(self._tags)
+            if arns is not None:
+                matches &= arns
+            if resource_types:
+                matches = {arn for arn in matches if resource_type(arn) in resource_types}
+
+            return [
+                {'resourceArn': arn, 'tags': dict(self._tags[arn])}
+                for arn in sorted(matches)
+            ]
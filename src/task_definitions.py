@@ -0,0 +1,203 @@
+"""
+Canonical hashing and structural diffing of ECS task definitions
+"""
+
+import hashlib
+import json
+from typing import List, Dict, Any, Optional, Tuple
+
+# Fields accepted by RegisterTaskDefinition. Everything else returned by
+# DescribeTaskDefinition (revision, status, registeredAt, ...) is metadata.
+REGISTRATION_FIELDS = [
+    'family', 'taskRoleArn', 'executionRoleArn', 'networkMode', 'containerDefinitions',
+    'volumes', 'placementConstraints', 'requiresCompatibilities', 'cpu', 'memory',
+    'pidMode', 'ipcMode', 'proxyConfiguration', 'inferenceAccelerators',
+    'ephemeralStorage', 'runtimePlatform', 'enableFaultInjection'
+]
+
+# Lists of objects that are order-insensitive and keyed by a field
+_KEYED_LISTS = {
+    'containerDefinitions': 'name',
+    'environment': 'name',
+    'secrets': 'name',
+    'volumes': 'name',
+    'ulimits': 'name',
+    'systemControls': 'namespace',
+    'resourceRequirements': 'type',
+    'inferenceAccelerators': 'deviceName',
+}
+
+
+def parse_task_definition_arn(arn: str) -> Tuple[str, int]:
+    """
+    Family and revision of a task definition ARN
+
+    Args:
+        arn: Task definition ARN (or family:revision)
+    """
+    family, _, revision = arn.rsplit('/', 1)[-1].rpartition(':')
+    return family, int(revision)
+
+
+def _prune(value: Any) -> Any:
+    """Recursively drop None values and empty lists/dicts"""
+    if isinstance(value, dict):
+        pruned = {k: _prune(v) for k, v in value.items()}
+        return {k: v for k, v in pruned.items() if v is not None and v != [] and v != {}}
+    if isinstance(value, list):
+        return [_prune(v) for v in value]
+    return value
+
+
+def _canonical_container(container: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply the defaults ECS fills in on registration to a container definition"""
+    container = dict(container)
+    container.setdefault('essential', True)
+    if container.get('cpu') == 0:
+        del container['cpu']
+
+    port_mappings = []
+    for mapping in container.get('portMappings', []):
+        mapping = dict(mapping)
+        mapping.setdefault('protocol', 'tcp')
+        if mapping.get('hostPort') == mapping.get('containerPort'):
+            mapping.pop('hostPort', None)
+        port_mappings.append(mapping)
+    if port_mappings:
+        container['portMappings'] = port_mappings
+
+    return container
+
+
+def _sort_keyed_lists(value: Any) -> Any:
+    """Sort order-insensitive lists by their key field"""
+    if isinstance(value, dict):
+        result = {}
+        for k, v in value.items():
+            v = _sort_keyed_lists(v)
+            key_field = _KEYED_LISTS.get(k)
+            if key_field and isinstance(v, list) and all(isinstance(i, dict) for i in v):
+                v = sorted(v, key=lambda item: str(item.get(key_field, '')))
+            result[k] = v
+        return result
+    if isinstance(value, list):
+        return [_sort_keyed_lists(v) for v in value]
+    return value
+
+
+def canonicalize_task_definition(task_definition: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce a task definition to a canonical form suitable for comparison
+
+    Accepts either RegisterTaskDefinition parameters or a DescribeTaskDefinition
+    result. Metadata fields and tags are ignored, server-side defaults are applied
+    and order-insensitive lists are sorted.
+
+    Args:
+        task_definition: Task definition in ECS API (camelCase) format
+    """
+    canonical = {k: task_definition[k] for k in REGISTRATION_FIELDS if k in task_definition}
+    canonical = _prune(canonical)
+
+    if 'containerDefinitions' in canonical:
+        canonical['containerDefinitions'] = [
+            _canonical_container(c) for c in canonical['containerDefinitions']
+        ]
+
+    # Task level cpu/memory are strings in the API but are often passed as numbers
+    for key in ('cpu', 'memory'):
+        if key in canonical:
+            canonical[key] = str(canonical[key])
+
+    return _sort_keyed_lists(canonical)
+
+
+def registration_params(task_definition: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build RegisterTaskDefinition parameters from a DescribeTaskDefinition result
+
+    Args:
+        task_definition: Task definition as returned by DescribeTaskDefinition
+    """
+    return _prune({k: task_definition[k] for k in REGISTRATION_FIELDS if k in task_definition})
+
+
+def task_definition_hash(task_definition: Dict[str, Any],
+                         tags: Optional[List[Dict[str, str]]] = None) -> str:
+    """
+    Compute a stable SHA-256 hash of the canonical form of a task definition
+
+    Tags are not part of the canonical form. Pass them to include them in the hash,
+    e.g. to check whether a registration with tags would change anything.
+
+    Args:
+        task_definition: Task definition in ECS API (camelCase) format
+        tags: Tags as key/value dicts (optional, not hashed when omitted)
+    """
+    canonical = canonicalize_task_definition(task_definition)
+    if tags is not None:
+        canonical = dict(canonical, tags={tag['key']: tag['value'] for tag in tags})
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def _keyed(items: List[Any], key_field: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Index a list of dicts by key_field when every item has a unique key"""
+    if not key_field or not all(isinstance(i, dict) and key_field in i for i in items):
+        return None
+    keyed = {str(i[key_field]): i for i in items}
+    return keyed if len(keyed) == len(items) else None
+
+
+def _diff(old: Any, new: Any, path: str, changes: List[Dict[str, Any]], key_field: Optional[str] = None):
+    if isinstance(old, dict) and isinstance(new, dict):
+        for k in sorted(set(old) | set(new)):
+            child_path = f'{path}.{k}' if path else k
+            if k not in new:
+                changes.append({'path': child_path, 'op': 'removed', 'old': old[k]})
+            elif k not in old:
+                changes.append({'path': child_path, 'op': 'added', 'new': new[k]})
+            else:
+                _diff(old[k], new[k], child_path, changes, _KEYED_LISTS.get(k))
+        return
+
+    if isinstance(old, list) and isinstance(new, list):
+        old_keyed, new_keyed = _keyed(old, key_field), _keyed(new, key_field)
+        if old_keyed is not None and new_keyed is not None:
+            _diff_keyed(old_keyed, new_keyed, path, changes)
+            return
+        if len(old) == len(new):
+            for i, (o, n) in enumerate(zip(old, new)):
+                _diff(o, n, f'{path}[{i}]', changes)
+            return
+
+    if old != new:
+        changes.append({'path': path, 'op': 'changed', 'old': old, 'new': new})
+
+
+def _diff_keyed(old: Dict[str, Any], new: Dict[str, Any], path: str, changes: List[Dict[str, Any]]):
+    for k in sorted(set(old) | set(new)):
+        child_path = f'{path}[{k}]'
+        if k not in new:
+            changes.append({'path': child_path, 'op': 'removed', 'old': old[k]})
+        elif k not in old:
+            changes.append({'path': child_path, 'op': 'added', 'new': new[k]})
+        else:
+            _diff(old[k], new[k], child_path, changes)
+
+
+def diff_task_definitions(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Compute a structural diff between two task definitions
+
+    Containers, environment variables, secrets and volumes are matched by name, so
+    reordering them is not reported as a change. Each change is a dict with
+    path, op (added, removed or changed) and the old and/or new value.
+
+    Args:
+        old: Task definition to compare from
+        new: Task definition to compare to
+    """
+    changes = []
+    _diff(canonicalize_task_definition(old), canonicalize_task_definition(new), '', changes)
+    return changes
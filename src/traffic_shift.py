@@ -0,0 +1,288 @@
+"""
+Stepwise scale shift between the task sets of an external-deployment service
+"""
+
+import math
+import time
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from botocore.exceptions import ClientError
+
+from src.cancellation import DeadlineExceeded, shielded, sleep
+from src.utils import run_concurrently
+
+STRATEGIES = ('linear', 'canary')
+
+# Factor the poll interval grows by while a step makes no visible progress
+POLL_BACKOFF = 1.5
+
+# Share of the previous step's duration waited before the first poll of the next step
+FIRST_POLL_FRACTION = 0.5
+
+
+def shift_schedule(strategy: str, step_percent: float = 25, canary_percent: float = 10) -> List[float]:
+    """
+    Target task set scale after each step, ending at 100
+
+    Args:
+        strategy: linear (equal steps of step_percent) or canary (canary_percent, then 100)
+        step_percent: Scale added per linear step
+        canary_percent: Scale of the canary step
+    """
+    if strategy == 'linear':
+        if not 0 < step_percent <= 100:
+            raise ValueError("step_percent must be between 0 and 100")
+        return [float(min(100, step_percent * step)) for step in range(1, math.ceil(100 / step_percent) + 1)]
+    if strategy == 'canary':
+        if not 0 < canary_percent < 100:
+            raise ValueError("canary_percent must be between 0 and 100")
+        return [float(canary_percent), 100.0]
+    raise ValueError(f"strategy must be one of {', '.join(STRATEGIES)}")
+
+
+def _scale(task_set: Dict[str, Any]) -> float:
+    return float(task_set.get('scale', {}).get('value', 0))
+
+
+def is_steady(task_set: Dict[str, Any], percent: float) -> bool:
+    """
+    Check whether a task set runs all tasks of a scale
+
+    Args:
+        task_set: Task set as returned by DescribeTaskSets
+        percent: Expected scale
+    """
+    return (
+        task_set.get('stabilityStatus') == 'STEADY_STATE'
+        and math.isclose(_scale(task_set), percent)
+        and task_set.get('runningCount') == task_set.get('computedDesiredCount')
+        and not task_set.get('pendingCount')
+    )
+
+
+class TaskSetShift:
+    """
+    Shift a service's scale from a source to a target task set step by step
+
+    Each step updates both task sets concurrently and is gated on both reaching steady
+    state. Both task sets are polled with a single DescribeTaskSets call; the first poll of
+    a step waits for part of the previous step's duration, and the interval grows while
+    running counts do not change and resets when they do. A failed step restores the
+    original scales.
+
+    Args:
+        client: ECS client
+        cluster: Name or ARN of the cluster
+        service: Name or ARN of the service
+        source: ID or ARN of the task set scaled down
+        target: ID or ARN of the task set scaled up
+    """
+
+    def __init__(self, client, cluster: str, service: str, source: str, target: str):
+        self.client = client
+        self.cluster = cluster
+        self.service = service
+        self.source = source
+        self.target = target
+        self.calls = {'updateTaskSet': 0, 'describeTaskSets': 0}
+
+    def describe(self) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Source and target task sets (None when missing) from one DescribeTaskSets call"""
+        self.calls['describeTaskSets'] += 1
+        response = self.client.describe_task_sets(
+            cluster=self.cluster, service=self.service, taskSets=[self.source, self.target]
+        )
+        found = {}
+        for task_set in response.get('taskSets', []):
+            found[task_set['taskSetArn']] = found[task_set['id']] = task_set
+        return found.get(self.source), found.get(self.target)
+
+    def scale(self, scales: Dict[str, float]) -> List[str]:
+        """
+        Update task set scales concurrently, returning the errors
+
+        Args:
+            scales: Scale by task set ID or ARN
+        """
+        def update(item):
+            task_set, percent = item
+            try:
+                self.client.update_task_set(
+                    cluster=self.cluster, service=self.service, taskSet=task_set,
+                    scale={'value': percent, 'unit': 'PERCENT'}
+                )
+                return None
+            except ClientError as e:
+                return f'{task_set}: {e}'
+
+        self.calls['updateTaskSet'] += len(scales)
+        return [error for error in run_concurrently(update, list(scales.items())) if error]
+
+    def check(self, source_percent: float, target_percent: float) -> Tuple[Optional[str], Tuple]:
+        """
+        Poll both task sets once
+
+        Returns None when both are steady at their scales, otherwise the reason, plus the
+        running counts used to detect progress.
+
+        Args:
+            source_percent: Expected source scale
+            target_percent: Expected target scale
+        """
+        source, target = self.describe()
+        if source is None or target is None:
+            return 'Task set no longer exists', ()
+        counts = (source.get('runningCount'), target.get('runningCount'))
+        if is_steady(source, source_percent) and is_steady(target, target_percent):
+            return None, counts
+        return 'Task sets not steady', counts
+
+    def wait(self, source_percent: float, target_percent: float, timeout: float, first_poll: float,
+             min_interval: float, max_interval: float) -> Tuple[Optional[str], int]:
+        """
+        Poll until both task sets are steady at their scales
+
+        Returns the failure reason (None when steady) and the number of polls.
+
+        Args:
+            source_percent: Expected source scale
+            target_percent: Expected target scale
+            timeout: Maximum seconds to wait
+            first_poll: Seconds before the first poll
+            min_interval: Shortest time between polls
+            max_interval: Longest time between polls
+        """
+        deadline = time.monotonic() + timeout
+        interval, last_counts, polls = first_poll, None, 0
+        while True:
+            sleep(max(0.0, min(interval, deadline - time.monotonic())))
+            reason, counts = self.check(source_percent, target_percent)
+            polls += 1
+            if reason is None or not counts:
+                return reason, polls
+            if time.monotonic() >= deadline:
+                return f'{reason} after {timeout:g} seconds', polls
+
+            interval = min_interval if counts != last_counts else min(interval * POLL_BACKOFF, max_interval)
+            last_counts = counts
+
+
+def _restore(shift: TaskSetShift, original: Dict[str, float], timeout: float,
+             min_interval: float, max_interval: float) -> Dict[str, Any]:
+    """Put the original scales back and wait for them outside the (possibly cancelled) invocation"""
+    restored = {'restoredScales': original}
+    with shielded(timeout + max_interval, 'rollback'):
+        try:
+            errors = shift.scale(original)
+            if errors:
+                return dict(restored, status='ROLLBACK_FAILED', rollbackErrors=errors)
+            reason, _ = shift.wait(original[shift.source], original[shift.target], timeout,
+                                   min_interval, min_interval, max_interval)
+        except (ClientError, DeadlineExceeded) as e:
+            reason = f'{type(e).__name__}: {e}'
+    if reason:
+        return dict(restored, status='ROLLBACK_FAILED', rollbackReason=reason)
+    return dict(restored, status='ROLLED_BACK')
+
+
+def shift_traffic(client, cluster: str, service: str, source_task_set: str, target_task_set: str,
+                  strategy: str = 'linear', step_percent: float = 25, canary_percent: float = 10,
+                  bake_seconds: float = 0, step_timeout: float = 600, min_poll_interval: float = 2,
+                  max_poll_interval: float = 30, rollback: bool = True,
+                  progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """
+    Move a service's scale from one task set to another in linear or canary steps
+
+    At every step the target gets the step's scale and the source the rest, both in one
+    concurrent round of UpdateTaskSet calls. The next step starts once both task sets are
+    steady (and after bake_seconds with a confirming poll). When a step fails or times out,
+    a poll fails, or the invocation is cancelled or hits its deadline, and rollback is set,
+    both task sets get their original scales back; ROLLED_BACK is only reported once they
+    are steady again. The rollback runs in its own scope of step_timeout, and cancellation
+    and deadline errors are re-raised after it.
+
+    Args:
+        client: ECS client
+        cluster: Name or ARN of the cluster
+        service: Name or ARN of the service
+        source_task_set: ID or ARN of the task set losing scale
+        target_task_set: ID or ARN of the task set gaining scale
+        strategy: linear or canary
+        step_percent: Scale added per linear step
+        canary_percent: Scale of the canary step
+        bake_seconds: Seconds to hold each step before the next one (the last step is not held)
+        step_timeout: Maximum seconds for a step to become steady
+        min_poll_interval: Shortest time between polls
+        max_poll_interval: Longest time between polls
+        rollback: Restore the original scales when a step fails
+        progress: Called with the number of finished and total steps (optional)
+    """
+    schedule = shift_schedule(strategy, step_percent, canary_percent)
+    if source_task_set == target_task_set:
+        raise ValueError("source_task_set and target_task_set must differ")
+
+    started = time.monotonic()
+    shift = TaskSetShift(client, cluster, service, source_task_set, target_task_set)
+    source, target = shift.describe()
+    if source is None or target is None:
+        raise ValueError(f"Task set {source_task_set if source is None else target_task_set} not found in {service}")
+    original = {source_task_set: _scale(source), target_task_set: _scale(target)}
+
+    result = {
+        'service': service,
+        'sourceTaskSet': source['taskSetArn'],
+        'targetTaskSet': target['taskSetArn'],
+        'strategy': strategy,
+        'schedule': schedule,
+        'steps': [],
+    }
+    previous_seconds = None
+    failure, error = None, None
+    try:
+        for number, percent in enumerate(schedule, 1):
+            step_started = time.monotonic()
+            wanted = {source_task_set: 100.0 - percent, target_task_set: percent}
+            current = {source_task_set: _scale(source), target_task_set: _scale(target)}
+            errors = shift.scale({arn: value for arn, value in wanted.items() if not math.isclose(value, current[arn])})
+            if errors:
+                failure = 'UpdateTaskSet failed: ' + '; '.join(errors)
+            else:
+                first_poll = min_poll_interval if previous_seconds is None \
+                    else min(max_poll_interval, max(min_poll_interval, previous_seconds * FIRST_POLL_FRACTION))
+                failure, polls = shift.wait(wanted[source_task_set], percent, step_timeout, first_poll,
+                                            min_poll_interval, max_poll_interval)
+                previous_seconds = time.monotonic() - step_started
+                if failure is None and bake_seconds and number < len(schedule):
+                    sleep(bake_seconds)
+                    failure, _ = shift.check(wanted[source_task_set], percent)
+                    failure = failure and f'{failure} after baking'
+                    polls += 1
+                result['steps'].append({
+                    'targetPercent': percent,
+                    'seconds': round(time.monotonic() - step_started, 2),
+                    'polls': polls,
+                })
+            if failure:
+                result.update({'failedStep': number, 'reason': failure})
+                break
+            source = dict(source, scale={'value': wanted[source_task_set]})
+            target = dict(target, scale={'value': percent})
+            if progress:
+                progress(number, len(schedule))
+    except Exception as e:
+        # Cancellation, the tool deadline and failed polls land here mid-step
+        failure, error = f'{type(e).__name__}: {e}', e
+        result.update({'failedStep': number, 'reason': failure})
+
+    if failure is None:
+        result['status'] = 'COMPLETED'
+    elif rollback:
+        result.update(_restore(shift, original, step_timeout, min_poll_interval, max_poll_interval))
+    else:
+        result['status'] = 'FAILED'
+
+    if error is not None and not isinstance(error, ClientError):
+        raise error
+    result['apiCalls'] = shift.calls
+    result['elapsedSeconds'] = round(time.monotonic() - started, 2)
+    return result
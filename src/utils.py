@@ -0,0 +1,150 @@
+"""
+Shared helpers for AWS ECS MCP Server tools
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional
+
+from src.cancellation import sleep
+from src.profiling import profile_worker
+
+# Upper bound for concurrent AWS calls issued by a single tool invocation
+DEFAULT_MAX_WORKERS = 10
+
+# Client-side limit for ECS API calls, shared by all tools and clients
+DEFAULT_MAX_CALLS_PER_SECOND = 20.0
+DEFAULT_BURST = 50
+
+
+def paginate(method: Callable, result_key: str, limit: Optional[int] = None, **params) -> List[Any]:
+    """
+    Call a paginated ECS API until nextToken is exhausted and collect the results
+
+    Args:
+        method: Bound client method (e.g. client.list_services)
+        result_key: Key of the list to collect from each response page
+        limit: Stop once this many results were collected (optional)
+        **params: Parameters passed to every call
+    """
+    results = []
+    next_token = None
+
+    while True:
+        if next_token:
+            params['nextToken'] = next_token
+
+        response = method(**params)
+        results.extend(response.get(result_key, []))
+
+        next_token = response.get('nextToken')
+        if not next_token or (limit is not None and len(results) >= limit):
+            break
+
+    return results[:limit] if limit is not None else results
+
+
+def chunked(items: List[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Split a list into consecutive chunks of at most size items
+
+    Args:
+        items: Items to split
+        size: Maximum chunk size
+    """
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def run_concurrently(fn: Callable, items: Iterable[Any], max_workers: int = DEFAULT_MAX_WORKERS) -> List[Any]:
+    """
+    Apply fn to every item using a thread pool and return results in input order
+
+    boto3 clients are thread-safe, so callers can share a single client across workers.
+    Workers run in a copy of the caller's context, so they inherit its cancel scope and
+    are profiled along with a profiled tool invocation.
+
+    Args:
+        fn: Function to call with each item
+        items: Items to process
+        max_workers: Maximum number of concurrent calls
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, profile_worker, fn, item) for item in items]
+        return [future.result() for future in futures]
+
+
+def describe_services_batched(client, cluster: str, service_arns: List[str],
+                              include_tags: bool = False) -> List[Dict[str, Any]]:
+    """
+    Describe any number of services in concurrent chunks of 10
+
+    Args:
+        client: ECS client
+        cluster: Name or ARN of the cluster
+        service_arns: Names or ARNs of the services
+        include_tags: Whether to include service tags
+    """
+    params = {'include': ['TAGS']} if include_tags else {}
+    batches = run_concurrently(
+        lambda batch: client.describe_services(cluster=cluster, services=batch, **params).get('services', []),
+        list(chunked(service_arns, 10))
+    )
+    return [service for batch in batches for service in batch]
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """
+    Compute the p-th percentile of values using linear interpolation
+
+    Args:
+        values: Values to summarize
+        p: Percentile between 0 and 100
+    """
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting the rate of AWS API calls
+    """
+
+    def __init__(self, rate: float = DEFAULT_MAX_CALLS_PER_SECOND, burst: int = DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a token is available and consume it
+
+        Waiting is interrupted when the calling tool invocation is cancelled.
+        """
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            sleep(wait)
@@ -4,17 +4,177 @@ Write operation tools for AWS ECS MCP Server
 
 from typing import List, Dict, Any, Optional, Callable
 
-def register_write_tools(mcp, get_ecs_client: Callable):
+from botocore.exceptions import ClientError
+from mcp.server.fastmcp import Context
+
+from src.attribute_index import AttributeIndex
+from src.attribute_sync import sync_attributes as sync_instance_attributes
+from src.bulk_update import select_services, rolling_update
+from src.revision_cleanup import cleanup_revisions
+from src.runtime import progress_reporter
+from src.snapshot import DEFAULT_SNAPSHOT_DIR, capture_snapshot_file, snapshot_path
+from src.task_definitions import task_definition_hash
+from src.traffic_shift import shift_traffic
+
+def register_write_tools(mcp, get_ecs_client: Callable, attribute_index: Optional[AttributeIndex] = None,
+                         snapshot_dir: str = DEFAULT_SNAPSHOT_DIR):
     """
     Register all write operations (create, update, delete) for ECS with the MCP server
     
     Args:
         mcp: The FastMCP server instance
         get_ecs_client: Function to get the ECS client
+        attribute_index: Attribute index shared with the read tools (optional)
+        snapshot_dir: Directory capture_snapshot writes to
     """
+    attribute_index = attribute_index or AttributeIndex()
     
+    # Bulk operations
+    # Rollouts wait for deployments batch by batch, so they have no overall deadline
+    @mcp.tool(group="services", timeout=0)
+    def bulk_update_services(
+        cluster: str,
+        services: Optional[List[str]] = None,
+        name_prefix: Optional[str] = None,
+        tags: Optional[Dict[str, str]] = None,
+        task_definition: Optional[str] = None,
+        container_images: Optional[Dict[str, str]] = None,
+        desired_count: Optional[int] = None,
+        force_new_deployment: bool = False,
+        batch_size: int = 5,
+        max_failures: int = 0,
+        wait_for_steady_state: bool = True,
+        batch_timeout_seconds: int = 900,
+        poll_interval_seconds: int = 15,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Update many services in rolling batches
+        Each batch of services is updated concurrently and its deployments must complete
+        before the next batch starts; the rollout stops when more than max_failures services fail
+        
+        Args:
+            cluster: The name or ARN of the cluster that hosts the services
+            services: Names or ARNs of the services to update (optional, defaults to all services in the cluster)
+            name_prefix: Only update services whose name starts with this prefix (optional)
+            tags: Only update services carrying all of these tags (optional)
+            task_definition: The task definition to deploy to every selected service (optional)
+            container_images: Container name to image mapping; each service gets a new revision of its current task definition with these images (optional)
+            desired_count: The desired count to set on every selected service (optional)
+            force_new_deployment: Whether to force a new deployment of every selected service (default: False)
+            batch_size: Number of services updated at the same time (default: 5)
+            max_failures: Number of failed services tolerated before stopping the rollout (default: 0)
+            wait_for_steady_state: Whether to wait for each batch's deployments to complete (default: True)
+            batch_timeout_seconds: Maximum time to wait for one batch to complete (default: 900)
+            poll_interval_seconds: Time between deployment status checks (default: 15)
+            dry_run: Only return the selected services without updating them (default: False)
+        """
+        client = get_ecs_client()
+        selected = select_services(client, cluster, services, name_prefix, tags)
+        
+        if dry_run:
+            return {
+                "services": [
+                    {
+                        "serviceArn": service["serviceArn"],
+                        "serviceName": service["serviceName"],
+                        "taskDefinition": service.get("taskDefinition"),
+                        "desiredCount": service.get("desiredCount")
+                    }
+                    for service in selected
+                ]
+            }
+            
+        results = rolling_update(
+            client,
+            cluster,
+            selected,
+            task_definition=task_definition,
+            container_images=container_images,
+            desired_count=desired_count,
+            force_new_deployment=force_new_deployment,
+            batch_size=max(1, batch_size),
+            max_failures=max_failures,
+            wait_for_steady_state=wait_for_steady_state,
+            batch_timeout=batch_timeout_seconds,
+            poll_interval=poll_interval_seconds
+        )
+        
+        summary = {}
+        for result in results:
+            summary[result["status"]] = summary.get(result["status"], 0) + 1
+            
+        return {
+            "summary": summary,
+            "services": results
+        }
+    
+    # Capturing a whole account makes many describe calls, so it has no overall deadline
+    @mcp.tool(group="admin", timeout=0)
+    def capture_snapshot(
+        path: str,
+        cluster_arns: Optional[List[str]] = None,
+        include_stopped_tasks: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Capture clusters, services, tasks, container instances and task definitions into a snapshot file
+        The file is written to the server's snapshot directory; start a server with --snapshot <file>
+        to answer the read tools from the snapshot without AWS
+
+        Args:
+            path: File name relative to the server's snapshot directory (no absolute paths or '..')
+            cluster_arns: List of cluster ARNs to capture (optional, defaults to all clusters)
+            include_stopped_tasks: Also capture recently stopped tasks (default: True)
+        """
+        client = get_ecs_client()
+        return capture_snapshot_file(client, snapshot_path(snapshot_dir, path), cluster_arns, include_stopped_tasks)
+
+    # Deregistering thousands of revisions at a limited rate can take longer than the default deadline
+    @mcp.tool(group="task_definitions", timeout=0)
+    def cleanup_task_definitions(
+        keep_last: int = 5,
+        family_prefix: Optional[str] = None,
+        families: Optional[List[str]] = None,
+        cluster_arns: Optional[List[str]] = None,
+        delete: bool = False,
+        dry_run: bool = True,
+        max_concurrency: int = 5,
+        calls_per_second: float = 5,
+        ctx: Context = None
+    ) -> Dict[str, Any]:
+        """
+        Deregister and delete stale task definition revisions of every family
+        Keeps the newest keep_last ACTIVE revisions of each family and every revision used by a
+        service deployment or task set; reports progress while deregistering and deleting.
+        By default only returns the plan: pass dry_run=false to deregister, and additionally
+        delete=true to permanently delete
+
+        Args:
+            keep_last: Number of newest ACTIVE revisions to keep per family (default: 5)
+            family_prefix: Only clean up families starting with this prefix (optional)
+            families: Only clean up these families (optional)
+            cluster_arns: Clusters whose services protect their revisions (optional, defaults to all clusters)
+            delete: Also permanently delete the deregistered revisions and unused INACTIVE revisions (default: False)
+            dry_run: Only return the revisions that would be kept, deregistered and deleted per family (default: True)
+            max_concurrency: Maximum number of concurrent deregister and delete calls (default: 5)
+            calls_per_second: Maximum rate of deregister and delete calls (default: 5)
+        """
+        client = get_ecs_client()
+        return cleanup_revisions(
+            client,
+            keep_last=keep_last,
+            family_prefix=family_prefix,
+            families=families,
+            cluster_arns=cluster_arns,
+            delete=delete,
+            dry_run=dry_run,
+            max_concurrency=max(1, max_concurrency),
+            calls_per_second=calls_per_second,
+            progress=progress_reporter(ctx)
+        )
+
     # Create operations
-    @mcp.tool()
+    @mcp.tool(group="capacity")
     def create_capacity_provider(
         name: str,
         auto_scaling_group_provider: Dict[str, Any],
@@ -41,7 +201,7 @@ def register_write_tools(mcp, get_ecs_client: Callable):
         response = client.create_capacity_provider(**params)
         return response.get("capacityProvider", {})
     
-    @mcp.tool()
+    @mcp.tool(group="clusters")
     def create_cluster(cluster_name: str, tags: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """
         Create a new ECS cluster
@@ -60,7 +220,7 @@ def register_write_tools(mcp, get_ecs_client: Callable):
         response = client.create_cluster(**params)
         return response.get("cluster", {})
     
-    @mcp.tool()
+    @mcp.tool(group="services")
     def create_service(
         cluster: str, 
         service_name: str,
@@ -139,7 +299,7 @@ def register_write_tools(mcp, get_ecs_client: Callable):
         response = client.create_service(**params)
         return response.get("service", {})
     
-    @mcp.tool()
+    @mcp.tool(group="deployments")
     def create_task_set(
         cluster: str,
         service: str,
@@ -210,7 +370,7 @@ def register_write_tools(mcp, get_ecs_client: Callable):
         return response.get("taskSet", {})
     
     # Delete operations
-    @mcp.tool()
+    @mcp.tool(group="admin")
     def delete_account_setting(
         name: str,
         principal_arn: Optional[str] = None
@@ -231,7 +391,7 @@ def register_write_tools(mcp, get_ecs_client: Callable):
         response = client.delete_account_setting(**params)
         return response.get("setting", {})
     
-    @mcp.tool()
+    @mcp.tool(group="capacity")
     def delete_attributes(
         cluster: str,
         attributes: List[Dict[str, Any]]
@@ -248,11 +408,35 @@ def register_write_tools(mcp, get_ecs_client: Callable):
             cluster=cluster,
             attributes=attributes
         )
+        # Keep cluster queries and placement what-ifs current without waiting for a reload
+        attribute_index.record_delete(cluster, attributes)
         return {
             "attributes": response.get("attributes", [])
         }
     
-    @mcp.tool()
+    @mcp.tool(group="capacity")
+    def put_attributes(
+        cluster: str,
+        attributes: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Create or update attributes on Amazon ECS resources
+        
+        Args:
+            cluster: The cluster that contains the resources to apply the attributes to
+            attributes: The attributes to apply, each with name, value (optional), targetType and targetId
+        """
+        client = get_ecs_client()
+        response = client.put_attributes(
+            cluster=cluster,
+            attributes=attributes
+        )
+        attribute_index.record_put(cluster, attributes)
+        return {
+            "attributes": response.get("attributes", [])
+        }
+    
+    @mcp.tool(group="capacity")
     def delete_capacity_provider(capacity_provider: str) -> Dict[str, Any]:
         """
         Delete a capacity provider
@@ -264,7 +448,7 @@ def register_write_tools(mcp, get_ecs_client: Callable):
         response = client.delete_capacity_provider(capacityProvider=capacity_provider)
         return response.get("capacityProvider", {})
     
-    @mcp.tool()
+    @mcp.tool(group="clusters")
     def delete_cluster(cluster: str) -> Dict[str, Any]:
         """
         Delete an ECS cluster
@@ -276,7 +460,7 @@ def register_write_tools(mcp, get_ecs_client: Callable):
         response = client.delete_cluster(cluster=cluster)
         return response.get("cluster", {})
     
-    @mcp.tool()
+    @mcp.tool(group="services")
     def delete_service(
         cluster: str,
         service: str,
@@ -298,7 +482,7 @@ def register_write_tools(mcp, get_ecs_client: Callable):
         )
         return response.get("service", {})
     
-    @mcp.tool()
+    @mcp.tool(group="deployments")
     def delete_task_set(
         cluster: str,
         service: str,
@@ -323,7 +507,7 @@ def register_write_tools(mcp, get_ecs_client: Callable):
         )
         return response.get("taskSet", {})
     
-    @mcp.tool()
+    @mcp.tool(group="task_definitions")
     def deregister_task_definition(
         task_definition: str
     ) -> Dict[str, Any]:
@@ -337,7 +521,7 @@ def register_write_tools(mcp, get_ecs_client: Callable):
         response = client.deregister_task_definition(taskDefinition=task_definition)
         return response.get("taskDefinition", {})
     
-    @mcp.tool()
+    @mcp.tool(group="task_definitions")
     def register_task_definition(
         family: str,
         container_definitions: List[Dict[str, Any]],
@@ -354,10 +538,14 @@ def register_write_tools(mcp, get_ecs_client: Callable):
         ipc_mode: Optional[str] = None,
         proxy_configuration: Optional[Dict[str, Any]] = None,
         runtime_platform: Optional[Dict[str, Any]] = None,
-        ephemeral_storage: Optional[Dict[str, Any]] = None
+        ephemeral_storage: Optional[Dict[str, Any]] = None,
+        skip_if_unchanged: bool = False
     ) -> Dict[str, Any]:
         """
         Register a new task definition
+        When skip_if_unchanged is set and the definition and tags match the latest revision
+        of the family, no new revision is created and the latest revision is returned with
+        skipped set
         
         Args:
             family: The family name for the task definition
@@ -376,6 +564,7 @@ def register_write_tools(mcp, get_ecs_client: Callable):
             proxy_configuration: The configuration details for the App Mesh proxy
             runtime_platform: The operating system that your tasks are running on
             ephemeral_storage: The amount of ephemeral storage to allocate for the task
+            skip_if_unchanged: Skip registration when neither the definition nor the tags changed since the latest revision (default: False)
         """
         client = get_ecs_client()
         params = {
@@ -426,10 +615,22 @@ def register_write_tools(mcp, get_ecs_client: Callable):
         if ephemeral_storage:
             params["ephemeralStorage"] = ephemeral_storage
             
+        if skip_if_unchanged:
+            try:
+                response = client.describe_task_definition(taskDefinition=family, include=["TAGS"])
+                latest, latest_tags = response.get("taskDefinition", {}), response.get("tags", [])
+            except ClientError:
+                # The family has no active revision yet
+                latest, latest_tags = None, []
+                
+            if latest and latest.get("status") == "ACTIVE" and \
+                    task_definition_hash(latest, latest_tags) == task_definition_hash(params, params.get("tags", [])):
+                return dict(latest, skipped=True)
+            
         response = client.register_task_definition(**params)
         return response.get("taskDefinition", {})
     
-    @mcp.tool()
+    @mcp.tool(group="tasks")
     def run_task(
         cluster: str,
         task_definition: str,
@@ -522,7 +723,61 @@ def register_write_tools(mcp, get_ecs_client: Callable):
         response = client.run_task(**params)
         return response.get("tasks", [])
     
-    @mcp.tool()
+    # Steps wait for both task sets to stabilize, so a full shift has no overall deadline
+    @mcp.tool(group="deployments", timeout=0)
+    def shift_task_set_traffic(
+        cluster: str,
+        service: str,
+        source_task_set: str,
+        target_task_set: str,
+        strategy: str = "linear",
+        step_percent: float = 25,
+        canary_percent: float = 10,
+        bake_seconds: float = 0,
+        step_timeout_seconds: float = 600,
+        min_poll_interval_seconds: float = 2,
+        max_poll_interval_seconds: float = 30,
+        rollback: bool = True,
+        ctx: Context = None
+    ) -> Dict[str, Any]:
+        """
+        Shift scale from one task set of an external-deployment service to another in steps
+        Each step scales the target up and the source down together and waits until both are
+        steady; a step that fails or times out restores the original scales
+
+        Args:
+            cluster: The short name or ARN of the cluster that hosts the service
+            service: The short name or ARN of the service
+            source_task_set: ID or ARN of the task set to scale down
+            target_task_set: ID or ARN of the task set to scale up
+            strategy: linear (steps of step_percent) or canary (canary_percent, then 100) (default: linear)
+            step_percent: Scale added to the target per linear step (default: 25)
+            canary_percent: Target scale of the canary step (default: 10)
+            bake_seconds: Time to hold each step before the next one (default: 0)
+            step_timeout_seconds: Maximum time for a step to become steady (default: 600)
+            min_poll_interval_seconds: Shortest time between task set polls (default: 2)
+            max_poll_interval_seconds: Longest time between task set polls (default: 30)
+            rollback: Restore the original scales when a step fails (default: True)
+        """
+        client = get_ecs_client()
+        return shift_traffic(
+            client,
+            cluster,
+            service,
+            source_task_set,
+            target_task_set,
+            strategy=strategy,
+            step_percent=step_percent,
+            canary_percent=canary_percent,
+            bake_seconds=bake_seconds,
+            step_timeout=step_timeout_seconds,
+            min_poll_interval=min_poll_interval_seconds,
+            max_poll_interval=max(min_poll_interval_seconds, max_poll_interval_seconds),
+            rollback=rollback,
+            progress=progress_reporter(ctx)
+        )
+
+    @mcp.tool(group="tasks")
     def stop_task(
         cluster: str,
         task: str,
@@ -548,7 +803,30 @@ def register_write_tools(mcp, get_ecs_client: Callable):
         response = client.stop_task(**params)
         return response.get("task", {})
     
-    @mcp.tool()
+    @mcp.tool(group="capacity")
+    def sync_attributes(
+        cluster: str,
+        desired: Dict[str, Dict[str, Optional[str]]],
+        prune: bool = False,
+        refresh: bool = True,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Bring container instance attributes to a desired state with the fewest writes
+        Diffs the desired attributes against the current ones and only puts changed or missing
+        attributes (and deletes undesired ones with prune), in concurrent chunks of 10
+
+        Args:
+            cluster: The cluster of the container instances
+            desired: Attributes by container instance ARN or ID, e.g. {"<instance id>": {"stack": "prod", "gpu": null}}; null is an attribute without value
+            prune: Also delete custom attributes of these instances that are not in desired (default: False)
+            refresh: Reload the current attributes with ListAttributes first; false diffs against the cached attribute index (default: True)
+            dry_run: Only return the attributes that would be put and deleted (default: False)
+        """
+        client = get_ecs_client()
+        return sync_instance_attributes(client, attribute_index, cluster, desired, prune, refresh, dry_run)
+
+    @mcp.tool(group="services")
     def update_service(
         cluster: str,
         service: str,
@@ -617,7 +895,7 @@ def register_write_tools(mcp, get_ecs_client: Callable):
         response = client.update_service(**params)
         return response.get("service", {})
     
-    @mcp.tool()
+    @mcp.tool(group="tasks")
     def update_task_protection(
         cluster: str,
         tasks: List[str],
@@ -649,7 +927,7 @@ def register_write_tools(mcp, get_ecs_client: Callable):
             "failures": response.get("failures", [])
         }
     
-    @mcp.tool()
+    @mcp.tool(group="deployments")
     def update_task_set(
         cluster: str,
         service: str,
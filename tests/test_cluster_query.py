@@ -0,0 +1,36 @@
+import pytest
+
+from src.cluster_query import compile_query, instance_record
+
+
+def _instance(zone, instance_type='t3.large', running=0):
+    return instance_record({
+        'attributes': [
+            {'name': 'ecs.availability-zone', 'value': zone},
+            {'name': 'ecs.instance-type', 'value': instance_type},
+        ],
+        'runningTasksCount': running,
+    })
+
+
+@pytest.mark.parametrize('expression', [
+    'attribute:ecs.availability-zone in [us-east-1a, us-east-1b]',
+    'attribute:ecs.availability-zone in (us-east-1a, us-east-1b)',
+])
+def test_in_list(expression):
+    query = compile_query(expression)
+    assert query.matches(_instance('us-east-1a'))
+    assert query.matches(_instance('us-east-1b'))
+    assert not query.matches(_instance('us-east-1c'))
+
+
+def test_not_in_bracket_list_combined():
+    query = compile_query('attribute:ecs.instance-type =~ t3.* and not attribute:ecs.availability-zone in [us-east-1a]')
+    assert query.matches(_instance('us-east-1b'))
+    assert not query.matches(_instance('us-east-1a'))
+    assert not query.matches(_instance('us-east-1b', instance_type='m5.large'))
+
+
+def test_mismatched_list_brackets():
+    with pytest.raises(ValueError):
+        compile_query('attribute:ecs.availability-zone in [us-east-1a, us-east-1b)')
@@ -3,30 +3,36 @@
 AWS ECS MCP Server (Write-only version)
 """
 
-import boto3
 import os
-from mcp.server.fastmcp import FastMCP
+
+from src.resolver import ArnResolver
+from src.runtime import ECSFastMCP, create_ecs_client_factory, create_profiler, parse_server_args, run_server
 
 # Get AWS authentication credentials
 aws_profile = os.environ.get("AWS_PROFILE")
 aws_region = os.environ.get("AWS_REGION", "ap-northeast-1")  # Default is Tokyo region
 
-# Create MCP server
-mcp = FastMCP("AWS ECS Write-Only Server")
+# Parse command line options (transport, enabled tool groups)
+args = parse_server_args("AWS ECS Write-Only Server")
 
-# Initialize ECS client
-def get_ecs_client():
-    session = boto3.Session(
-        profile_name=aws_profile,
-        region_name=aws_region
-    )
-    return session.client('ecs')
+# Initialize ECS client (shared by all tools and clients of this process)
+get_ecs_client = create_ecs_client_factory(aws_profile, aws_region, fake_backend=args.fake_backend,
+                                           snapshot=args.snapshot)
+
+# Create MCP server
+mcp = ECSFastMCP(
+    "AWS ECS Write-Only Server",
+    tool_groups=args.tool_groups,
+    compact_descriptions=args.compact_descriptions,
+    profiler=create_profiler(args),
+    resolver=ArnResolver(get_ecs_client)
+)
 
 # Import tools from helpers
 from src.write_tools import register_write_tools
 
 # Register write tools
-register_write_tools(mcp, get_ecs_client)
+register_write_tools(mcp, get_ecs_client, snapshot_dir=args.snapshot_dir)
 
 if __name__ == "__main__":
-    mcp.run()
+    run_server(mcp, args)